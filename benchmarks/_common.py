@@ -0,0 +1,90 @@
+"""Helpers shared by the benchmark scripts."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+import datetime
+import os
+from pathlib import Path
+import random
+import statistics
+import tempfile
+from typing import Any
+
+TAGS: list[str] = [f"tag{i}" for i in range(50)]
+WORDS: list[str] = [
+    "fixing",
+    "writing",
+    "reviewing",
+    "the",
+    "a",
+    "code",
+    "docs",
+    "tests",
+    "bug",
+    "release",
+    "meeting",
+    "with",
+    "team",
+]
+
+
+def isolated_env() -> dict[str, str]:
+    """
+    Return a copy of the environment whose config/data dirs point to a
+    throwaway directory, so benchmarks never touch the real database or settings.
+    """
+    root = Path(tempfile.mkdtemp(prefix="workedon-bench-"))
+    env = os.environ.copy()
+    env.update(
+        {
+            "HOME": str(root),
+            "XDG_CONFIG_HOME": str(root / "config"),
+            "XDG_DATA_HOME": str(root / "data"),
+            "XDG_CACHE_HOME": str(root / "cache"),
+            "XDG_RUNTIME_DIR": str(root / "runtime"),
+        }
+    )
+    return env
+
+
+def isolate() -> None:
+    """
+    Point this process at a throwaway config/data dir.
+    Must be called before anything from workedon is imported.
+    """
+    os.environ.update(isolated_env())
+
+
+def summarize(samples: list[float]) -> str:
+    """
+    Format a list of timings (in seconds) as median/min/max milliseconds.
+    """
+    return (
+        f"median {statistics.median(samples) * 1000:8.2f} ms | "
+        f"min {min(samples) * 1000:8.2f} ms | "
+        f"max {max(samples) * 1000:8.2f} ms"
+    )
+
+
+def synthetic_records(count: int, seed: int = 0) -> Iterator[dict[str, Any]]:
+    """
+    Yield `count` work records shaped like the import format, spread over
+    the past `count // 20` days (about 20 a day), most recent last. About a
+    third have no tags and a quarter have no duration, like a real log.
+    """
+    rng = random.Random(seed)  # noqa: S311
+    end = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(minutes=1)
+    span = datetime.timedelta(days=max(count // 20, 1)).total_seconds()
+    for i in range(count):
+        timestamp = end - datetime.timedelta(seconds=span * (count - i) / count)
+        record: dict[str, Any] = {
+            "work": " ".join(rng.choices(WORDS, k=rng.randint(2, 8))),
+            "timestamp": timestamp.isoformat(),
+        }
+        tag_count = rng.choice((0, 0, 1, 1, 2, 3))
+        if tag_count:
+            record["tags"] = rng.sample(TAGS, tag_count)
+        if rng.random() > 0.25:
+            record["duration"] = rng.choice((5, 15, 30, 45, 60, 90, 120, 240))
+        yield record
@@ -0,0 +1,71 @@
+"""
+Daemon benchmark for the `wo` command.
+
+Measures the wall time of common invocations in a fresh interpreter,
+run in-process and then forwarded to `wo daemon`, against a database
+of synthetic entries.
+
+Usage:
+    python -m benchmarks.bench_daemon [--runs N] [--rows N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks._common import isolated_env, summarize, synthetic_records
+
+COMMANDS: dict[str, list[str]] = {
+    "wo what --today": ["what", "--today", "--no-page"],
+    "wo what -l -n 20": ["what", "-l", "-n", "20", "--no-page"],
+    "wo <text>": ["benchmarking", "the", "daemon"],
+    "wo <text> @ <date>": ["benchmarking", "the", "daemon", "@", "3pm", "yesterday"],
+}
+
+
+def _python(args: list[str], env: dict[str, str]) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *args], capture_output=True, check=True, env=env)
+    return time.perf_counter() - start
+
+
+def _wo(args: list[str], env: dict[str, str]) -> float:
+    return _python(["-m", "workedon", *args], env)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--runs", type=int, default=20)
+    arg_parser.add_argument("--rows", type=int, default=10000)
+    args = arg_parser.parse_args()
+    env = isolated_env()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "work.jsonl"
+        with path.open("w") as f:
+            for record in synthetic_records(args.rows):
+                f.write(json.dumps(record) + "\n")
+        _wo(["import", str(path)], env)
+
+    print(f"Wall time ({args.runs} runs, {args.rows} rows)")
+    start = [_python(["-c", "pass"], env) for _ in range(args.runs)]
+    print(f"  {'python':<10} {'(interpreter startup)':<24} {summarize(start)}")
+    for mode in ("in-process", "daemon"):
+        if mode == "daemon":
+            _wo(["daemon", "start"], env)
+        try:
+            for label, command in COMMANDS.items():
+                samples = [_wo(command, env) for _ in range(args.runs)]
+                print(f"  {mode:<10} {label:<24} {summarize(samples)}")
+        finally:
+            if mode == "daemon":
+                _wo(["daemon", "stop"], env)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Date parsing benchmark.
+
+Times InputParser.parse_datetime on the phrases used by the `what` date
+filters and the common `@ <date>` ones, through the native parser and
+through dateparser, the throughput of both on a mix of those phrases,
+plus the wall time of `wo what` with date filters in a fresh interpreter.
+
+Usage:
+    python -m benchmarks.bench_dates [--runs N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+import time
+
+from benchmarks._common import isolate, isolated_env, summarize
+
+isolate()
+
+from workedon import parser  # noqa: E402
+from workedon.conf import settings  # noqa: E402
+from workedon.parser import InputParser, _parse_with_dateparser  # noqa: E402
+from workedon.utils import now  # noqa: E402
+
+PHRASES: list[str] = [
+    "12am today",
+    "12am yesterday",
+    "yesterday",
+    "1 month ago",
+    "1 year ago",
+    "3 hours ago",
+    "2pm",
+    "14:30",
+    "friday",
+    "3pm friday",
+    "2024-01-15 14:30",
+    "Jan 4 2022",
+]
+COMMANDS: dict[str, list[str]] = {
+    "wo what --today": ["what", "--today", "--no-page"],
+    "wo what --yesterday": ["what", "--yesterday", "--no-page"],
+    "wo what --past-month": ["what", "--past-month", "--no-page"],
+    "wo what --since '3pm friday'": ["what", "--since", "3pm friday", "--no-page"],
+    "wo what --since 'Jan 4 2022'": ["what", "--since", "Jan 4 2022", "--no-page"],
+}
+
+
+def _time(func: object, runs: int) -> list[float]:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()  # type: ignore[operator]
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--runs", type=int, default=200)
+    runs = arg_parser.parse_args().runs
+    settings.configure()
+    # load dateparser before timing it
+    _parse_with_dateparser("yesterday", now())
+
+    print(f"parse_datetime ({runs} runs)")
+    for phrase in PHRASES:
+        fast = _time(lambda phrase=phrase: InputParser().parse_datetime(phrase), runs)
+        slow = _time(lambda phrase=phrase: _parse_with_dateparser(phrase, now()), runs)
+        print(f"  {phrase!r:<18} parse_datetime {summarize(fast)}")
+        print(f"  {'':<18} dateparser     {summarize(slow)}")
+
+    mix = PHRASES * 50
+    print(f"Throughput ({len(mix)} phrases, mixed)")
+    (native,) = _time(lambda: [InputParser().parse_datetime(phrase) for phrase in mix], 1)
+    # without the native parser, every phrase goes through dateparser
+    parser.parse_common = lambda phrase: None  # type: ignore[assignment]
+    (slow,) = _time(lambda: [InputParser().parse_datetime(phrase) for phrase in mix], 1)
+    print(f"  native      {len(mix) / native:10.0f} phrases/s")
+    print(f"  dateparser  {len(mix) / slow:10.0f} phrases/s")
+
+    env = isolated_env()
+    subprocess.run(
+        [sys.executable, "-m", "workedon", "warming", "up"],
+        capture_output=True,
+        check=True,
+        env=env,
+    )
+    wall_runs = max(runs // 20, 5)
+    print(f"Wall time ({wall_runs} runs)")
+    for label, args in COMMANDS.items():
+        samples = _time(
+            lambda args=args: subprocess.run(
+                [sys.executable, "-m", "workedon", *args], capture_output=True, check=True, env=env
+            ),
+            wall_runs,
+        )
+        print(f"  {label:<30} {summarize(samples)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Lock hold time of `wo what --delete`.
+
+Imports a synthetic log, then deletes its oldest entries the way
+`--delete` used to, in a single statement, and as many of the next
+oldest in batches of DELETE_BATCH_SIZE, each committed on its own. The
+time a batch takes is how long another writer may wait for the database.
+
+Usage:
+    python -m benchmarks.bench_delete [--rows N] [--delete N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+from pathlib import Path
+import tempfile
+import time
+
+from benchmarks._common import isolate, summarize, synthetic_records
+
+isolate()
+
+from workedon.conf import settings  # noqa: E402
+from workedon.constants import DELETE_BATCH_SIZE  # noqa: E402
+from workedon.models import Work, delete_unused_tags, delete_work, init_db  # noqa: E402
+from workedon.workedon import import_work  # noqa: E402
+
+
+def oldest(count: int) -> list[int]:
+    query = Work.select(Work.id).order_by(Work.timestamp).limit(count)
+    return [work_id for (work_id,) in query.tuples()]
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--rows", type=int, default=100_000)
+    arg_parser.add_argument("--delete", type=int, default=20_000)
+    args = arg_parser.parse_args()
+
+    source = Path(tempfile.mkdtemp()) / "work.jsonl"
+    with source.open("w") as file:
+        for record in synthetic_records(args.rows):
+            file.write(json.dumps(record) + "\n")
+    settings.configure()
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        import_work(str(source), "jsonl", 10_000)
+
+    print(f"deleting {args.delete} of {args.rows} entries")
+    with init_db() as db:
+        work_ids = oldest(args.delete)
+        start = time.perf_counter()
+        with db.atomic():
+            Work.delete().where(Work.id.in_(work_ids)).execute()
+        elapsed = time.perf_counter() - start
+        print(f"  one statement   {elapsed * 1000:10.2f} ms held")
+
+        work_ids = oldest(args.delete)
+        samples = []
+        start = time.perf_counter()
+        for _ in delete_work(work_ids, DELETE_BATCH_SIZE):
+            samples.append(time.perf_counter() - start)
+            start = time.perf_counter()
+        print(f"  {len(samples)} batches of {DELETE_BATCH_SIZE} | {summarize(samples)}")
+        print(f"  {'':14} {sum(samples) * 1000:10.2f} ms in all")
+        start = time.perf_counter()
+        pruned = delete_unused_tags()
+        elapsed = time.perf_counter() - start
+    print(f"  unused tags     {elapsed * 1000:10.2f} ms ({pruned} deleted)")
+
+
+if __name__ == "__main__":
+    main()
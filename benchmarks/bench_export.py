@@ -0,0 +1,57 @@
+"""
+Streaming export throughput of `wo export`.
+
+Imports a synthetic log, then exports all of it to JSONL and CSV files.
+
+Usage:
+    python -m benchmarks.bench_export [--rows N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+from pathlib import Path
+import tempfile
+import time
+
+from benchmarks._common import isolate, synthetic_records
+
+isolate()
+
+from workedon.conf import settings  # noqa: E402
+from workedon.workedon import export_work, import_work  # noqa: E402
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--rows", type=int, default=100_000)
+    args = arg_parser.parse_args()
+
+    directory = Path(tempfile.mkdtemp())
+    source = directory / "work.jsonl"
+    with source.open("w") as file:
+        for record in synthetic_records(args.rows):
+            file.write(json.dumps(record) + "\n")
+    settings.configure()
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        import_work(str(source), "jsonl", 10_000)
+
+    for file_format in ("jsonl", "csv"):
+        path = directory / f"export.{file_format}"
+        start = time.perf_counter()
+        with contextlib.redirect_stderr(io.StringIO()):
+            export_work(
+                str(path), file_format, None, "", "", "", "", None, None, None, False, (), "", True
+            )
+        elapsed = time.perf_counter() - start
+        print(
+            f"Exported {args.rows} entries to {file_format:5} in {elapsed:.2f} s "
+            f"({args.rows / elapsed:,.0f} entries/s, {path.stat().st_size / 1e6:.1f} MB)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Latency of `wo what` over a large synthetic database.
+
+For a few common filters, times the whole fetch (rendering to /dev/null)
+and the exists() + count() queries it used to run before the rows.
+
+Usage:
+    python -m benchmarks.bench_fetch [--rows N] [--repeat N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+from pathlib import Path
+import tempfile
+import time
+from typing import Any
+
+from benchmarks._common import isolate, summarize, synthetic_records
+
+isolate()
+
+from workedon.conf import settings  # noqa: E402
+from workedon.models import Work, init_db  # noqa: E402
+from workedon.workedon import _filter_work, fetch_work, import_work  # noqa: E402
+
+FILTERS: dict[str, dict[str, Any]] = {
+    "past week": {},
+    "past year": {"period": "year"},
+    "tag, past year": {"period": "year", "tags": ("tag7",)},
+    "last 10": {"count": 10},
+}
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--rows", type=int, default=1_000_000)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    source = Path(tempfile.mkdtemp()) / "work.jsonl"
+    with source.open("w") as file:
+        for record in synthetic_records(args.rows):
+            file.write(json.dumps(record) + "\n")
+    settings.configure()
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        import_work(str(source), "jsonl", 10_000)
+
+    for name, options in FILTERS.items():
+        filters = {
+            "count": None,
+            "work_id": "",
+            "start_date": "",
+            "end_date": "",
+            "since": "",
+            "period": None,
+            "on": None,
+            "at": None,
+            "reverse": False,
+            "tags": (),
+            "duration": "",
+            **options,
+        }
+        fetch, probes = [], []
+        for _ in range(args.repeat):
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                start = time.perf_counter()
+                fetch_work(delete=False, no_page=False, text_only=False, **filters)
+                fetch.append(time.perf_counter() - start)
+            work_set = _filter_work(Work.select(Work.uuid), **filters)
+            with init_db():
+                start = time.perf_counter()
+                work_set.exists()
+                work_set.count()
+                probes.append(time.perf_counter() - start)
+        print(f"{name:15} fetch        | {summarize(fetch)}")
+        print(f"{name:15} exists+count | {summarize(probes)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Bulk import throughput of `wo import`.
+
+Writes a synthetic JSONL file and imports it into an empty database.
+
+Usage:
+    python -m benchmarks.bench_import [--rows N] [--batch-size N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+import tempfile
+import time
+
+from benchmarks._common import isolate, synthetic_records
+
+isolate()
+
+from workedon.conf import settings  # noqa: E402
+from workedon.constants import IMPORT_BATCH_SIZE  # noqa: E402
+from workedon.workedon import import_work  # noqa: E402
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--rows", type=int, default=100_000)
+    arg_parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = arg_parser.parse_args()
+
+    path = Path(tempfile.mkdtemp()) / "work.jsonl"
+    with path.open("w") as file:
+        for record in synthetic_records(args.rows):
+            file.write(json.dumps(record) + "\n")
+
+    settings.configure()
+    start = time.perf_counter()
+    import_work(str(path), "jsonl", args.batch_size)
+    elapsed = time.perf_counter() - start
+    print(
+        f"Imported {args.rows} entries in {elapsed:.2f} s "
+        f"({args.rows / elapsed:,.0f} entries/s, batch size {args.batch_size})"
+    )
+
+
+if __name__ == "__main__":
+    main()
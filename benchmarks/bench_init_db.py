@@ -0,0 +1,97 @@
+"""
+Per-invocation overhead of opening the database with `init_db()`.
+
+Compares:
+- legacy: what every command used to do (connect, run the migration
+  ladder, "PRAGMA optimize" and close).
+- new process: a fresh `wo` process with a current schema (one
+  "PRAGMA user_version" read, optimize skipped until it's due).
+- same process: repeated connections in one process (schema already verified).
+
+Usage:
+    python -m benchmarks.bench_init_db [--rows N] [--runs N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from peewee import chunked
+
+from benchmarks._common import isolate, summarize
+
+isolate()
+
+from workedon import models  # noqa: E402
+from workedon.conf import settings  # noqa: E402
+
+
+def _legacy() -> None:
+    db = models._db
+    db.connect()
+    models._apply_pending_migrations(db)
+    db.execute_sql("PRAGMA optimize;")
+    db.close()
+
+
+def _new_process() -> None:
+    models._verified_schemas.clear()
+    with models.init_db():
+        pass
+
+
+def _same_process() -> None:
+    with models.init_db():
+        pass
+
+
+def _legacy_save() -> None:
+    db = models._db
+    db.connect()
+    models._apply_pending_migrations(db)
+    models.Work.create(work="saved")
+    db.execute_sql("PRAGMA optimize;")
+    db.close()
+
+
+def _new_process_save() -> None:
+    models._verified_schemas.clear()
+    with models.init_db():
+        models.Work.create(work="saved")
+
+
+def _time(func: object, runs: int) -> list[float]:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()  # type: ignore[operator]
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--rows", type=int, default=10_000)
+    arg_parser.add_argument("--runs", type=int, default=500)
+    args = arg_parser.parse_args()
+
+    settings.configure()
+    with models.init_db() as db, db.atomic():
+        rows = ({"work": f"entry {i}", "duration": i % 90} for i in range(args.rows))
+        for batch in chunked(rows, 1000):
+            models.Work.insert_many(batch).execute()
+
+    print(f"init_db() overhead, {args.rows} rows, {args.runs} runs")
+    for label, func in (
+        ("legacy (migrate + optimize)", _legacy),
+        ("new process (fast check)", _new_process),
+        ("same process (verified)", _same_process),
+        ("legacy, with a save", _legacy_save),
+        ("new process, with a save", _new_process_save),
+    ):
+        print(f"  {label:<30} {summarize(_time(func, args.runs))}")
+
+
+if __name__ == "__main__":
+    main()
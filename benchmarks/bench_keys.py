@@ -0,0 +1,131 @@
+"""
+Size and speed of integer primary keys against the uuid keys used before v6.
+
+Imports a synthetic log, makes a copy keyed by uuid strings like before,
+and compares the sizes of the tables, a tag filter and a bulk delete.
+The copy has no full-text index, so its deletes skip the index triggers.
+
+Usage:
+    python -m benchmarks.bench_keys [--rows N] [--repeat N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+from pathlib import Path
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from benchmarks._common import isolate, summarize, synthetic_records
+
+isolate()
+
+from workedon.conf import settings  # noqa: E402
+from workedon.models import DB_PATH  # noqa: E402
+from workedon.workedon import import_work  # noqa: E402
+
+UUID_LAYOUT: list[str] = [
+    'CREATE TABLE "work_old" ("uuid" VARCHAR(255) NOT NULL PRIMARY KEY, "created" INTEGER'
+    ' NOT NULL, "work" TEXT NOT NULL, "timestamp" INTEGER NOT NULL, "duration" REAL)',
+    'CREATE TABLE "tag_old" ("uuid" VARCHAR(255) NOT NULL PRIMARY KEY,'
+    ' "name" VARCHAR(255) NOT NULL, "created" INTEGER NOT NULL)',
+    'CREATE TABLE "work_tag_old" ("work_id" VARCHAR(255) NOT NULL, "tag_id" VARCHAR(255)'
+    ' NOT NULL, PRIMARY KEY ("work_id", "tag_id"), FOREIGN KEY ("work_id") REFERENCES'
+    ' "work" ("uuid") ON DELETE CASCADE, FOREIGN KEY ("tag_id") REFERENCES "tag" ("uuid"))',
+    "INSERT INTO work_old SELECT uuid, created, work, timestamp, duration FROM work",
+    "INSERT INTO tag_old SELECT lower(hex(randomblob(16))), name, created FROM tag",
+    "INSERT INTO work_tag_old SELECT w.uuid, t_old.uuid FROM work_tag"
+    " JOIN work AS w ON w.id = work_tag.work_id JOIN tag ON tag.id = work_tag.tag_id"
+    " JOIN tag_old AS t_old ON t_old.name = tag.name",
+    "DROP TABLE work_fts",
+    "DROP TABLE work_tag",
+    "DROP TABLE work",
+    "DROP TABLE tag",
+    "ALTER TABLE work_old RENAME TO work",
+    "ALTER TABLE tag_old RENAME TO tag",
+    "ALTER TABLE work_tag_old RENAME TO work_tag",
+    'CREATE INDEX "work_timestamp" ON "work" ("timestamp")',
+    'CREATE INDEX "work_duration" ON "work" ("duration")',
+    'CREATE UNIQUE INDEX "tag_name" ON "tag" ("name")',
+    'CREATE INDEX "worktag_work_id" ON "work_tag" ("work_id")',
+    'CREATE INDEX "worktag_tag_id" ON "work_tag" ("tag_id")',
+]
+# (tag filter, delete) in each layout, as `wo what -T tag7 -n 20` and `--delete` run them
+QUERIES: dict[str, tuple[str, str]] = {
+    "uuid": (
+        "SELECT uuid FROM work WHERE uuid IN (SELECT work_id FROM work_tag WHERE tag_id IN"
+        " (SELECT uuid FROM tag WHERE name IN ('tag7'))) ORDER BY timestamp DESC LIMIT 20",
+        "DELETE FROM work WHERE uuid IN (SELECT uuid FROM work WHERE timestamp >= ?)",
+    ),
+    "rowid": (
+        "SELECT uuid FROM work WHERE id IN (SELECT work_id FROM work_tag WHERE tag_id IN"
+        " (SELECT id FROM tag WHERE name IN ('tag7'))) ORDER BY timestamp DESC LIMIT 20",
+        "DELETE FROM work WHERE id IN (SELECT id FROM work WHERE timestamp >= ?)",
+    ),
+}
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--rows", type=int, default=1_000_000)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    directory = Path(tempfile.mkdtemp())
+    source = directory / "work.jsonl"
+    with source.open("w") as file:
+        for record in synthetic_records(args.rows):
+            file.write(json.dumps(record) + "\n")
+    settings.configure()
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        import_work(str(source), "jsonl", 10_000)
+
+    paths = {"uuid": directory / "uuid.db", "rowid": directory / "rowid.db"}
+    for path in paths.values():
+        shutil.copy(DB_PATH, path)
+    connection = sqlite3.connect(paths["uuid"])
+    for statement in UUID_LAYOUT:
+        connection.execute(statement)
+    connection.commit()
+    connection.close()
+
+    for layout, path in paths.items():
+        connection = sqlite3.connect(path, isolation_level=None)
+        connection.execute("PRAGMA foreign_keys = ON")
+        connection.execute("VACUUM")
+        # needs SQLite built with the dbstat table
+        with contextlib.suppress(sqlite3.OperationalError):
+            sizes = connection.execute(
+                "SELECT name, sum(pgsize) FROM dbstat WHERE name NOT LIKE 'work_fts%'"
+                " AND name NOT IN ('sqlite_schema', 'sqlite_stat1') GROUP BY name ORDER BY name"
+            )
+            for name, size in sizes:
+                print(f"{layout:5} {name:28} | {size / 1e6:8.1f} MB")
+        tag_filter, delete = QUERIES[layout]
+        # the most recent 10% of the log
+        since = connection.execute(
+            "SELECT timestamp FROM work ORDER BY timestamp DESC LIMIT 1 OFFSET ?",
+            (args.rows // 10,),
+        ).fetchone()[0]
+        filters, deletes = [], []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            connection.execute(tag_filter).fetchall()
+            filters.append(time.perf_counter() - start)
+            connection.execute("BEGIN")
+            start = time.perf_counter()
+            connection.execute(delete, (since,))
+            deletes.append(time.perf_counter() - start)
+            connection.execute("ROLLBACK")
+        print(f"{layout:5} tag filter                   | {summarize(filters)}")
+        print(f"{layout:5} delete 10%                   | {summarize(deletes)}")
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
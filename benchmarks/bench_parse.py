@@ -0,0 +1,81 @@
+"""
+Work text parsing throughput, in texts per second.
+
+Times the extraction of the duration and tags of work texts and their
+cleanup: the way InputParser.parse used to do it (five scans with
+uncompiled patterns), with the compiled patterns of parse_duration,
+parse_tags and clean_work, and with the single scan of tokenize.
+
+Usage:
+    python -m benchmarks.bench_parse [--texts N] [--runs N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+import time
+
+from benchmarks._common import isolate, summarize, synthetic_records
+
+isolate()
+
+from workedon.parser import InputParser  # noqa: E402
+
+_TAG = r"#([\w\d_-]+)"
+_DURATION = r"\[\s*(\d+(?:\.\d+)?)\s*(h|hr|hrs|hours|m|min|mins|minutes)\s*\]"
+
+
+def legacy(text: str) -> tuple[str, float | None, set[str]]:
+    duration = None
+    match = re.search(_DURATION, text, flags=re.IGNORECASE)
+    if match:
+        value, unit = match.groups()
+        duration = round(float(value) * 60, 2) if unit.lower()[0] == "h" else float(value)
+    tags = set(re.findall(_TAG, text))
+    work = re.sub(_DURATION, "", text, count=1, flags=re.IGNORECASE).strip()
+    work = re.sub(_TAG, "", work)
+    return re.sub(r"\s+", " ", work).strip(), duration, tags
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--texts", type=int, default=20_000)
+    arg_parser.add_argument("--runs", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    # texts as typed on the command line, with inline tags and durations
+    texts = []
+    for record in synthetic_records(args.texts):
+        text = record["work"]
+        if "tags" in record:
+            text += " " + " ".join(f"#{tag}" for tag in record["tags"])
+        if "duration" in record:
+            text = f"{text} [{record['duration']}m]"
+        texts.append(text)
+    parser = InputParser()
+    if [legacy(text) for text in texts] != [parser.tokenize(text) for text in texts]:
+        sys.exit("tokenize doesn't parse the texts like the legacy scans")
+
+    def separate(text: str) -> tuple[str, float | None, set[str]]:
+        return parser.clean_work(text), parser.parse_duration(text), parser.parse_tags(text)
+
+    print(f"{len(texts)} texts, {args.runs} runs")
+    for name, func in (
+        ("uncompiled, five scans", legacy),
+        ("compiled, five scans", separate),
+        ("tokenize, one scan", parser.tokenize),
+    ):
+        samples = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            for text in texts:
+                func(text)
+            samples.append(time.perf_counter() - start)
+        rate = len(texts) / min(samples)
+        print(f"  {name:24} {rate:12,.0f} texts/s | {summarize(samples)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Read and write throughput of each DB_PROFILE.
+
+For every profile, loads a synthetic log into a new database, then times:
+- load: inserting the entries and their tags, 10,000 a transaction,
+  parsed beforehand, so that only the database is timed.
+- saves: entries saved one at a time, each committed on its own, like
+  `wo <text>` does, where syncing to disk is most of the cost.
+- scan: reading every row, newest first, from a new connection each time.
+- lookups: reading entries by id, in a single connection.
+
+Usage:
+    python -m benchmarks.bench_profiles [--rows N] [--saves N] [--lookups N] [--repeat N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import datetime
+import random
+import time
+
+from benchmarks._common import isolate, summarize, synthetic_records
+
+isolate()
+
+from workedon.conf import DB_PATH, settings  # noqa: E402
+from workedon.models import (  # noqa: E402
+    DB_PROFILES,
+    Work,
+    add_tags,
+    init_db,
+    insert_rows,
+    tags_by_work_id,
+)
+from workedon.utils import get_default_time  # noqa: E402
+
+FIELDS = [Work.uuid, Work.work, Work.timestamp, Work.duration, Work.created]
+BATCH_SIZE = 10_000
+
+
+def _remove_db() -> None:
+    for suffix in ("", "-wal", "-shm"):
+        with contextlib.suppress(FileNotFoundError):
+            DB_PATH.with_name(DB_PATH.name + suffix).unlink()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--rows", type=int, default=1_000_000)
+    arg_parser.add_argument("--saves", type=int, default=200)
+    arg_parser.add_argument("--lookups", type=int, default=1000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    settings.configure()
+    created = get_default_time()
+    rows, work_tags = [], {}
+    for number, record in enumerate(synthetic_records(args.rows)):
+        uuid = f"{number:032x}"
+        timestamp = datetime.datetime.fromisoformat(record["timestamp"]).replace(
+            second=0, microsecond=0
+        )
+        rows.append((uuid, record["work"], timestamp, record.get("duration"), created))
+        if "tags" in record:
+            work_tags[uuid] = set(record["tags"])
+    rng = random.Random(0)  # noqa: S311
+
+    print(f"{args.rows} entries")
+    for profile in DB_PROFILES:
+        settings.DB_PROFILE = profile
+        _remove_db()
+        with init_db() as db:
+            start = time.perf_counter()
+            for offset in range(0, len(rows), BATCH_SIZE):
+                batch = rows[offset : offset + BATCH_SIZE]
+                with db.atomic():
+                    insert_rows(Work, FIELDS, batch)
+                    add_tags(
+                        tags_by_work_id(
+                            {row[0]: work_tags[row[0]] for row in batch if row[0] in work_tags}
+                        )
+                    )
+            elapsed = time.perf_counter() - start
+        print(f"{profile}")
+        print(f"  load     {args.rows / elapsed:12,.0f} rows/s")
+
+        with init_db() as db:
+            start = time.perf_counter()
+            for number in range(args.saves):
+                with db.atomic():
+                    Work.create(work=f"saved {number}")
+            elapsed = time.perf_counter() - start
+            print(f"  saves    {args.saves / elapsed:12,.0f} commits/s")
+            uuids = [uuid for (uuid,) in Work.select(Work.uuid).tuples()]
+
+        query = (
+            Work.select(Work.uuid, Work.timestamp, Work.work, Work.duration)
+            .order_by(Work.timestamp.desc())
+            .tuples()
+        )
+        samples = []
+        for _ in range(args.repeat):
+            with init_db():
+                start = time.perf_counter()
+                scanned = sum(1 for _ in query.clone())
+                samples.append(time.perf_counter() - start)
+        print(f"  scan     {scanned / min(samples):12,.0f} rows/s | {summarize(samples)}")
+
+        with init_db():
+            picked = rng.sample(uuids, min(args.lookups, len(uuids)))
+            start = time.perf_counter()
+            for uuid in picked:
+                Work.get(Work.uuid == uuid)
+            elapsed = time.perf_counter() - start
+        print(f"  lookups  {len(picked) / elapsed:12,.0f} rows/s")
+    _remove_db()
+
+
+if __name__ == "__main__":
+    main()
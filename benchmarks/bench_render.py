@@ -0,0 +1,78 @@
+"""
+Rendering throughput of `wo what`, in rows per second.
+
+Times WorkRenderer on in-memory rows (built once, and built per row as
+Work.__str__ does), then the whole stream of a synthetic database.
+
+Usage:
+    python -m benchmarks.bench_render [--rows N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+from pathlib import Path
+import tempfile
+import time
+
+from benchmarks._common import isolate, synthetic_records
+
+isolate()
+
+from workedon.conf import settings  # noqa: E402
+from workedon.models import Work, init_db  # noqa: E402
+from workedon.renderer import WorkRenderer  # noqa: E402
+from workedon.utils import get_unique_hash  # noqa: E402
+from workedon.workedon import _generate_work, import_work  # noqa: E402
+
+
+def report(name: str, rows: int, elapsed: float) -> None:
+    print(f"{name:26} {rows / elapsed:12,.0f} rows/s")
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--rows", type=int, default=100_000)
+    args = arg_parser.parse_args()
+    settings.configure()
+
+    rows = [
+        (
+            get_unique_hash(),
+            datetime.datetime.fromisoformat(record["timestamp"]),
+            record["work"],
+            record.get("duration"),
+            sorted(record.get("tags", [])),
+        )
+        for record in synthetic_records(args.rows)
+    ]
+    start = time.perf_counter()
+    renderer = WorkRenderer()
+    for row in rows:
+        renderer.render(*row)
+    report("renderer, once", args.rows, time.perf_counter() - start)
+    start = time.perf_counter()
+    for row in rows:
+        WorkRenderer().render(*row)
+    report("renderer, per row", args.rows, time.perf_counter() - start)
+
+    source = Path(tempfile.mkdtemp()) / "work.jsonl"
+    with source.open("w") as file:
+        for record in synthetic_records(args.rows):
+            file.write(json.dumps(record) + "\n")
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        import_work(str(source), "jsonl", 10_000)
+    work_set = Work.select(Work.uuid, Work.timestamp, Work.work, Work.duration)
+    with init_db():
+        start = time.perf_counter()
+        for _ in _generate_work(work_set.order_by(Work.timestamp.desc()), text_only=False):
+            pass
+        report("query and render", args.rows, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
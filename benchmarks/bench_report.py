@@ -0,0 +1,103 @@
+"""
+Aggregation speed of `wo report`.
+
+Imports a synthetic log spread over years, then reports on all of it and
+on the past year by day, week, month and tag: from the daily totals, and
+from the work itself, which is what happens when the daily totals are in
+another timezone. Compares with totalling the rows after reading them
+into Python.
+
+Usage:
+    python -m benchmarks.bench_report [--rows N]
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections import defaultdict
+import contextlib
+import io
+import json
+from pathlib import Path
+import tempfile
+import time
+import zoneinfo
+
+from benchmarks._common import isolate, synthetic_records
+
+isolate()
+
+from workedon.conf import settings  # noqa: E402
+from workedon.models import Work, init_db  # noqa: E402
+from workedon.workedon import import_work, report_work  # noqa: E402
+
+
+def python_totals() -> int:
+    """
+    Total the durations by local day after reading every row.
+    """
+    tz = zoneinfo.ZoneInfo(settings.TIME_ZONE)
+    totals: dict[str, float] = defaultdict(float)
+    with init_db():
+        for timestamp, duration in Work.select(Work.timestamp, Work.duration).tuples():
+            totals[timestamp.astimezone(tz).date().isoformat()] += duration or 0
+    return len(totals)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--rows", type=int, default=200_000)
+    args = arg_parser.parse_args()
+
+    source = Path(tempfile.mkdtemp()) / "work.jsonl"
+    with source.open("w") as file:
+        for record in synthetic_records(args.rows):
+            file.write(json.dumps(record) + "\n")
+    settings.configure()
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        import_work(str(source), "jsonl", 10_000)
+
+    print(f"{args.rows} entries over {args.rows // 20 / 365:.1f} years")
+    time_zone = settings.TIME_ZONE
+    for source, other_time_zone in (("daily totals", None), ("work", "UTC")):
+        settings.configure(user_settings={"TIME_ZONE": other_time_zone or time_zone})
+        if time_zone == settings.TIME_ZONE and other_time_zone:
+            settings.configure(user_settings={"TIME_ZONE": "Asia/Tokyo"})
+        print(f" from the {source}:")
+        for period, all_time in ((None, True), ("year", False)):
+            for group_by in ("day", "week", "month", "tag"):
+                output = io.StringIO()
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(output):
+                    report_work(
+                        group_by,
+                        None,
+                        "",
+                        "",
+                        "",
+                        "",
+                        period,
+                        None,
+                        None,
+                        False,
+                        (),
+                        "",
+                        "",
+                        all_time,
+                    )
+                elapsed = time.perf_counter() - start
+                groups = output.getvalue().count("\n") - 1
+                options = "--all" if all_time else f"--past-{period}"
+                print(
+                    f"  report {options:11} --by {group_by:6} {elapsed * 1000:8.1f} ms"
+                    f" ({groups} rows)"
+                )
+    settings.configure(user_settings={"TIME_ZONE": time_zone})
+    start = time.perf_counter()
+    groups = python_totals()
+    elapsed = time.perf_counter() - start
+    print(f"  rows totalled in Python  {elapsed * 1000:8.1f} ms ({groups} days)")
+
+
+if __name__ == "__main__":
+    main()
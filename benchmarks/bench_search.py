@@ -0,0 +1,81 @@
+"""
+Full-text search latency of `wo what --search` against a LIKE scan.
+
+Imports a synthetic log, then times the 20 best (FTS5, ranked) or most
+recent (`work LIKE '%word%'`) matches for a few queries.
+
+Usage:
+    python -m benchmarks.bench_search [--rows N] [--repeat N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+from pathlib import Path
+import tempfile
+import time
+
+from benchmarks._common import isolate, summarize, synthetic_records
+
+isolate()
+
+from workedon.conf import settings  # noqa: E402
+from workedon.models import Work, init_db  # noqa: E402
+from workedon.workedon import _filter_work, import_work  # noqa: E402
+
+# (search query, LIKE pattern): a rare word, a prefix, a word in
+# a third of the log and one that is never used.
+QUERIES: list[tuple[str, str]] = [
+    ("issue4242", "%issue4242 %"),
+    ("issue42*", "%issue42%"),
+    ("release", "%release%"),
+    ("unicorn", "%unicorn%"),
+]
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--rows", type=int, default=1_000_000)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    source = Path(tempfile.mkdtemp()) / "work.jsonl"
+    with source.open("w") as file:
+        for i, record in enumerate(synthetic_records(args.rows)):
+            # about ten entries per issue number
+            record["work"] = f"issue{i * 7919 % (args.rows // 10 or 1)} {record['work']}"
+            file.write(json.dumps(record) + "\n")
+    settings.configure()
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        import_work(str(source), "jsonl", 10_000)
+
+    fields = [Work.uuid, Work.timestamp, Work.work, Work.duration]
+    with init_db():
+        for query, pattern in QUERIES:
+            search, like = [], []
+            for _ in range(args.repeat):
+                work_set = _filter_work(
+                    Work.select(*fields), 20, "", "", "", "", None, None, None, False, (), "",
+                    search=query, all_time=True,
+                )  # fmt: skip
+                start = time.perf_counter()
+                list(work_set.tuples())
+                search.append(time.perf_counter() - start)
+                work_set = (
+                    Work.select(*fields)
+                    .where(Work.work**pattern)
+                    .order_by(Work.timestamp.desc())
+                    .limit(20)
+                )
+                start = time.perf_counter()
+                list(work_set.tuples())
+                like.append(time.perf_counter() - start)
+            print(f"{query:20} fts  | {summarize(search)}")
+            print(f"{query:20} like | {summarize(like)}")
+
+
+if __name__ == "__main__":
+    main()
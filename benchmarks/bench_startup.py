@@ -0,0 +1,121 @@
+"""
+Startup benchmark for the `wo` command.
+
+Measures the wall time of common invocations in a fresh interpreter,
+along with the cumulative import time of `workedon.cli` as reported by
+`python -X importtime`, and of completing a tag as bash does, from the
+tag cache and through click. The "eager" row imports everything the CLI used
+to load at startup (peewee, the models and dateparser), for comparison.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+import time
+
+from benchmarks._common import isolated_env, summarize
+
+COMMANDS: dict[str, list[str]] = {
+    "wo --version": ["--version"],
+    "wo --print-db-path": ["--print-db-path"],
+    "wo --print-settings-path": ["--print-settings-path"],
+    "wo <text>": ["benchmarking", "startup"],
+    "wo <text> @ <date>": ["benchmarking", "startup", "@", "3pm", "yesterday"],
+}
+# COMP_WORDS of the completions, the word to complete last
+COMPLETIONS: dict[str, str] = {
+    "wo what -T <tab> (tag cache)": "wo what -T d",
+    "wo what --<tab> (click)": "wo what --",
+}
+IMPORTS: dict[str, str] = {
+    "lazy (import workedon.cli)": "import workedon.cli",
+    "eager (cli + workedon + dateparser)": (
+        "import workedon.cli, workedon.workedon, dateparser.date"
+    ),
+}
+
+
+def _import_time(statement: str, env: dict[str, str]) -> float:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    )
+    # lines look like: "import time:   self [us] | cumulative | module"
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # only count top-level entries, nested ones are part of their parents
+        if not name.startswith("  "):
+            total += int(cumulative)
+    return total / 1_000_000
+
+
+def _wall_time(args: list[str], env: dict[str, str]) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "workedon", *args],
+        capture_output=True,
+        check=True,
+        env=env,
+    )
+    return time.perf_counter() - start
+
+
+def _completion_time(words: str, env: dict[str, str]) -> float:
+    env = {
+        **env,
+        "_WO_COMPLETE": "bash_complete",
+        "COMP_WORDS": words,
+        "COMP_CWORD": str(len(words.split()) - 1),
+    }
+    # the way the `wo` script runs, so that click sees the name it completes for
+    code = "import sys; sys.argv[0] = 'wo'; from workedon.__main__ import main; main()"
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], capture_output=True, check=True, env=env)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--runs", type=int, default=10)
+    runs = arg_parser.parse_args().runs
+    env = isolated_env()
+    # warm up: creates the settings file, the database and the tag cache
+    _wall_time(["warming", "up", "#dev"], env)
+    _completion_time("wo -T d", env)
+
+    print(f"Import time ({runs} runs)")
+    for label, statement in IMPORTS.items():
+        samples = [_import_time(statement, env) for _ in range(runs)]
+        print(f"  {label:<40} {summarize(samples)}")
+
+    print(f"Wall time ({runs} runs)")
+    for label, args in COMMANDS.items():
+        samples = [_wall_time(args, env) for _ in range(runs)]
+        print(f"  {label:<40} {summarize(samples)}")
+
+    print(f"Completion time ({runs} runs)")
+    for label, words in COMPLETIONS.items():
+        samples = [_completion_time(words, env) for _ in range(runs)]
+        print(f"  {label:<40} {summarize(samples)}")
+    # what no completion can go below
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True, env=env)
+        samples.append(time.perf_counter() - start)
+    print(f"  {'python -c pass':<40} {summarize(samples)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Size and speed of integer epoch timestamps against the text ones used before v5.
+
+Imports a synthetic log, makes a copy with text timestamps, and compares
+the file sizes, a range scan over ten years (about 73k entries), and reading those rows
+through peewee.
+
+Usage:
+    python -m benchmarks.bench_timestamps [--rows N] [--repeat N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+from pathlib import Path
+import shutil
+import tempfile
+import time
+
+from peewee import (
+    CharField,
+    DateTimeField,
+    FloatField,
+    Model,
+    OperationalError,
+    SqliteDatabase,
+    TextField,
+)
+
+from benchmarks._common import isolate, summarize, synthetic_records
+
+isolate()
+
+from workedon.conf import settings  # noqa: E402
+from workedon.models import DB_PATH, EpochField  # noqa: E402
+from workedon.workedon import import_work  # noqa: E402
+
+
+class TextWork(Model):
+    uuid = CharField(primary_key=True)
+    work = TextField()
+    timestamp = DateTimeField(formats=[settings.internal_dt_format])
+    duration = FloatField(null=True)
+
+    class Meta:
+        table_name = "work"
+
+
+class EpochWork(TextWork):
+    timestamp = EpochField()
+
+    class Meta:
+        table_name = "work"
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--rows", type=int, default=1_000_000)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    directory = Path(tempfile.mkdtemp())
+    source = directory / "work.jsonl"
+    with source.open("w") as file:
+        for record in synthetic_records(args.rows):
+            file.write(json.dumps(record) + "\n")
+    settings.configure()
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        import_work(str(source), "jsonl", 10_000)
+
+    epoch_path, text_path = directory / "epoch.db", directory / "text.db"
+    shutil.copy(DB_PATH, epoch_path)
+    shutil.copy(DB_PATH, text_path)
+    text_db = SqliteDatabase(text_path)
+    for column in ("timestamp", "created"):
+        text_db.execute_sql(
+            f"UPDATE work SET {column} ="  # noqa: S608
+            f" strftime('%Y-%m-%d %H:%M:%S', {column}, 'unixepoch') || '+0000'"
+        )
+    text_db.execute_sql("VACUUM")
+    epoch_db = SqliteDatabase(epoch_path)
+    epoch_db.execute_sql("VACUUM")
+    for name, path, db in (("text", text_path, text_db), ("epoch", epoch_path, epoch_db)):
+        print(f"{name:5} file size       | {path.stat().st_size / 1e6:8.1f} MB")
+        # needs SQLite built with the dbstat table
+        with contextlib.suppress(OperationalError):
+            for table in ("work", "work_timestamp"):
+                size = db.execute_sql(
+                    "SELECT sum(pgsize) FROM dbstat WHERE name = ?", (table,)
+                ).fetchone()[0]
+                print(f"{name:5} {table:15} | {size / 1e6:8.1f} MB")
+
+    end = datetime.datetime.now(datetime.timezone.utc)
+    start = end - datetime.timedelta(days=3650)
+    for name, db, model in (("text", text_db, TextWork), ("epoch", epoch_db, EpochWork)):
+        with db.bind_ctx([model]):
+            in_range = (model.timestamp >= start) & (model.timestamp <= end)
+            scans, reads = [], []
+            for _ in range(args.repeat):
+                began = time.perf_counter()
+                model.select().where(in_range).count()
+                scans.append(time.perf_counter() - began)
+                began = time.perf_counter()
+                list(model.select().where(in_range).order_by(model.timestamp.desc()).tuples())
+                reads.append(time.perf_counter() - began)
+        print(f"{name:5} range count     | {summarize(scans)}")
+        print(f"{name:5} range rows read | {summarize(reads)}")
+
+
+if __name__ == "__main__":
+    main()
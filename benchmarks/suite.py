@@ -0,0 +1,365 @@
+"""
+The benchmark suite: the hot paths of workedon, timed on synthetic logs.
+
+For each log size, imports a synthetic log (see _common.synthetic_records)
+and times saving work, fetching it with each kind of filter, rendering
+it (as `wo what` streams it, and per model instance by Work.__str__) and each
+migration step, from a database of the first version with as many
+entries. Parsing work texts, which doesn't depend on the size of the
+log, is timed once.
+
+The results are saved as JSON, to .benchmarks/ by default, and compared
+with an earlier run with --compare.
+
+Usage:
+    python -m benchmarks.suite [--sizes N [N ...]] [--runs N] [--output FILE]
+                               [--compare FILE] [--only GROUP [GROUP ...]]
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections.abc import Callable
+import contextlib
+import datetime
+import io
+import json
+import os
+from pathlib import Path
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any
+
+from benchmarks._common import isolate, synthetic_records
+
+isolate()
+
+from workedon import models  # noqa: E402
+from workedon.conf import settings  # noqa: E402
+from workedon.models import DB_PATH, Work, init_db  # noqa: E402
+from workedon.parser import InputParser  # noqa: E402
+from workedon.workedon import _generate_work, fetch_work, import_work, save_work  # noqa: E402
+
+GROUPS = ("save", "fetch", "render", "parse", "migrate")
+# the filters of `wo what`, on top of the defaults of FETCH_DEFAULTS
+FETCH_FILTERS: dict[str, Callable[[str], dict[str, Any]]] = {
+    "past week": lambda uuid: {},
+    "past year": lambda uuid: {"period": "year"},
+    "date range": lambda uuid: {"start_date": _days_ago(90), "end_date": _days_ago(30)},
+    "on a day": lambda uuid: {"on": _days_ago(30)},
+    "last 10": lambda uuid: {"count": 10},
+    "id": lambda uuid: {"work_id": uuid},
+    "tag, past year": lambda uuid: {"period": "year", "tags": ("tag7",)},
+    "duration, past year": lambda uuid: {"period": "year", "duration": ">=2h"},
+    "search, past year": lambda uuid: {"period": "year", "search": "release"},
+}
+FETCH_DEFAULTS: dict[str, Any] = {
+    "count": None,
+    "work_id": "",
+    "start_date": "",
+    "end_date": "",
+    "since": "",
+    "period": None,
+    "on": None,
+    "at": None,
+    "delete": False,
+    "no_page": True,
+    "reverse": False,
+    "text_only": False,
+    "tags": (),
+    "duration": "",
+}
+# the layout of the first version, keyed by uuid, with text timestamps and without
+# durations, plus the tag tables of the second one, which migrating from v1 keeps
+V1_LAYOUT: list[str] = [
+    'CREATE TABLE "work" ("uuid" VARCHAR(255) NOT NULL PRIMARY KEY,'
+    ' "created" DATETIME NOT NULL, "work" TEXT NOT NULL, "timestamp" DATETIME NOT NULL)',
+    'CREATE INDEX "work_timestamp" ON "work" ("timestamp")',
+    'CREATE TABLE "tag" ("uuid" VARCHAR(255) NOT NULL PRIMARY KEY,'
+    ' "name" VARCHAR(255) NOT NULL, "created" DATETIME NOT NULL)',
+    'CREATE UNIQUE INDEX "tag_name" ON "tag" ("name")',
+    'CREATE TABLE "work_tag" ("work_id" VARCHAR(255) NOT NULL, "tag_id" VARCHAR(255)'
+    ' NOT NULL, PRIMARY KEY ("work_id", "tag_id"), FOREIGN KEY ("work_id") REFERENCES'
+    ' "work" ("uuid") ON DELETE CASCADE, FOREIGN KEY ("tag_id") REFERENCES "tag" ("uuid"))',
+    'CREATE INDEX "worktag_work_id" ON "work_tag" ("work_id")',
+    'CREATE INDEX "worktag_tag_id" ON "work_tag" ("tag_id")',
+    "PRAGMA user_version = 1",
+]
+MIGRATIONS: list[Callable[[Any], None]] = [
+    models._migrate_v1_to_v2,
+    models._migrate_v2_to_v3,
+    models._migrate_v3_to_v4,
+    models._migrate_v4_to_v5,
+    models._migrate_v5_to_v6,
+    models._migrate_v6_to_v7,
+    models._migrate_v7_to_v8,
+]
+
+
+def _days_ago(days: int) -> str:
+    return (datetime.date.today() - datetime.timedelta(days=days)).isoformat()
+
+
+def _stats(samples: list[float], items: int = 1) -> dict[str, Any]:
+    """
+    Median, min and max of timings in milliseconds, per item when there are several.
+    """
+    return {
+        "median_ms": statistics.median(samples) * 1000 / items,
+        "min_ms": min(samples) * 1000 / items,
+        "max_ms": max(samples) * 1000 / items,
+        "runs": len(samples),
+        "items": items,
+    }
+
+
+def _time(func: Callable[[], Any], runs: int) -> list[float]:
+    samples = []
+    for _ in range(runs):
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _reset_db() -> None:
+    for suffix in ("", "-wal", "-shm"):
+        with contextlib.suppress(FileNotFoundError):
+            DB_PATH.with_name(DB_PATH.name + suffix).unlink()
+    models._verified_schemas.clear()
+
+
+def _import(size: int) -> None:
+    _reset_db()
+    source = Path(tempfile.mkdtemp()) / "work.jsonl"
+    with source.open("w") as file:
+        for record in synthetic_records(size):
+            file.write(json.dumps(record) + "\n")
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        import_work(str(source), "jsonl", 10_000)
+    source.unlink()
+
+
+def bench_save(runs: int) -> dict[str, dict[str, Any]]:
+    entries = {
+        "text": ("benchmarking", "the", "suite"),
+        "tags and duration": ("benchmarking", "#bench", "#suite", "[30m]"),
+        "at a date": ("benchmarking", "@", "3pm", "yesterday"),
+    }
+    return {
+        name: _stats(_time(lambda work=work: save_work(work, (), ""), runs))
+        for name, work in entries.items()
+    }
+
+
+def bench_fetch(runs: int) -> dict[str, dict[str, Any]]:
+    with init_db():
+        uuid = Work.select(Work.uuid).order_by(Work.timestamp).limit(1).scalar()
+    results = {}
+    for name, filters in FETCH_FILTERS.items():
+        options = {**FETCH_DEFAULTS, **filters(uuid)}
+        results[name] = _stats(_time(lambda options=options: fetch_work(**options), runs))
+    return results
+
+
+def bench_render(runs: int) -> dict[str, dict[str, Any]]:
+    newest = Work.select(Work.uuid, Work.timestamp, Work.work, Work.duration)
+    newest = newest.order_by(Work.timestamp.desc()).limit(10_000)
+    with init_db():
+        rows = newest.count()
+        works = list(Work.select().order_by(Work.timestamp.desc()).limit(1_000))
+
+        def stream() -> None:
+            for _ in _generate_work(newest, text_only=False):
+                pass
+
+        def to_str() -> None:
+            for work in works:
+                str(work)
+
+        return {
+            "query and render, per row": _stats(_time(stream, runs), rows),
+            "Work.__str__, per row": _stats(_time(to_str, runs), len(works)),
+        }
+
+
+def bench_parse(runs: int) -> dict[str, dict[str, Any]]:
+    texts = []
+    for i, record in enumerate(synthetic_records(10_000)):
+        text = record["work"] + "".join(f" #{tag}" for tag in record.get("tags", ()))
+        if "duration" in record:
+            text += f" [{record['duration']}m]"
+        # about a third at a date, as common phrases and ISO dates
+        text += ("", " @ 3pm yesterday", " @ 2024-01-15 14:30")[i % 3]
+        texts.append(text)
+    parser = InputParser()
+
+    def parse() -> None:
+        for text in texts:
+            parser.parse(text)
+
+    def tokenize() -> None:
+        for text in texts:
+            parser.tokenize(text)
+
+    return {
+        "parse, per text": _stats(_time(parse, runs), len(texts)),
+        "tokenize, per text": _stats(_time(tokenize, runs), len(texts)),
+    }
+
+
+def _create_v1(size: int) -> None:
+    """
+    A database of the first version, with the work and the tags of a synthetic log.
+    """
+    _reset_db()
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(DB_PATH)
+    for statement in V1_LAYOUT:
+        connection.execute(statement)
+    tag_ids: dict[str, str] = {}
+    for number, record in enumerate(synthetic_records(size)):
+        uuid = f"{number:032x}"
+        timestamp = datetime.datetime.fromisoformat(record["timestamp"])
+        text = timestamp.strftime("%Y-%m-%d %H:%M:%S%z")
+        connection.execute(
+            "INSERT INTO work VALUES (?, ?, ?, ?)", (uuid, text, record["work"], text)
+        )
+        for tag in record.get("tags", ()):
+            if tag not in tag_ids:
+                tag_ids[tag] = f"t{len(tag_ids):031x}"
+                connection.execute("INSERT INTO tag VALUES (?, ?, ?)", (tag_ids[tag], tag, text))
+            connection.execute("INSERT INTO work_tag VALUES (?, ?)", (uuid, tag_ids[tag]))
+    connection.commit()
+    connection.close()
+
+
+def _add_durations(size: int) -> None:
+    # the second version added the column, which the synthetic log fills
+    connection = sqlite3.connect(DB_PATH)
+    connection.executemany(
+        "UPDATE work SET duration = ? WHERE uuid = ?",
+        (
+            (record["duration"], f"{number:032x}")
+            for number, record in enumerate(synthetic_records(size))
+            if "duration" in record
+        ),
+    )
+    connection.commit()
+    connection.close()
+
+
+def bench_migrate(size: int) -> dict[str, dict[str, Any]]:
+    _create_v1(size)
+    results = {}
+    # the connection of init_db, without the migrations it runs
+    models._get_or_create_db()
+    for version, migrate in enumerate(MIGRATIONS, start=1):
+        models._db.connect()
+        try:
+            start = time.perf_counter()
+            migrate(models._db)
+            elapsed = time.perf_counter() - start
+            reached = models.get_db_user_version(models._db)
+        finally:
+            models._db.close()
+        if reached != version + 1:
+            sys.exit(f"migrating from v{version} reached v{reached}")
+        results[f"v{version} to v{version + 1}"] = _stats([elapsed])
+        if version == 1:
+            _add_durations(size)
+    _reset_db()
+    return results
+
+
+def _environment() -> dict[str, Any]:
+    commit = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"],  # noqa: S607
+        capture_output=True,
+        text=True,
+        check=False,
+    ).stdout.strip()
+    return {
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+    }
+
+
+def compare(results: dict[str, dict[str, Any]], path: Path) -> None:
+    """
+    Print the median of each benchmark against that of an earlier run.
+    """
+    earlier = json.loads(path.read_text())
+    print(f"Compared with {path} ({earlier['environment']['commit']}):")
+    for name, stats in results.items():
+        before = earlier["results"].get(name)
+        if before is None:
+            print(f"  {name:50} {stats['median_ms']:12.4f} ms (new)")
+            continue
+        ratio = stats["median_ms"] / before["median_ms"] if before["median_ms"] else 1.0
+        flag = " slower" if ratio > 1.1 else " faster" if ratio < 0.9 else ""
+        print(
+            f"  {name:50} {before['median_ms']:12.4f} -> {stats['median_ms']:12.4f} ms"
+            f" x{ratio:5.2f}{flag}"
+        )
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    arg_parser.add_argument("--runs", type=int, default=5)
+    arg_parser.add_argument("--output", type=Path)
+    arg_parser.add_argument("--compare", type=Path)
+    arg_parser.add_argument("--only", nargs="+", choices=GROUPS, default=list(GROUPS))
+    args = arg_parser.parse_args()
+    settings.configure()
+
+    # names are "group/benchmark" and "group/benchmark/size" for the ones on a log
+    results: dict[str, dict[str, Any]] = {}
+
+    def record(group: str, group_results: dict[str, dict[str, Any]], size: int = 0) -> None:
+        for name, stats in group_results.items():
+            key = f"{group}/{name}" + (f"/{size}" if size else "")
+            results[key] = stats
+            print(f"  {key:50} {stats['median_ms']:12.4f} ms")
+
+    if "parse" in args.only:
+        print("parse")
+        record("parse", bench_parse(args.runs))
+    for size in args.sizes:
+        print(f"{size:,} entries")
+        if {"save", "fetch", "render"} & set(args.only):
+            _import(size)
+            if "fetch" in args.only:
+                record("fetch", bench_fetch(args.runs), size)
+            if "render" in args.only:
+                record("render", bench_render(args.runs), size)
+            # last, as it adds entries
+            if "save" in args.only:
+                record("save", bench_save(args.runs), size)
+        if "migrate" in args.only:
+            record("migrate", bench_migrate(size), size)
+
+    output = args.output or Path(".benchmarks") / (
+        datetime.datetime.now().strftime("%Y%m%d-%H%M%S") + ".json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps({"environment": _environment(), "results": results}, indent=2) + "\n"
+    )
+    print(f"Saved to {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ from click.testing import CliRunner
 from freezegun import freeze_time
 import pytest
 
+from workedon import conf
 from workedon.models import DB_PATH
 
 
@@ -31,6 +32,18 @@ def freeze_clock_at_2359() -> Generator[None, None, None]:
         yield
 
 
+@pytest.fixture
+def settings_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """
+    A settings file of the test's own, used in place of the user's one,
+    so that settings written to it never outlive the test.
+    """
+    path = tmp_path / "config" / "wonfile.py"
+    path.parent.mkdir()
+    monkeypatch.setattr(conf, "CONF_PATH", path)
+    return path
+
+
 def safe_unlink(path: Path) -> None:
     try:
         path.unlink()
@@ -1,13 +1,28 @@
 from __future__ import annotations
 
-from datetime import datetime
+from collections.abc import Generator
+from datetime import datetime, timedelta, timezone
+import json
+import os
+from pathlib import Path
+import random
 import re
+import subprocess
+import sys
+import time
+from typing import Any
 
+import click
 from click.testing import CliRunner, Result
+from peewee import prefetch
 import pytest
 
-from workedon import __version__, cli, exceptions
-from workedon.conf import CONF_PATH
+from workedon import __version__, cli, client, exceptions, models, workedon
+from workedon.conf import CONF_PATH, settings
+from workedon.constants import CURRENT_DB_VERSION
+from workedon.models import DB_PATH
+
+from .conftest import safe_unlink
 
 
 def verify_work_output(result: Result, description: str) -> None:
@@ -58,6 +73,273 @@ def test_empty_fetch(runner: CliRunner) -> None:
     assert "Nothing to show" in result.output
 
 
+# -- Startup ---------------------------------------------------------------------
+
+_SLOW_IMPORTS = {"dateparser", "peewee", "playhouse"}
+
+
+def _imported_modules(*args: str) -> set[str]:
+    """Run the CLI in a fresh interpreter and return the top-level packages it imported."""
+    code = (
+        "import sys\n"
+        "from workedon import cli\n"
+        "try:\n"
+        f"    cli.main({list(args)!r}, standalone_mode=False)\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(' '.join({m.split('.')[0] for m in sys.modules}))\n"
+    )
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return set(result.stdout.split())
+
+
+@pytest.mark.parametrize(
+    "args, forbidden",
+    [
+        (["--version"], _SLOW_IMPORTS),
+        (["--print-db-path"], _SLOW_IMPORTS),
+        (["--print-settings-path"], _SLOW_IMPORTS),
+        (["logging", "a", "quick", "note"], {"dateparser"}),
+        (["logging", "a", "quick", "note", "@", "3 hours ago"], {"dateparser"}),
+        (["what", "--today"], {"dateparser"}),
+        (["what", "--yesterday"], {"dateparser"}),
+        (["what", "--since", "2 weeks ago"], {"dateparser"}),
+        (["logging", "a", "quick", "note", "@", "2pm"], {"dateparser"}),
+        (["what", "--from", "2024-01-15", "--to", "friday 14:30"], {"dateparser"}),
+    ],
+)
+def test_startup_skips_slow_imports(args: list[str], forbidden: set[str]) -> None:
+    assert not _imported_modules(*args) & forbidden
+
+
+def test_import_time_budget() -> None:
+    # `python -X importtime` lists every module loaded while importing the CLI;
+    # none of the slow packages may be part of that budget.
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import workedon.cli"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imported = {
+        line.rsplit("|", 1)[-1].strip().split(".")[0]
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:")
+    }
+    assert "workedon" in imported
+    assert not imported & _SLOW_IMPORTS
+
+
+def test_entry_point_imports_stay_light() -> None:
+    # the entry point connects to the daemon before loading the CLI
+    code = (
+        "import sys\n"
+        "import workedon.__main__\n"
+        "print(' '.join({m.split('.')[0] for m in sys.modules}))\n"
+    )
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert not set(result.stdout.split()) & {"click", "json", "socket", "typing", *_SLOW_IMPORTS}
+
+
+# -- Daemon ----------------------------------------------------------------------
+
+
+def _wo(*args: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(  # noqa: S603
+        [sys.executable, "-m", "workedon", *args],
+        input="",
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+
+
+@pytest.mark.skipif(not client.is_supported(), reason="needs Unix domain sockets")
+def test_daemon(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("WORKEDON_SOCKET", str(tmp_path / "wo.sock"))
+    assert _wo("daemon", "status").stdout == "The daemon is not running.\n"
+    started = _wo("daemon", "start")
+    assert started.stdout.startswith("The daemon is running: pid"), started.stderr
+    try:
+        saved = _wo("testing the daemon", "[5m]", "-T", "daemon")
+        assert saved.returncode == 0, saved.stderr
+        assert "Work saved." in saved.stdout
+        assert "Tags: daemon" in saved.stdout
+        fetched = _wo("what", "--no-page", "-l", "--tag", "daemon")
+        assert fetched.stdout == "* testing the daemon\n"
+        failed = _wo("what", "--bogus")
+        assert failed.returncode == 2
+        assert "No such option '--bogus'" in failed.stderr
+        # relative paths are relative to the directory of the client
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "more.jsonl").write_text('{"work": "imported by the daemon"}\n')
+        imported = _wo("import", "more.jsonl")
+        assert imported.stdout == "1 log(s) imported successfully.\n", imported.stderr
+        # exports run in-process, as their output is streamed
+        assert _wo("export", "work.jsonl", "--all", "--tag", "daemon").returncode == 0
+        assert json.loads((tmp_path / "work.jsonl").read_text())["tags"] == ["daemon"]
+        # prompts run in-process, and so does everything when bypassing the daemon
+        deleted = _wo("what", "--delete", "--no-page")
+        assert deleted.stdout.startswith("Continue deleting log(s)?")
+        monkeypatch.setenv("WORKEDON_NO_DAEMON", "1")
+        assert sorted(_wo("what", "--no-page", "-l").stdout.splitlines()) == [
+            "* imported by the daemon",
+            "* testing the daemon",
+        ]
+        monkeypatch.delenv("WORKEDON_NO_DAEMON")
+        assert "4 command(s) served" in _wo("daemon", "status").stdout
+    finally:
+        assert _wo("daemon", "stop").stdout == "The daemon was stopped.\n"
+    assert not (tmp_path / "wo.sock").exists()
+
+
+@pytest.mark.skipif(not client.is_supported(), reason="needs Unix domain sockets")
+def test_daemon_stalled_client(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    import socket
+
+    monkeypatch.setenv("WORKEDON_SOCKET", str(tmp_path / "wo.sock"))
+    started = _wo("daemon", "start")
+    assert started.stdout.startswith("The daemon is running: pid"), started.stderr
+    try:
+        assert _wo("saved by the daemon").returncode == 0
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stalled:
+            # connects and never sends its request
+            stalled.connect(str(tmp_path / "wo.sock"))
+            fetched = _wo("what", "--no-page", "-l")
+            assert fetched.stdout == "* saved by the daemon\n", fetched.stderr
+            # it is dropped in time, and the daemon serves commands again
+            for _ in range(200):
+                status = _wo("daemon", "status").stdout
+                if "not running" not in status:
+                    break
+                time.sleep(0.05)
+        # the command it was holding up ran in-process
+        assert "1 command(s) served" in status
+    finally:
+        assert _wo("daemon", "stop").stdout == "The daemon was stopped.\n"
+
+
+@pytest.mark.skipif(not client.is_supported(), reason="needs Unix domain sockets")
+def test_daemon_runs_commands_with_their_arguments() -> None:
+    import socket
+
+    from workedon import daemon
+
+    argv = sys.argv
+    sock, other = socket.socketpair()
+    with sock, other, daemon._isolation(sock, ["wo", "what", "-l"], {}, os.getcwd(), False):
+        # as the slow statement log shows them
+        assert sys.argv == ["wo", "what", "-l"]
+    assert sys.argv is argv
+
+
+def test_daemon_warm_up_loads_dateparser() -> None:
+    code = (
+        "import sys\n"
+        "from workedon import daemon\n"
+        "daemon._warm_up()\n"
+        "print('dateparser' in sys.modules)\n"
+    )
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout == "True\n"
+
+
+def test_daemon_output_past_memory_limit(monkeypatch: pytest.MonkeyPatch) -> None:
+    frames = [(client.STDOUT, f"line {i}\n".encode()) for i in range(100)]
+    frames.append((client.EXIT, b"0"))
+
+    class Reader:
+        def read_frame(self) -> tuple[bytes, bytes]:
+            return frames.pop(0) if frames else (b"", b"")
+
+    expected = [*frames, (b"", b"")]
+    monkeypatch.setattr(client, "_MEMORY_LIMIT", 64)
+    response = client._Response(Reader())  # type: ignore[arg-type]
+    # the rest of the output is in a temporary file
+    assert response._file is not None
+    try:
+        assert [response.read_frame() for _ in expected] == expected
+    finally:
+        response.close()
+
+
+@pytest.mark.parametrize("argv", [["export"], ["export", "--all", "work.jsonl"]])
+def test_export_never_forwarded(monkeypatch: pytest.MonkeyPatch, argv: list[str]) -> None:
+    # its output is streamed, however long it is
+    monkeypatch.setattr(client, "connect", pytest.fail)
+    assert client.forward(argv) is None
+
+
+# -- Profiling -------------------------------------------------------------------
+
+
+def test_profile(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    import pstats
+
+    monkeypatch.setenv("WORKEDON_PROFILE", str(tmp_path / "profile.json"))
+    monkeypatch.setenv("WORKEDON_PROFILE_STATS", str(tmp_path / "profile.pstats"))
+    saved = _wo("profiling this", "-T", "perf")
+    assert saved.returncode == 0, saved.stderr
+    profile = json.loads((tmp_path / "profile.json").read_text())
+    assert profile["argv"] == ["profiling this", "-T", "perf"]
+    phases = [phase["name"] for phase in profile["phases"]]
+    assert phases[0] == "import cli"
+    for name in ["settings", "import commands", "parse", "connect", "migrate", "save", "render"]:
+        assert name in phases
+    assert profile["total_ms"] >= sum(phase["ms"] for phase in profile["phases"])
+    insert = next(s for s in profile["statements"] if s["sql"].startswith('INSERT INTO "work"'))
+    assert insert["phase"] == "save"
+    assert insert["rows"] == 1
+    # parameters are never recorded
+    assert not any("profiling this" in s["sql"] for s in profile["statements"])
+    assert pstats.Stats(str(tmp_path / "profile.pstats")).total_calls > 0
+
+    monkeypatch.setenv("WORKEDON_PROFILE", "1")
+    monkeypatch.delenv("WORKEDON_PROFILE_STATS")
+    fetched = _wo("what", "--no-page", "-l")
+    assert fetched.stdout == "* profiling this\n"
+    assert "Profile of `wo what --no-page -l`" in fetched.stderr
+    assert re.search(r" 1 query +SELECT .* FROM \"work\"", fetched.stderr)
+
+
+def test_profile_import(
+    runner: CliRunner, settings_file: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from workedon.querystats import STATS_PATH, load_stats
+
+    path = tmp_path / "work.jsonl"
+    path.write_text("".join(f'{{"work": "entry {i} #t{i % 2}"}}\n' for i in range(5)))
+    with monkeypatch.context() as env:
+        env.setenv("WORKEDON_PROFILE", str(tmp_path / "profile.json"))
+        imported = _wo("import", "--batch-size", "2", str(path))
+    assert imported.returncode == 0, imported.stderr
+    profile = json.loads((tmp_path / "profile.json").read_text())
+    phases = {phase["name"]: phase for phase in profile["phases"]}
+    assert phases["save"]["calls"] == 3
+    # the rows are inserted with one statement per batch
+    inserts = [
+        s for s in profile["statements"] if s["sql"].startswith('INSERT OR IGNORE INTO "work" ')
+    ]
+    assert [(s["phase"], s["rows"]) for s in inserts] == [("save", 2), ("save", 2), ("save", 1)]
+    links = [
+        s for s in profile["statements"] if s["sql"].startswith('INSERT OR IGNORE INTO "work_tag"')
+    ]
+    assert sum(s["rows"] for s in links) == 5
+    # and they count in the statement stats
+    STATS_PATH.unlink(missing_ok=True)
+    settings_file.write_text("DB_STATS = True\n")
+    assert runner.invoke(cli.main, ["import", "--batch-size", "2", str(path)]).exit_code == 0
+    stats = load_stats()["statements"]
+    shape = next(shape for shape in stats if shape.startswith('INSERT OR IGNORE INTO "work" '))
+    assert stats[shape]["count"] == 3
+
+
 # -- Basic save & fetch scenarios ------------------------------------------------
 
 
@@ -238,6 +520,36 @@ def test_delete_work(runner: CliRunner) -> None:
     assert "Nothing to show" in result.output
 
 
+def test_delete_in_batches(runner: CliRunner, tmp_path: Path) -> None:
+    records = [
+        {"work": f"entry {i}", "timestamp": f"2024-01-0{i % 3 + 1}T12:00:00", "tags": [f"t{i % 3}"]}
+        for i in range(1200)
+    ]
+    records.append({"work": "kept", "timestamp": "2024-01-05T12:00:00", "tags": ["t0"]})
+    path = tmp_path / "work.jsonl"
+    path.write_text("\n".join(json.dumps(record) for record in records))
+    assert runner.invoke(cli.main, ["import", str(path)]).exit_code == 0
+
+    options = ["--from", "2024-01-01", "--to", "2024-01-04", "--delete", "--prune-tags"]
+    result = runner.invoke(cli.what, options, input="y")
+    assert result.exit_code == 0, result.output
+    # committed 500 at a time, in a single pass with the unused tags
+    progress = [line for line in result.output.splitlines() if line.endswith("deleted...")]
+    assert progress == ["500 log(s) deleted...", "1000 log(s) deleted...", "1200 log(s) deleted..."]
+    assert "1200 log(s) deleted successfully.\n2 unused tag(s) deleted." in result.output
+    with models.init_db():
+        assert [tag.name for tag in models.Tag.select()] == ["t0"]
+        assert models.Work.select().count() == 1
+
+
+def test_prune_tags_without_delete(runner: CliRunner) -> None:
+    save_and_verify(runner, "kept #tagged", "kept")
+    result = runner.invoke(cli.what, ["--no-page", "--prune-tags"])
+    assert result.exit_code == 2
+    assert "--prune-tags can only be used with --delete." in result.output
+    assert "Usage: what [OPTIONS]" in result.output
+
+
 def test_delete_empty(runner: CliRunner) -> None:
     result = runner.invoke(cli.what, ["--no-page", "--delete", "--at", "4:44pm 5 years ago"])
     assert result.exit_code == 0
@@ -283,6 +595,222 @@ def test_db_version(runner: CliRunner, options: list[str]) -> None:
     assert result.output.startswith("Database schema version: ")
 
 
+def test_db_recreated_after_delete(runner: CliRunner) -> None:
+    save_and_verify(runner, "first entry", "first entry")
+    # the schema of the old file was verified already, the new one must still be migrated.
+    safe_unlink(DB_PATH)
+    save_and_verify(runner, "second entry", "second entry")
+
+    result = runner.invoke(cli.main, ["--db-version"])
+    assert result.exit_code == 0
+    assert result.output == f"Database schema version: {CURRENT_DB_VERSION}\n"
+
+
+@pytest.mark.parametrize(
+    "interval, hours_since_last, optimized",
+    [
+        ("24", 1, False),
+        ("24", 25, True),
+        ("0.5", 1, True),
+        # never skipped
+        ("0", 0, True),
+        ("None", 0, True),
+    ],
+)
+def test_db_optimize_interval(
+    settings_file: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    interval: str,
+    hours_since_last: float,
+    optimized: bool,
+) -> None:
+    # the first connection migrates the new database, then optimizes it
+    settings.configure()
+    with models.init_db():
+        pass
+    settings_file.write_text(f"DB_OPTIMIZE_INTERVAL = {interval}\n")
+    settings.configure()
+    last_run = time.time() - hours_since_last * 3600
+    os.utime(models._OPTIMIZE_MARKER, (last_run, last_run))
+    statements: list[str] = []
+    execute_sql = models._db.execute_sql
+
+    def recording_execute_sql(sql: str, *args: Any, **kwargs: Any) -> Any:
+        statements.append(sql)
+        return execute_sql(sql, *args, **kwargs)
+
+    monkeypatch.setattr(models._db, "execute_sql", recording_execute_sql)
+    with models.init_db():
+        pass
+    assert ("PRAGMA optimize;" in statements) is optimized
+    # and when it ran, it was recorded
+    assert (models._OPTIMIZE_MARKER.stat().st_mtime != last_run) is optimized
+
+
+def test_db_optimize_interval_invalid(runner: CliRunner, settings_file: Path) -> None:
+    settings_file.write_text('DB_OPTIMIZE_INTERVAL = "daily"\n')
+    result = runner.invoke(cli.what, ["--no-page"])
+    assert result.exit_code == 1
+    assert "Invalid DB_OPTIMIZE_INTERVAL 'daily'" in result.output
+    assert "Traceback" not in result.output
+    settings_file.write_text("")
+
+
+def test_search(runner: CliRunner) -> None:
+    save_and_verify(runner, "deploying the api #ops @ 3 days ago", "deploying the api")
+    save_and_verify(runner, "deploy deploy deployment docs @ 2 days ago", "deployment docs")
+    save_and_verify(runner, "reviewing the deploy script #ops @ 1 day ago", "deploy script")
+    save_and_verify(runner, "lunch", "lunch")
+
+    result = runner.invoke(cli.what, ["--no-page", "-l", "--search", "deploy*"])
+    assert result.exit_code == 0, result.output
+    # best match first
+    lines = result.output.splitlines()
+    assert lines[0] == "* deploy deploy deployment docs"
+    assert sorted(lines[1:]) == ["* deploying the api", "* reviewing the deploy script"]
+    result = runner.invoke(cli.what, ["--no-page", "-l", "--grep", "deploy", "-T", "ops"])
+    assert result.output == "* reviewing the deploy script\n"
+    result = runner.invoke(cli.what, ["--no-page", "-l", "--search", "deploy*", "--since", "2d"])
+    assert "deploying the api" not in result.output
+    assert "deploy script" in result.output
+
+    # the index follows deletes, and survives a vacuum
+    result = runner.invoke(cli.what, ["--search", "script", "--delete"], input="y")
+    assert "1 log(s) deleted successfully." in result.output
+    assert runner.invoke(cli.main, ["--vacuum-db"]).exit_code == 0
+    result = runner.invoke(cli.what, ["--no-page", "-l", "--search", "deploy*"])
+    assert result.output.splitlines() == ["* deploy deploy deployment docs", "* deploying the api"]
+
+
+def test_migrated_from_v1(runner: CliRunner) -> None:
+    settings.configure()
+    with models.init_db() as db:
+        for table in ("daily_rollup_offset", "daily_rollup", "work_tag", "work_fts", "work", "tag"):
+            db.execute_sql(f"DROP TABLE {table}")
+        # the first layout: work alone, keyed by uuid, with text timestamps
+        db.execute_sql(
+            'CREATE TABLE "work" ("uuid" VARCHAR(255) NOT NULL PRIMARY KEY,'
+            ' "created" DATETIME NOT NULL, "work" TEXT NOT NULL, "timestamp" DATETIME NOT NULL)'
+        )
+        db.execute_sql('CREATE INDEX "work_timestamp" ON "work" ("timestamp")')
+        db.execute_sql(
+            "INSERT INTO work VALUES ('aaaa', '2022-01-04 15:00:00+0000', 'first entry',"
+            " '2022-01-04 15:00:00+0000')"
+        )
+        db.execute_sql("PRAGMA user_version = 1")
+    models._verified_schemas.clear()
+
+    result = runner.invoke(cli.what, ["--no-page", "--id", "aaaa", "--time-zone", "UTC"])
+    verify_work_output(result, "first entry")
+    assert "Date: Tue Jan 04 2022 15:00 +0000" in result.output
+    result = runner.invoke(cli.main, ["--db-version"])
+    assert result.output == f"Database schema version: {CURRENT_DB_VERSION}\n"
+
+
+def test_search_index_migrated_from_v3(runner: CliRunner) -> None:
+    save_and_verify(runner, "entry from before the search index", "before the search index")
+    settings.configure()
+    with models.init_db() as db:
+        db.execute_sql("DROP TABLE work_fts")
+        for trigger in ("insert", "delete", "update"):
+            db.execute_sql(f"DROP TRIGGER work_fts_{trigger}")
+        db.execute_sql("PRAGMA user_version = 3")
+    models._verified_schemas.clear()
+
+    result = runner.invoke(cli.what, ["--no-page", "--search", "index"])
+    verify_work_output(result, "entry from before the search index")
+    result = runner.invoke(cli.main, ["--db-version"])
+    assert result.output == f"Database schema version: {CURRENT_DB_VERSION}\n"
+
+
+def test_text_timestamps_migrated_to_epoch(runner: CliRunner) -> None:
+    save_and_verify(runner, "entry with a text timestamp @ 3pm Jan 4 2022 UTC", "text timestamp")
+    settings.configure()
+    with models.init_db() as db:
+        # as stored before v5, in settings.internal_dt_format
+        db.execute_sql(
+            "UPDATE work SET timestamp = strftime('%Y-%m-%d %H:%M:%S', timestamp, 'unixepoch')"
+            " || '+0000', created = '2022-01-04 15:30:00+0000'"
+        )
+        db.execute_sql("UPDATE tag SET created = '2022-01-04 15:30:00+0000'")
+        db.execute_sql("PRAGMA user_version = 4")
+    models._verified_schemas.clear()
+
+    result = runner.invoke(
+        cli.what, ["--no-page", "--at", "3pm Jan 4 2022", "--time-zone", "UTC", "-r"]
+    )
+    verify_work_output(result, "entry with a text timestamp")
+    assert "Date: Tue Jan 04 2022 15:00 +0000" in result.output
+    with models.init_db() as db:
+        types = db.execute_sql("SELECT DISTINCT typeof(timestamp), typeof(created) FROM work")
+        assert types.fetchall() == [("integer", "integer")]
+        created = models.Work.select(models.Work.created).scalar()
+    assert created == datetime(2022, 1, 4, 15, 30, tzinfo=timezone.utc)
+
+
+def test_uuid_keys_migrated_to_rowids(runner: CliRunner) -> None:
+    settings.configure()
+    with models.init_db() as db:
+        # the v5 layout, keyed by uuid
+        for table in ("work_tag", "work", "tag"):
+            db.execute_sql(f"DROP TABLE {table}")
+        db.execute_sql(
+            'CREATE TABLE "work" ("uuid" VARCHAR(255) NOT NULL PRIMARY KEY, "created" INTEGER'
+            ' NOT NULL, "work" TEXT NOT NULL, "timestamp" INTEGER NOT NULL, "duration" REAL)'
+        )
+        db.execute_sql(
+            'CREATE TABLE "tag" ("uuid" VARCHAR(255) NOT NULL PRIMARY KEY,'
+            ' "name" VARCHAR(255) NOT NULL, "created" INTEGER NOT NULL)'
+        )
+        db.execute_sql(
+            'CREATE TABLE "work_tag" ("work_id" VARCHAR(255) NOT NULL, "tag_id" VARCHAR(255)'
+            ' NOT NULL, PRIMARY KEY ("work_id", "tag_id"), FOREIGN KEY ("work_id") REFERENCES'
+            ' "work" ("uuid") ON DELETE CASCADE, FOREIGN KEY ("tag_id") REFERENCES "tag" ("uuid"))'
+        )
+        for trigger in models._SEARCH_TRIGGERS:
+            db.execute_sql(trigger)
+        db.execute_sql(
+            "INSERT INTO work VALUES ('aaaa', 1641300000, 'first entry', 1641300000, NULL),"
+            " ('bbbb', 1641300000, 'second entry', 1641303600, 30.0)"
+        )
+        db.execute_sql("INSERT INTO tag VALUES ('t1', 'x', 1641300000), ('t2', 'y', 1641300000)")
+        db.execute_sql("INSERT INTO work_tag VALUES ('aaaa', 't1'), ('bbbb', 't1'), ('bbbb', 't2')")
+        db.execute_sql("PRAGMA user_version = 5")
+    models._verified_schemas.clear()
+
+    result = runner.invoke(cli.what, ["--no-page", "--id", "bbbb"])
+    verify_work_output(result, "second entry")
+    assert "Tags: x, y" in result.output
+    result = runner.invoke(cli.what, ["--no-page", "-l", "--on", "Jan 4 2022", "-T", "x"])
+    assert result.output == "* second entry\n* first entry\n"
+    result = runner.invoke(cli.what, ["--no-page", "-l", "--on", "Jan 4 2022", "--search", "first"])
+    assert result.output == "* first entry\n"
+    result = runner.invoke(cli.what, ["--id", "aaaa", "--delete"], input="y")
+    assert "1 log(s) deleted successfully." in result.output
+    with models.init_db() as db:
+        links = db.execute_sql("SELECT work_id, tag_id FROM work_tag").fetchall()
+        version = models.get_db_user_version(db)
+    assert links == [(2, 1), (2, 2)]
+    assert version == CURRENT_DB_VERSION
+
+
+def test_timestamp_index_migrated_to_composite(runner: CliRunner) -> None:
+    save_and_verify(runner, "entry from before the composite index", "composite index")
+    settings.configure()
+    with models.init_db() as db:
+        db.execute_sql('DROP INDEX "work_timestamp_duration"')
+        db.execute_sql('CREATE INDEX "work_timestamp" ON "work" ("timestamp")')
+        db.execute_sql("PRAGMA user_version = 6")
+    models._verified_schemas.clear()
+
+    result = runner.invoke(cli.what, ["--no-page"])
+    verify_work_output(result, "entry from before the composite index")
+    with models.init_db() as db:
+        indexes = {index.name for index in db.get_indexes("work")}
+    assert "work_timestamp_duration" in indexes
+    assert "work_timestamp" not in indexes
+
+
 @pytest.mark.parametrize("options", [["--sqlite-version"]])
 def test_sqlite_version(runner: CliRunner, options: list[str]) -> None:
     result = runner.invoke(cli.main, options)
@@ -333,6 +861,102 @@ def test_db_truncate_declined(runner: CliRunner) -> None:
     assert "temporary job" in still_there.output
 
 
+@pytest.mark.parametrize(
+    "profile, page_size, mmap_size, synchronous",
+    [("fast", 8192, 256 * 1024 * 1024, 1), ("safe", 4096, 0, 2), ("low-memory", 4096, 0, 1)],
+)
+def test_db_profile(
+    runner: CliRunner,
+    settings_file: Path,
+    profile: str,
+    page_size: int,
+    mmap_size: int,
+    synchronous: int,
+) -> None:
+    def pragma(db: Any, name: str) -> Any:
+        return db.execute_sql(f"PRAGMA {name}").fetchone()[0]
+
+    settings_file.write_text(f'DB_PROFILE = "{profile}"\n')
+    save_and_verify(runner, "tuned", "tuned")
+    settings.configure()
+    with models.init_db() as db:
+        assert pragma(db, "page_size") == page_size
+        assert pragma(db, "mmap_size") == mmap_size
+        assert pragma(db, "synchronous") == synchronous
+        assert pragma(db, "journal_mode") == "wal"
+    # VACUUM applies the page size of the profile to an existing database
+    settings_file.write_text('DB_PROFILE = "fast"\n')
+    assert runner.invoke(cli.main, ["--vacuum-db"]).exit_code == 0
+    with models.init_db() as db:
+        assert pragma(db, "page_size") == 8192
+        assert pragma(db, "mmap_size") == 256 * 1024 * 1024
+        assert pragma(db, "journal_mode") == "wal"
+    settings_file.write_text('DB_PROFILE = "fastest"\n')
+    result = runner.invoke(cli.what, ["--no-page"])
+    assert result.exit_code == 1
+    assert "Unknown DB_PROFILE 'fastest'" in result.output
+    settings_file.write_text("")
+    assert "tuned" in runner.invoke(cli.what, ["--no-page"]).output
+
+
+def test_db_stats(runner: CliRunner, settings_file: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    import itertools
+    import types
+
+    from workedon import querystats
+    from workedon.querystats import SLOW_LOG_PATH, STATS_PATH, statement_shape
+
+    for path in (STATS_PATH, SLOW_LOG_PATH):
+        path.unlink(missing_ok=True)
+    # the clock is frozen, so every statement takes 1 ms instead
+    clock = itertools.count(step=0.001)
+    monkeypatch.setattr(
+        querystats, "time", types.SimpleNamespace(perf_counter=lambda: next(clock), time=time.time)
+    )
+    result = runner.invoke(cli.main, ["--db-stats"])
+    assert "No statement statistics yet. Set DB_STATS to True to keep them." in result.output
+    # they are off by default
+    save_and_verify(runner, "not counted", "not counted")
+    assert not STATS_PATH.exists()
+    # every statement is slow
+    settings_file.write_text("DB_STATS = True\nDB_SLOW_QUERY_MS = 0.5\n")
+    save_and_verify(runner, "first one #stats", "first one")
+    save_and_verify(runner, "second one #stats #more", "second one")
+    settings_file.write_text("DB_STATS = True\n")
+    for _ in range(3):
+        assert runner.invoke(cli.what, ["--no-page", "--tag", "stats"]).exit_code == 0
+
+    result = runner.invoke(cli.main, ["--db-stats"])
+    assert result.exit_code == 0, result.output
+    assert "Database: " in result.output
+    lines = result.output.splitlines()
+    header = next(line for line in lines if line.endswith("Statement"))
+    assert header.split() == [
+        "Runs",
+        "Total",
+        "ms",
+        "p50",
+        "ms",
+        "p99",
+        "ms",
+        "Max",
+        "ms",
+        "Statement",
+    ]
+    inserts = [line for line in lines if line.endswith("VALUES (?, ...)") and '"work"' in line]
+    assert len(inserts) == 1
+    assert inserts[0].split()[0] == "2"
+    # a list of values counts as one shape, whatever its length
+    assert statement_shape("SELECT 1 FROM tag WHERE name IN (?, ?, ?) AND id > 5") == (
+        "SELECT ? FROM tag WHERE name IN (?, ...) AND id > ?"
+    )
+    slow = SLOW_LOG_PATH.read_text().splitlines()
+    assert len([line for line in slow if " ms  wo " in line and 'INSERT INTO "work"' in line]) == 2
+    # the statements run after the settings were restored were fast enough
+    assert str(SLOW_LOG_PATH) in result.output
+    assert f"{len(slow)} statement(s) over 100 ms" in result.output
+
+
 # -- Settings -------------------------------------------------------
 
 
@@ -477,6 +1101,249 @@ def test_cli_tag_filter(
         assert "Nothing to show" in result_fetch.output
 
 
+def test_add_tags_statement_count(monkeypatch: pytest.MonkeyPatch) -> None:
+    statements: list[str] = []
+    execute_sql = models._db.execute_sql
+
+    def counting_execute_sql(sql: str, *args: Any, **kwargs: Any) -> Any:
+        statements.append(sql)
+        return execute_sql(sql, *args, **kwargs)
+
+    settings.configure()
+    with models.init_db():
+        first, second = models.Work.create(work="one tag"), models.Work.create(work="six tags")
+        monkeypatch.setattr(models._db, "execute_sql", counting_execute_sql)
+        models.add_tags({first.id: {"a"}})
+        one_tag = len(statements)
+        statements.clear()
+        models.add_tags({second.id: {"a", "b", "c", "d", "e", "f"}})
+        six_tags = len(statements)
+        monkeypatch.undo()
+        tag_count = models.Tag.select().count()
+        link_count = models.WorkTag.select().where(models.WorkTag.work == second.id).count()
+
+    # the links are inserted with a single prepared statement on the cursor
+    assert six_tags == one_tag == 2
+    assert tag_count == 6
+    assert link_count == 6
+
+
+def test_work_str_reads_its_tags(runner: CliRunner) -> None:
+    save_and_verify(runner, "hello #b #a", "hello")
+    settings.configure()
+    with models.init_db():
+        # not prefetched, so they are read by __str__
+        rendered = click.unstyle(str(models.Work.get()))
+    assert "Tags: a, b\n" in rendered
+    assert "hello" in rendered
+
+
+@pytest.mark.parametrize("options", [[], ["--no-page"]])
+def test_fetch_renders_tags_in_one_query(
+    runner: CliRunner, monkeypatch: pytest.MonkeyPatch, options: list[str]
+) -> None:
+    settings.configure()
+    with models.init_db():
+        for i in range(150):
+            work = models.Work.create(
+                work=f"entry {i}",
+                timestamp=models.Work.timestamp.default() - timedelta(minutes=i + 1),
+                duration=i or None,
+            )
+            models.add_tags({work.id: {f"t{i % 3}", "all"} if i % 5 else set()})
+        # rendered like before, from prefetched tags
+        works = prefetch(
+            models.Work.select().order_by(models.Work.timestamp.desc()),
+            models.WorkTag,
+            models.Tag,
+        )
+        expected = click.unstyle("".join(str(work) for work in works))
+
+    statements: list[str] = []
+    execute_sql = models._db.execute_sql
+
+    def counting_execute_sql(sql: str, *args: Any, **kwargs: Any) -> Any:
+        statements.append(sql)
+        return execute_sql(sql, *args, **kwargs)
+
+    monkeypatch.setattr(models._db, "execute_sql", counting_execute_sql)
+    result = runner.invoke(cli.what, options)
+    assert result.exit_code == 0
+    # the pager may end the output with a newline of its own
+    assert result.output.rstrip("\n") == expected.rstrip("\n")
+    # no separate queries to check for or count the results either
+    assert len([sql for sql in statements if sql.startswith("SELECT")]) == 1
+    assert len([sql for sql in statements if '"work_tag"' in sql]) == 1
+
+
+def test_save_renders_without_queries(runner: CliRunner, monkeypatch: pytest.MonkeyPatch) -> None:
+    settings.configure()
+    with models.init_db():
+        pass
+    statements: list[str] = []
+    execute_sql = models._db.execute_sql
+
+    def counting_execute_sql(sql: str, *args: Any, **kwargs: Any) -> Any:
+        statements.append(sql)
+        return execute_sql(sql, *args, **kwargs)
+
+    monkeypatch.setattr(models._db, "execute_sql", counting_execute_sql)
+    result = runner.invoke(cli.main, ["one tag", "#a"])
+    assert "Tags: a\n" in result.output
+    one_tag = len(statements)
+    statements.clear()
+    result = runner.invoke(cli.main, ["six tags", "#f", "#e", "#d", "#c", "#b", "#a"])
+    assert "Tags: a, b, c, d, e, f\n" in result.output
+    # the saved work is shown as it was saved, without reading its tags back
+    assert len(statements) == one_tag
+
+
+@pytest.mark.parametrize("unit, shown", [("minutes", "90.0 minutes"), ("hours", "1.5 hours")])
+def test_renderer_output(unit: str, shown: str) -> None:
+    from workedon.renderer import WorkRenderer
+
+    settings.configure(user_settings={"DURATION_UNIT": unit, "TIME_ZONE": "Asia/Kolkata"})
+    renderer = WorkRenderer()
+    timestamp = datetime(2024, 1, 2, 3, 4, tzinfo=timezone.utc)
+    assert renderer.render("abc", timestamp, "work", 90.0, ["a", "b"]) == (
+        f'{click.style("id: abc", fg="green")}\n'
+        f'{click.style("Date: Tue Jan 02 2024 08:34 +0530")}\n'
+        f'{click.style("Tags: a, b" + chr(10))}'
+        f'{click.style(f"Duration: {shown}" + chr(10))}'
+        f'\n\t{click.style("work", bold=True, fg="white")}\n\n'
+    )
+    assert renderer.render("abc", timestamp, "work", None, []) == (
+        f'{click.style("id: abc", fg="green")}\n'
+        f'{click.style("Date: Tue Jan 02 2024 08:34 +0530")}\n'
+        f"{click.style('')}{click.style('')}"
+        f'\n\t{click.style("work", bold=True, fg="white")}\n\n'
+    )
+    assert renderer.render_text("work") == f'{click.style("* work", bold=True, fg="white")}\n'
+
+
+def test_list_tags(runner: CliRunner) -> None:
+    result_save = runner.invoke(cli.main, ["fixing", "bugs", "#dev", "#qa"])
+    assert result_save.exit_code == 0
+
+    result = runner.invoke(cli.main, ["--list-tags"])
+    assert result.exit_code == 0
+    assert "* dev" in result.output
+    assert "* qa" in result.output
+
+
+@pytest.mark.parametrize(
+    "options, expected",
+    [
+        ([], ["* bug", "* dev", "* qa"]),
+        (["--tag-usage"], ["bug", "dev", "qa"]),
+        (["--tag-usage", "--sort-tags", "entries"], ["dev", "bug", "qa"]),
+        (["--tag-usage", "--sort-tags", "last-used"], ["bug", "dev", "qa"]),
+        (["--sort-tags", "last-used"], ["* bug", "* dev", "* qa"]),
+    ],
+)
+def test_list_tags_usage(runner: CliRunner, options: list[str], expected: list[str]) -> None:
+    runner.invoke(cli.main, ["testing", "#dev", "#qa", "@", "2024-01-02"])
+    runner.invoke(cli.main, ["fixing", "#dev", "@", "2024-01-03"])
+    runner.invoke(cli.main, ["fixing", "#bug", "#dev", "@", "2024-01-04"])
+    with models.init_db():
+        models.Tag.create(name="unused")
+
+    result = runner.invoke(cli.main, ["--list-tags", *options])
+    assert result.exit_code == 0
+    lines = result.output.splitlines()
+    if "--tag-usage" in options:
+        assert lines[0].split() == ["Tag", "Entries", "Last", "used"]
+        rows = {line.split()[0]: line.split()[1:] for line in lines[1:]}
+        assert rows["dev"] == ["3", "Thu", "Jan", "04", "2024"]
+        assert rows["qa"] == ["1", "Tue", "Jan", "02", "2024"]
+        assert rows["unused"] == ["0", "-"]
+        lines = [line.split()[0] for line in lines[1:]]
+    # never used last
+    assert lines == [*expected, "* unused" if lines[0].startswith("*") else "unused"]
+
+
+@pytest.mark.parametrize("options", [["--tag-usage"], ["--sort-tags", "entries"]])
+def test_tag_options_without_list_tags(runner: CliRunner, options: list[str]) -> None:
+    result = runner.invoke(cli.main, options)
+    assert result.exit_code == 2
+    assert f"{options[0]} can only be used with --list-tags." in result.output
+    assert "Usage: main [OPTIONS]" in result.output
+
+
+# -- Tag completion --------------------------------------------------------------
+
+
+@pytest.fixture
+def runtime_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    # where the tag cache is kept
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _complete(runner: CliRunner, words: str) -> list[str]:
+    env = {"_WO_COMPLETE": "bash_complete", "COMP_WORDS": words, "COMP_CWORD": "3"}
+    result = runner.invoke(cli.main, prog_name="wo", env=env)
+    assert result.exit_code == 0, result.output
+    return [line.split(",", 1)[1] for line in result.output.splitlines() if line]
+
+
+@pytest.mark.skipif(not client.is_supported(), reason="needs user ids")
+@pytest.mark.usefixtures("runtime_dir")
+def test_complete_tags(runner: CliRunner) -> None:
+    assert _complete(runner, "wo what -T d") == []
+    runner.invoke(cli.main, ["fixing", "bugs", "#dev", "#qa", "#design"])
+    assert _complete(runner, "wo what -T d") == ["design", "dev"]
+    assert _complete(runner, "wo report --tag q") == ["qa"]
+    assert _complete(runner, "wo fixing -T ''") == ["design", "dev", "qa"]
+    # read from the cache until tags are created or deleted
+    with models.init_db():
+        models.Tag.update(name="deleted").where(models.Tag.name == "design").execute()
+    assert _complete(runner, "wo what -T d") == ["design", "dev"]
+    runner.invoke(cli.main, ["fixing", "#docs"])
+    assert _complete(runner, "wo what -T d") == ["deleted", "dev", "docs"]
+
+
+@pytest.mark.skipif(not client.is_supported(), reason="needs user ids")
+def test_complete_tags_without_click(runtime_dir: Path) -> None:
+    code = (
+        "import sys\n"
+        "from workedon.__main__ import main\n"
+        "main()\n"
+        "print(' '.join({m.split('.')[0] for m in sys.modules}))\n"
+    )
+    env = {
+        **os.environ,
+        "_WO_COMPLETE": "zsh_complete",
+        "COMP_WORDS": "wo what --tag=d",
+        "COMP_CWORD": "2",
+        "WORKEDON_NO_DAEMON": "1",
+    }
+
+    def complete() -> tuple[list[str], set[str]]:
+        result = subprocess.run(  # noqa: S603
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env
+        )
+        *output, imported = result.stdout.splitlines()
+        return output, set(imported.split())
+
+    subprocess.run(
+        [sys.executable, "-m", "workedon", "fixing", "#dev", "#qa"],
+        capture_output=True,
+        check=True,
+        env=os.environ,
+    )
+    # written from the database, which platformdirs finds
+    output, imported = complete()
+    assert output == ["plain", "dev", "_"]
+    assert "click" not in imported
+    assert "platformdirs" in imported
+    assert (runtime_dir / f"workedon-{os.getuid()}.tags").exists()
+    # then read from the cache alone
+    output, imported = complete()
+    assert output == ["plain", "dev", "_"]
+    assert not imported & {"click", "platformdirs", "sqlite3", *_SLOW_IMPORTS}
+
+
 # -- Duration ------------------------------------------------------------
 
 
@@ -561,3 +1428,362 @@ def test_cli_duration_filter(
 def test_invalid_duration_filter(runner: CliRunner, invalid_filter_flag: list[str]) -> None:
     result = runner.invoke(cli.what, ["--no-page", *invalid_filter_flag])
     assert result.exit_code == 1
+
+
+# -- Write-behind ----------------------------------------------------------------
+
+
+@pytest.fixture
+def write_behind(settings_file: Path) -> Generator[Path, None, None]:
+    from workedon.spool import SPOOL_PATH
+
+    settings_file.write_text("WRITE_BEHIND = True\n")
+    yield SPOOL_PATH
+    SPOOL_PATH.unlink(missing_ok=True)
+
+
+@pytest.mark.skipif(not client.is_supported(), reason="needs fcntl")
+def test_write_behind(runner: CliRunner, write_behind: Path) -> None:
+    save_and_verify(runner, "spooled work [30m] #later @ 3pm yesterday", "spooled work")
+    result = runner.invoke(cli.main, ["more", "spooled", "work", "-T", "Later"])
+    assert "Tags: later" in result.output
+    records = [json.loads(line) for line in write_behind.read_text().splitlines()]
+    assert [record["work"] for record in records] == ["spooled work", "more spooled work"]
+    assert records[0]["duration"] == 30.0
+    assert not DB_PATH.exists()
+
+    # fetching saves the spooled work first
+    result = runner.invoke(cli.what, ["--no-page", "--tag", "later"])
+    assert result.exit_code == 0, result.output
+    assert f"id: {records[0]['id']}" in result.output
+    assert "Duration: 30.0 minutes" in result.output
+    assert "more spooled work" in result.output
+    assert write_behind.read_text() == ""
+
+    # an entry drained twice is saved once, and one cut short is skipped
+    write_behind.write_text(json.dumps(records[0]) + '\n{"id": "abc", "wo')
+    result = runner.invoke(cli.main, ["--flush-spool"])
+    assert result.stdout == "Spooled work saved.\n"
+    assert result.stderr == "Skipped an incomplete entry in the write-behind journal.\n"
+    assert runner.invoke(cli.main, ["--flush-spool"]).output == "Nothing to flush.\n"
+    result = runner.invoke(cli.what, ["--no-page", "-l", "--past-week"])
+    assert result.output == "* more spooled work\n* spooled work\n"
+
+
+# -- Import ------------------------------------------------------------
+
+
+def test_import_jsonl(runner: CliRunner, tmp_path: Path) -> None:
+    records = [
+        {"work": "writing docs #docs [30m]", "timestamp": "2020-03-01 10:00"},
+        {"work": "code review", "timestamp": "2020-03-02T12:30:00+00:00", "tags": ["Code"]},
+        {"work": "standup", "timestamp": 1583150400, "duration": "1h", "tags": "team, daily"},
+    ]
+    path = tmp_path / "work.jsonl"
+    path.write_text("\n".join(json.dumps(record) for record in records))
+
+    result = runner.invoke(cli.main, ["import", str(path)])
+    assert result.exit_code == 0, result.output
+    assert "3 log(s) imported successfully." in result.output
+
+    result = runner.invoke(
+        cli.what, ["--no-page", "--from", "Feb 29 2020", "--to", "Mar 3 2020", "-r"]
+    )
+    verify_work_output(result, "writing docs")
+    assert "Tags: docs" in result.output
+    assert "Duration: 30.0 minutes" in result.output
+    assert "Tags: code" in result.output
+    assert "Tags: daily, team" in result.output
+    assert "Duration: 60.0 minutes" in result.output
+    assert result.output.index("writing docs") < result.output.index("standup")
+
+
+def test_import_csv_skips_existing_ids(runner: CliRunner, tmp_path: Path) -> None:
+    path = tmp_path / "work.csv"
+    path.write_text(
+        "id,work,timestamp,duration,tags\n"
+        '1234,"painting, the garage",2021-05-01 09:00,45,home\n'
+        "5678,mowing the lawn,2021-05-02 09:00,,\n"
+    )
+    result = runner.invoke(cli.main, ["import", "--batch-size", "1", str(path)])
+    assert result.exit_code == 0, result.output
+    assert "2 log(s) imported successfully." in result.output
+    # the same ids, with other work and tags, in the file and in the database
+    path.write_text(
+        "id,work,timestamp,duration,tags\n"
+        '1234,other work,2021-05-03 09:00,,"y,z"\n'
+        "9999,new work,2021-05-03 10:00,,new\n"
+        "9999,new work again,2021-05-03 11:00,,again\n"
+    )
+    result = runner.invoke(cli.main, ["import", str(path)])
+    assert result.exit_code == 0, result.output
+    assert "1 log(s) imported successfully." in result.output
+    assert "2 log(s) skipped, their ids were already saved." in result.output
+
+    result = runner.invoke(cli.what, ["--no-page", "--since", "May 1 2021"])
+    assert result.output.count("painting, the garage") == 1
+    assert result.output.count("mowing the lawn") == 1
+    assert "other work" not in result.output
+    assert "new work again" not in result.output
+    assert "id: 1234" in result.output
+    assert "Tags: home\n" in result.output
+    assert "Tags: new\n" in result.output
+    result = runner.invoke(cli.what, ["--no-page", "--id", "1234"])
+    assert "Tags: home\n" in result.output
+
+
+@pytest.mark.parametrize(
+    "line, detail",
+    [
+        ('{"work": ""}', exceptions.InvalidWorkError.detail),
+        ('{"work": "x", "timestamp": "lolololol"}', exceptions.InvalidDateTimeError.detail),
+        ('{"work": "x", "timestamp": "2999-01-01"}', exceptions.DateTimeInFutureError.detail),
+        ('{"work": "x", "duration": "3x"}', exceptions.InvalidDurationError.detail),
+        ("not json", exceptions.CannotImportWorkError.detail),
+    ],
+)
+def test_import_invalid_record(runner: CliRunner, tmp_path: Path, line: str, detail: str) -> None:
+    path = tmp_path / "work.jsonl"
+    path.write_text(f'{{"work": "valid entry"}}\n{line}\n')
+
+    result = runner.invoke(cli.main, ["import", "-b", "1", str(path)])
+    assert result.exit_code == 1
+    assert detail in result.output
+    # batches before the bad record are kept
+    assert "1 log(s) imported..." in result.output
+    assert "successfully" not in result.output
+
+
+def test_export_round_trip(runner: CliRunner, tmp_path: Path) -> None:
+    runner.invoke(cli.main, ["pairing on exports #io #Pair [1h] @ 3pm Jan 4 2022"])
+    runner.invoke(cli.main, ["untagged work @ 4pm Jan 4 2022"])
+    runner.invoke(cli.main, ["out of range @ 4pm Jan 9 2022"])
+
+    result = runner.invoke(cli.main, ["export", "--on", "Jan 4 2022", "-r"])
+    assert result.exit_code == 0, result.output
+    lines = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [line["work"] for line in lines] == ["pairing on exports", "untagged work"]
+    assert lines[0]["tags"] == ["io", "pair"]
+    assert lines[0]["duration"] == 60.0
+    assert lines[1]["tags"] == []
+    assert lines[1]["duration"] is None
+    assert "2 log(s) exported successfully." in result.stderr
+
+    path = tmp_path / "work.csv"
+    result = runner.invoke(cli.main, ["export", "--all", "-T", "io", str(path)])
+    assert result.exit_code == 0, result.output
+    exported = path.read_text()
+    assert exported.startswith("id,work,timestamp,duration,tags\n")
+    assert exported.count("\n") == 2
+    assert ',60.0,"io,pair"\n' in exported
+
+    # importing it back is a no-op, the ids already exist
+    result = runner.invoke(cli.main, ["import", str(path)])
+    assert result.exit_code == 0, result.output
+    result = runner.invoke(cli.what, ["--no-page", "--on", "Jan 4 2022"])
+    assert result.output.count("pairing on exports") == 1
+
+
+# -- Report ------------------------------------------------------------
+
+
+@pytest.fixture(params=["work", "rollup"])
+def report_work(runner: CliRunner, tmp_path: Path, request: pytest.FixtureRequest) -> None:
+    # around the DST changes of New York, where a fixed UTC offset
+    # would put entries logged just after midnight on the day before
+    records = [
+        {"work": "planning #plan [1h]", "timestamp": "2024-03-01T09:00:00-05:00"},
+        {"work": "pairing #plan #dev [30m]", "timestamp": "2024-03-11T00:30:00-04:00"},
+        {"work": "emails", "timestamp": "2024-03-11T10:00:00-04:00"},
+        {"work": "deploy #dev [2.5h]", "timestamp": "2024-07-01T23:30:00-04:00"},
+        {"work": "retro [45m]", "timestamp": "2024-11-04T00:30:00-05:00"},
+    ]
+    path = tmp_path / "work.jsonl"
+    path.write_text("\n".join(json.dumps(record) for record in records))
+    result = runner.invoke(cli.main, ["import", str(path)])
+    assert result.exit_code == 0, result.output
+    # whole days are read from the daily totals, if they are in the same timezone
+    if request.param == "rollup":
+        result = runner.invoke(cli.main, ["--rebuild-rollup", "--time-zone", "America/New_York"])
+        assert result.output.endswith("Daily totals rebuilt in America/New_York.\n")
+
+
+def _report(runner: CliRunner, *options: str) -> list[list[str]]:
+    result = runner.invoke(cli.main, ["report", "--time-zone", "America/New_York", *options])
+    assert result.exit_code == 0, result.output
+    return [re.split(r"\s{2,}", line) for line in result.output.splitlines()]
+
+
+@pytest.mark.usefixtures("report_work")
+def test_report_by_day(runner: CliRunner) -> None:
+    assert _report(runner, "--all") == [
+        ["Day", "Entries", "Total", "Average"],
+        ["2024-03-01", "1", "60.0 minutes", "60.0 minutes"],
+        ["2024-03-11", "2", "30.0 minutes", "30.0 minutes"],
+        ["2024-07-01", "1", "150.0 minutes", "150.0 minutes"],
+        ["2024-11-04", "1", "45.0 minutes", "45.0 minutes"],
+        ["Total", "5", "285.0 minutes", "71.25 minutes"],
+    ]
+
+
+@pytest.mark.usefixtures("report_work")
+def test_report_by_week_month_and_tag(runner: CliRunner) -> None:
+    assert _report(runner, "--all", "--by", "week", "-r", "--duration-unit", "h") == [
+        ["Week", "Entries", "Total", "Average"],
+        ["2024-W45", "1", "0.75 h", "0.75 h"],
+        ["2024-W27", "1", "2.5 h", "2.5 h"],
+        ["2024-W11", "2", "0.5 h", "0.5 h"],
+        ["2024-W09", "1", "1.0 h", "1.0 h"],
+        ["Total", "5", "4.75 h", "1.19 h"],
+    ]
+    assert _report(runner, "--by", "month", "--from", "2024-03-05", "--to", "2024-03-20")[1:] == [
+        ["2024-03", "2", "30.0 minutes", "30.0 minutes"],
+    ]
+    # work with several tags counts for each, so there's no total
+    assert _report(runner, "--all", "--by", "TAG") == [
+        ["Tag", "Entries", "Total", "Average"],
+        ["(no tag)", "2", "45.0 minutes", "45.0 minutes"],
+        ["dev", "2", "180.0 minutes", "90.0 minutes"],
+        ["plan", "2", "90.0 minutes", "45.0 minutes"],
+    ]
+    assert _report(runner, "--all", "-T", "dev", "-D", ">1h") == [
+        ["Day", "Entries", "Total", "Average"],
+        ["2024-07-01", "1", "150.0 minutes", "150.0 minutes"],
+    ]
+
+
+def test_report_nothing(runner: CliRunner) -> None:
+    result = runner.invoke(cli.main, ["report", "--by", "month"])
+    assert result.exit_code == 0, result.output
+    assert "Nothing to show, slacker." in result.output
+    save_and_verify(runner, "something old @ Jan 4 2022", "something old")
+    result = runner.invoke(cli.main, ["report"])
+    assert "Nothing to show, slacker." in result.output
+
+
+# -- Daily totals -------------------------------------------------------
+
+
+def _random_work(rng: random.Random, count: int) -> list[dict[str, Any]]:
+    """
+    Work of the past year and a bit, some of it with tags and a duration.
+    """
+    now = int(datetime.now(timezone.utc).timestamp())
+    records = []
+    for _ in range(count):
+        record: dict[str, Any] = {
+            "work": "work",
+            "timestamp": now - rng.randrange(400 * 86400),
+            "tags": rng.sample(["a", "b", "c"], rng.randint(0, 2)),
+        }
+        if rng.random() < 0.7:
+            # exact in binary, so that totals don't depend on the order of the sums
+            record["duration"] = rng.choice([0.25, 0.5, 15, 30, 45.5, 60, 90])
+        records.append(record)
+    return records
+
+
+def _import(runner: CliRunner, tmp_path: Path, records: list[dict[str, Any]]) -> None:
+    path = tmp_path / "work.jsonl"
+    path.write_text("\n".join(json.dumps(record) for record in records))
+    result = runner.invoke(cli.main, ["import", str(path), "--time-zone", "America/New_York"])
+    assert result.exit_code == 0, result.output
+
+
+def _assert_rollup_consistent() -> None:
+    """
+    Check the daily totals kept up to date against totalling the work again.
+    """
+    settings.configure(user_settings={"TIME_ZONE": "America/New_York"})
+    with models.init_db() as db:
+        query = models.DailyRollup.select().order_by(models.DailyRollup.day, models.DailyRollup.tag)
+        rows = list(query.tuples())
+        models.rebuild_rollup(db)
+        expected = list(query.tuples())
+    assert [row[:4] for row in rows] == [row[:4] for row in expected]
+    assert [row[4] for row in rows] == pytest.approx([row[4] for row in expected])
+
+
+def test_rollup_matches_recompute(runner: CliRunner, tmp_path: Path) -> None:
+    rng = random.Random(0)  # noqa: S311
+    result = runner.invoke(cli.main, ["--rebuild-rollup", "--time-zone", "America/New_York"])
+    assert result.exit_code == 0, result.output
+    _import(runner, tmp_path, _random_work(rng, 300))
+    _assert_rollup_consistent()
+    for command in (
+        ["fixing #a #b [20m] @ 3pm yesterday"],
+        ["what", "--delete", "-T", "a", "--past-month"],
+        ["what", "--delete", "-D", ">=60m", "--past-year"],
+        ["what", "--delete", "--on", "yesterday"],
+    ):
+        result = runner.invoke(cli.main, [*command, "--time-zone", "America/New_York"], input="y")
+        assert result.exit_code == 0, result.output
+        _assert_rollup_consistent()
+    with models.init_db():
+        # links and entries changed or removed on their own
+        tag = models.Tag.get(models.Tag.name == "b")
+        models.WorkTag.delete().where(models.WorkTag.tag == tag).execute()
+        models.Work.update(duration=models.Work.duration * 2).where(
+            models.Work.duration > 30
+        ).execute()
+        models.Work.update(timestamp=models.Work.timestamp - 43200).where(
+            models.Work.id % 3 == 0
+        ).execute()
+    _assert_rollup_consistent()
+    result = runner.invoke(cli.main, ["--truncate-db"], input="y")
+    assert result.exit_code == 0, result.output
+    with models.init_db():
+        assert not models.DailyRollup.select().exists()
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        ["--all"],
+        [],
+        ["--past-month", "-r"],
+        ["--past-year"],
+        ["--since", "100 days ago"],
+        ["--from", "200 days ago", "--to", "3pm 20 days ago"],
+        ["--yesterday"],
+        ["--today"],
+    ],
+)
+def test_report_from_rollup_matches_work(
+    runner: CliRunner, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, options: list[str]
+) -> None:
+    rng = random.Random(0)  # noqa: S311
+    result = runner.invoke(cli.main, ["--rebuild-rollup", "--time-zone", "America/New_York"])
+    assert result.exit_code == 0, result.output
+    _import(runner, tmp_path, _random_work(rng, 500))
+    for by in ("day", "week", "month", "tag"):
+        with_rollup = runner.invoke(
+            cli.main, ["report", "--by", by, *options, "--time-zone", "America/New_York"]
+        )
+        assert with_rollup.exit_code == 0, with_rollup.output
+        with monkeypatch.context() as patch:
+            patch.setattr(workedon, "get_rollup_time_zone", lambda: None)
+            from_work = runner.invoke(
+                cli.main, ["report", "--by", by, *options, "--time-zone", "America/New_York"]
+            )
+        assert with_rollup.output == from_work.output
+        assert "Nothing to show" not in with_rollup.output or "--today" in options
+
+
+def test_rollup_migrated_from_v7(runner: CliRunner, tmp_path: Path) -> None:
+    _import(runner, tmp_path, _random_work(random.Random(1), 50))  # noqa: S311
+    settings.configure()
+    with models.init_db() as db:
+        for trigger in ("insert", "delete", "update", "tag_insert", "tag_delete"):
+            db.execute_sql(f"DROP TRIGGER daily_rollup_{trigger}")
+        db.execute_sql("DROP TABLE daily_rollup")
+        db.execute_sql("DROP TABLE daily_rollup_offset")
+        db.execute_sql("PRAGMA user_version = 7")
+    models._verified_schemas.clear()
+
+    result = runner.invoke(cli.main, ["--db-version", "--time-zone", "America/New_York"])
+    assert result.output == f"Database schema version: {CURRENT_DB_VERSION}\n"
+    with models.init_db():
+        assert models.get_rollup_time_zone() == "America/New_York"
+    _import(runner, tmp_path, _random_work(random.Random(2), 50))  # noqa: S311
+    _assert_rollup_consistent()
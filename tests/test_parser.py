@@ -0,0 +1,252 @@
+"""
+Differential tests of the date phrases InputParser parses itself
+against dateparser, which parses everything else.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Generator
+from datetime import datetime, timedelta
+import random
+import zoneinfo
+
+import pytest
+import tzlocal
+
+from workedon import parser
+from workedon.exceptions import WorkedOnError
+from workedon.parser import InputParser, LocalDate, RelativeDate, parse_common
+
+# bases around DST changes, month ends and midnight, where calendar and
+# wall clock arithmetic and time zones are easiest to get wrong
+BASES = [
+    datetime(2024, 3, 10, 3, 30, 12, 345678, tzinfo=zoneinfo.ZoneInfo("America/New_York")),
+    datetime(2024, 11, 3, 1, 30, tzinfo=zoneinfo.ZoneInfo("America/New_York")),
+    datetime(2024, 3, 31, 12, 0, 59, tzinfo=zoneinfo.ZoneInfo("Europe/London")),
+    datetime(2024, 2, 29, 23, 59, tzinfo=zoneinfo.ZoneInfo("Asia/Kolkata")),
+    datetime(2024, 4, 7, 2, 30, tzinfo=zoneinfo.ZoneInfo("Pacific/Auckland")),
+    datetime(2025, 1, 1, 0, 5, tzinfo=zoneinfo.ZoneInfo("UTC")),
+    datetime(2024, 6, 5, 14, 0, tzinfo=zoneinfo.ZoneInfo("America/Los_Angeles")),
+]
+# time zones of the machine, which dateparser puts absolute dates in
+LOCAL_ZONES = ["UTC", "America/New_York", "Asia/Tokyo"]
+RELATIVE = [
+    "now",
+    "today",
+    "yesterday",
+    "  Yesterday ",
+    "12am today",
+    "12am yesterday",
+    "3:30pm yesterday",
+    "yesterday 14:30",
+    "yesterday at 2pm",
+    "today 9:05:30",
+    "11:59 PM today",
+    "1 month ago",
+    "13 months ago",
+    "1 year ago",
+    "a week ago",
+    "an hour ago",
+    "3 days ago",
+    "45 minutes ago",
+    "30 seconds ago",
+    "100000 years ago",
+]
+TIMES = [
+    "2pm",
+    "2 PM",
+    "12am",
+    "12pm",
+    "2:30pm",
+    "11:59:59pm",
+    "9:05",
+    "09:05",
+    "00:00",
+    "0:30",
+    "14:30",
+    "14:30:15",
+    "23:59:59.5",
+    "1:30",
+    "3am",
+]
+WEEKDAYS = [
+    "monday",
+    "Friday",
+    "sun",
+    "wed",
+    "thursday 23:59",
+    "friday 3pm",
+    "friday at 3pm",
+    "3pm friday",
+    "14:30 sat",
+    "tue 12am",
+]
+DATES = [
+    "2024-01-15",
+    "2024-1-5",
+    "2024/01/15",
+    "2024-05-06",
+    "2024-02-29",
+    "2023-12-31 23:59",
+    "2024-01-15 14:30",
+    "2024-01-15T14:30:00",
+    "2024-01-15 14:30:59.5",
+    "2024-01-15 2pm",
+    "2024-01-15 02:30 pm",
+    "2024-11-03 01:30",
+    "2024-03-10 02:30",
+    "2030-01-01",
+]
+# parsed by neither, or left to dateparser
+INVALID = ["2024-02-30", "2024-13-01", "0pm", "13pm", "24:00", "9:5"]
+
+
+@pytest.fixture(params=LOCAL_ZONES)
+def local_zone(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> Generator[None]:
+    monkeypatch.setenv("TZ", request.param)
+    tzlocal.reload_localzone()
+    yield
+    monkeypatch.undo()
+    tzlocal.reload_localzone()
+
+
+def _parse(
+    phrase: str, base: datetime, monkeypatch: pytest.MonkeyPatch, dateparser_only: bool
+) -> datetime | type[WorkedOnError]:
+    with monkeypatch.context() as patch:
+        patch.setattr(parser, "now", lambda: base)
+        if dateparser_only:
+            patch.setattr(parser, "parse_common", lambda phrase: None)
+        try:
+            return InputParser().parse_datetime(phrase)
+        except WorkedOnError as e:
+            return type(e)
+
+
+@pytest.mark.usefixtures("local_zone")
+@pytest.mark.parametrize("base", BASES, ids=str)
+@pytest.mark.parametrize("phrase", RELATIVE + TIMES + WEEKDAYS + DATES + INVALID)
+def test_dates_match_dateparser(
+    phrase: str, base: datetime, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    expected = _parse(phrase, base, monkeypatch, dateparser_only=True)
+    parsed = _parse(phrase, base, monkeypatch, dateparser_only=False)
+    if phrase in TIMES and base.day == 1 and parsed != expected:
+        # dateparser moves a time later than the base time to the day
+        # before, then back into the month of the base time, e.g. from
+        # 2024-12-31 to 2024-01-31. The day before is what was meant.
+        common = parse_common(phrase)
+        assert common is not None
+        resolved = common.resolve(base)
+        assert (resolved.date() - base.date()).days == -1
+        assert expected == resolved.replace(month=base.month)
+        return
+    assert parsed == expected
+    if isinstance(expected, datetime):
+        assert isinstance(parsed, datetime)
+        assert parsed.replace(tzinfo=None) == expected.replace(tzinfo=None)
+        assert parsed.utcoffset() == expected.utcoffset()
+
+
+@pytest.mark.parametrize("phrase", RELATIVE + TIMES + WEEKDAYS + DATES)
+def test_common_dates_parsed_natively(phrase: str) -> None:
+    assert isinstance(parse_common(phrase), (RelativeDate, LocalDate))
+
+
+@pytest.mark.parametrize(
+    "phrase",
+    ["Jan 4 2022", "last week", "2 days from now", "3 p.m.", "2024-01-15T14:30Z", *INVALID],
+)
+def test_other_dates_left_to_dateparser(phrase: str) -> None:
+    assert parse_common(phrase) is None
+
+
+# fragments of work texts, among them the edge cases of the patterns:
+# unterminated durations, unknown units, unicode digits and spaces,
+# characters that fold to unit letters, and tags next to durations
+FRAGMENTS = [
+    "work",
+    "é",
+    " ",
+    "  ",
+    "\t",
+    "\n",
+    "\u00a0",
+    "\u2003",
+    "\x1c",
+    "#",
+    "#tag",
+    "#a-b_1",
+    "#ÜBER",
+    "-",
+    "_",
+    "@",
+    "[",
+    "]",
+    "[2h]",
+    "[ 1.5 HRS ]",
+    "[30 min]",
+    "[10m]",
+    "[2hr\u017f]",
+    "[\u0663h]",
+    "[3x]",
+    "[2h",
+    "h]",
+    "2",
+    ".5",
+]
+
+
+def test_tokenize_matches_separate_scans() -> None:
+    rng = random.Random(0)  # noqa: S311
+    input_parser = InputParser()
+    for _ in range(20_000):
+        text = "".join(rng.choices(FRAGMENTS, k=rng.randint(0, 12)))
+        assert input_parser.tokenize(text) == (
+            input_parser.clean_work(text),
+            input_parser.parse_duration(text),
+            input_parser.parse_tags(text),
+        ), text
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("fixing #bug [2h] in prod", ("fixing in prod", 120.0, {"bug"})),
+        ("#a[1h]b", ("", 60.0, {"a"})),
+        ("#[1h]b  c", ("c", 60.0, set())),
+        ("#a[1h] b [30m]", ("b [30m]", 60.0, {"a"})),
+    ],
+)
+def test_tokenize(text: str, expected: tuple[str, float | None, set[str]]) -> None:
+    assert InputParser().tokenize(text) == expected
+
+
+@pytest.mark.parametrize(
+    "tags_opt, duration_opt, expected",
+    [
+        ((), "", ("fixing in prod", 120.0, {"bug"})),
+        (("QA", "bug"), "", ("fixing in prod", 120.0, {"bug", "qa"})),
+        ((), "30m", ("fixing in prod", 30.0, {"bug"})),
+        # not a duration, so the one in the work is kept
+        ((), "soon", ("fixing in prod", 120.0, {"bug"})),
+    ],
+)
+def test_parse_input(
+    tags_opt: tuple[str, ...],
+    duration_opt: str,
+    expected: tuple[str, float | None, set[str]],
+) -> None:
+    work = ("fixing", "#Bug", "[2h]", "in", "prod", "@", "3pm", "yesterday")
+    work_text, dt, duration, tags = InputParser().parse_input(work, tags_opt, duration_opt)
+    assert (work_text, duration, tags) == expected
+    assert dt.hour == 15
+
+
+def test_dateparser_built_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    parser._get_date_parser.cache_clear()
+    for base in BASES:
+        parsed = _parse("last week", base, monkeypatch, dateparser_only=False)
+        # relative to the base time of each parse
+        assert parsed == base - timedelta(days=7)
+    assert parser._get_date_parser.cache_info().misses == 1
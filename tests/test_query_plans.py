@@ -0,0 +1,168 @@
+"""
+EXPLAIN QUERY PLAN checks for the queries run by `wo what` and `wo export`,
+so that a change to the queries or the indexes can't silently fall back
+to full table scans or sorts.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any
+
+from click.testing import CliRunner
+import pytest
+
+from workedon import cli, models
+from workedon.conf import settings
+
+# full scans of a table, as opposed to index scans or virtual tables
+FULL_SCAN = re.compile(r"^SCAN (work|tag|work_tag)$")
+BY_DATE = "SEARCH work USING INDEX work_timestamp_duration (timestamp>? AND timestamp<?)"
+TAG_NAMES = "SEARCH work_tag USING PRIMARY KEY (work_id=?)"
+BY_TAG = [
+    "SEARCH tag USING COVERING INDEX tag_name (name=?)",
+    "SEARCH work_tag USING COVERING INDEX worktag_tag_id (tag_id=?)",
+]
+SORT = "USE TEMP B-TREE FOR ORDER BY"
+
+
+@pytest.fixture(autouse=True)
+def tagged_work() -> None:
+    settings.configure()
+    with models.init_db():
+        work = models.Work.create(work="planning the plans")
+        models.add_tags({work.id: {"a", "b"}})
+
+
+def _unalias(line: str, aliases: dict[str, str]) -> str:
+    return re.sub(r"\bt\d+\b", lambda m: aliases.get(m[0], m[0]), line)
+
+
+def query_plans(
+    runner: CliRunner,
+    monkeypatch: pytest.MonkeyPatch,
+    command: Any,
+    options: list[str],
+    table: str = "work",
+) -> list[list[str]]:
+    """
+    Run a command and return the query plan of each of its
+    statements on a table, with table aliases replaced by table names.
+    """
+    statements: list[tuple[str, Any]] = []
+    execute_sql = models._db.execute_sql
+
+    def recording_execute_sql(sql: str, params: Any = None, *args: Any, **kwargs: Any) -> Any:
+        if re.match(rf"(SELECT|DELETE).* \"{table}\"", sql):
+            statements.append((sql, params))
+        return execute_sql(sql, params, *args, **kwargs)
+
+    monkeypatch.setattr(models._db, "execute_sql", recording_execute_sql)
+    result = runner.invoke(command, options, input="n")
+    monkeypatch.undo()
+    assert result.exit_code == 0, result.output
+
+    plans = []
+    with models.init_db() as db:
+        for sql, params in statements:
+            aliases = {alias: table for table, alias in re.findall(r'"(\w+)" AS "(t\d+)"', sql)}
+            rows = db.execute_sql(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+            plans.append([_unalias(row[3], aliases) for row in rows])
+    assert plans, f"no statement on {table} was run"
+    return plans
+
+
+@pytest.mark.parametrize(
+    "options, expected, sorted_",
+    [
+        ([], [BY_DATE, TAG_NAMES], False),
+        (["-r"], [BY_DATE, TAG_NAMES], False),
+        (["-n", "5"], [BY_DATE, TAG_NAMES], False),
+        (["-l"], [BY_DATE], False),
+        (["--since", "3 days ago"], [BY_DATE, TAG_NAMES], False),
+        (["--on", "yesterday"], [BY_DATE, TAG_NAMES], False),
+        (["-D", ">1h"], [BY_DATE, TAG_NAMES], False),
+        (["-D", "<=30m", "-y"], [BY_DATE, TAG_NAMES], False),
+        (["-i", "abc"], ["SEARCH work USING INDEX work_uuid (uuid=?)", TAG_NAMES], False),
+        (["-T", "a"], [*BY_TAG, TAG_NAMES], True),
+        (["-T", "a", "-T", "b", "-D", ">1h", "-l"], BY_TAG, True),
+        (
+            ["--search", "plan*"],
+            [
+                "SCAN work_fts VIRTUAL TABLE INDEX 0:M1",
+                "SEARCH work USING INTEGER PRIMARY KEY (rowid=?)",
+            ],
+            True,
+        ),
+        (["--search", "plans", "-T", "a", "-m"], ["SCAN work_fts VIRTUAL TABLE INDEX 0:M1"], True),
+    ],
+)
+def test_what_query_plan(
+    runner: CliRunner,
+    monkeypatch: pytest.MonkeyPatch,
+    options: list[str],
+    expected: list[str],
+    sorted_: bool,
+) -> None:
+    (plan,) = query_plans(runner, monkeypatch, cli.what, ["--no-page", *options])
+    for line in expected:
+        assert line in plan, plan
+    assert not [line for line in plan if FULL_SCAN.match(line)], plan
+    # results come in index order, unless they are found by tag or text
+    assert (SORT in plan) == sorted_, plan
+
+
+def test_export_all_query_plan(runner: CliRunner, monkeypatch: pytest.MonkeyPatch) -> None:
+    (plan,) = query_plans(runner, monkeypatch, cli.main, ["export", "--all"])
+    assert "SCAN work USING INDEX work_timestamp_duration" in plan
+    assert TAG_NAMES in plan
+    assert SORT not in plan
+
+
+def test_delete_query_plan(runner: CliRunner, monkeypatch: pytest.MonkeyPatch) -> None:
+    (plan,) = query_plans(runner, monkeypatch, cli.what, ["--delete", "-T", "a"])
+    for line in BY_TAG:
+        assert line in plan, plan
+    assert not [line for line in plan if FULL_SCAN.match(line)], plan
+
+
+@pytest.mark.parametrize("by", ["day", "week", "month", "tag"])
+def test_report_query_plan(runner: CliRunner, monkeypatch: pytest.MonkeyPatch, by: str) -> None:
+    plans = query_plans(runner, monkeypatch, cli.main, ["report", "-y", "--by", by])
+    # the work of the days partly in the range (the others are read from the
+    # daily totals) is flattened into the aggregate query, which reads the
+    # timestamps and durations from the index only
+    plan = plans[-1]
+    assert (
+        "SEARCH work USING COVERING INDEX work_timestamp_duration (timestamp>? AND timestamp<?)"
+        in plan
+    ), plan
+    assert not [line for line in plan if FULL_SCAN.match(line)], plan
+    if by == "tag":
+        assert TAG_NAMES + " LEFT-JOIN" in plan, plan
+    # and the bounds of the time zone offsets are index lookups
+    for bound in plans[:-1]:
+        assert bound == ["SEARCH work USING COVERING INDEX work_timestamp_duration"], bound
+
+
+@pytest.mark.parametrize("by", ["day", "week", "month", "tag"])
+def test_report_rollup_query_plan(
+    runner: CliRunner, monkeypatch: pytest.MonkeyPatch, by: str
+) -> None:
+    options = ["report", "-y", "--by", by]
+    (plan,) = query_plans(runner, monkeypatch, cli.main, options, table="daily_rollup")
+    # a row per day and tag, in the date range only
+    assert "SEARCH daily_rollup USING PRIMARY KEY (day>? AND day<?)" in plan, plan
+
+
+@pytest.mark.parametrize("options", [[], ["--tag-usage", "--sort-tags", "entries"]])
+def test_list_tags_query_plan(
+    runner: CliRunner, monkeypatch: pytest.MonkeyPatch, options: list[str]
+) -> None:
+    (plan,) = query_plans(runner, monkeypatch, cli.main, ["--list-tags", *options], table="tag")
+    if options:
+        # a tag at a time, counted from its links and the work they point to
+        assert "SEARCH work_tag USING COVERING INDEX worktag_tag_id (tag_id=?) LEFT-JOIN" in plan
+        assert "SEARCH work USING INTEGER PRIMARY KEY (rowid=?) LEFT-JOIN" in plan
+    else:
+        assert plan == ["SCAN tag USING COVERING INDEX tag_name"]
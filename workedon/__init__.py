@@ -1,6 +1,18 @@
 """Top-level package for workedon."""
 
-from ._version import __version__
-from .cli import main
-
 __all__ = ["__version__", "main"]
+
+
+def __getattr__(name: str) -> object:
+    # importlib.metadata is slow to import, so the version is resolved on demand.
+    # The CLI is loaded on first use too, as the daemon client doesn't need it
+    # (this module doesn't even import typing).
+    if name == "__version__":
+        from ._version import __version__
+
+        return __version__
+    if name == "main":
+        from .cli import main
+
+        return main
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,4 +1,29 @@
-from .cli import main
+import sys
+
+
+def main() -> None:
+    """
+    Run a command in the daemon if it is running, or in-process otherwise.
+    """
+    # the client and the tag completion only load the standard library, so
+    # that forwarding a command or completing a tag doesn't pay for click
+    from .client import forward
+    from .completion import complete_tag
+
+    if complete_tag():
+        return
+    code = forward(sys.argv[1:])
+    if code is not None:
+        sys.exit(code)
+
+    from .profiling import phase, profiled
+
+    with profiled():
+        with phase("import cli"):
+            from .cli import main as cli_main
+
+        cli_main()
+
 
 if __name__ == "__main__":
     main()
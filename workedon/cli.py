@@ -9,11 +9,14 @@ from typing import Any
 import click
 from click_default_group import DefaultGroup
 
-from ._version import __version__ as _ver
-from .conf import CONF_PATH, settings
-from .models import DB_PATH, get_db_user_version, init_db, truncate_all_tables
+from .completion import cached_tag_names
+from .conf import CONF_PATH, DB_PATH, settings
+from .constants import IMPORT_BATCH_SIZE
+from .profiling import phase
 from .utils import add_options, load_settings
-from .workedon import fetch_tags, fetch_work, save_work
+
+# NOTE: .models and .workedon pull in peewee (and dateparser, via the parser),
+# so they are imported within the commands that need them to keep startup fast.
 
 # Only ignore warnings if not in debug mode
 if not os.environ.get("WORKEDON_DEBUG"):
@@ -23,6 +26,28 @@ if not os.environ.get("WORKEDON_DEBUG"):
 
 CONTEXT_SETTINGS: dict[str, list[str]] = {"help_option_names": ["-h", "--help"]}
 
+
+def _complete_tags(_ctx: click.Context, _param: click.Parameter, incomplete: str) -> list[str]:
+    """
+    Complete a tag from the tag cache, without loading peewee or the database.
+    """
+    return [name for name in cached_tag_names(str(DB_PATH)) if name.startswith(incomplete.lower())]
+
+
+def _print_version(ctx: click.Context, _param: click.Parameter, value: bool) -> None:
+    """
+    Print the version and exit.
+    Unlike click.version_option, this only loads the version
+    (and importlib.metadata) when the option is actually used.
+    """
+    if not value or ctx.resilient_parsing:
+        return
+    from ._version import __version__
+
+    click.echo(f"{ctx.find_root().info_name}, version {__version__}")
+    ctx.exit()
+
+
 # settings
 settings_options: list[Callable[..., Any]] = [
     click.option(
@@ -88,6 +113,7 @@ main_options: list[Callable[..., Any]] = [
         required=False,
         type=click.STRING,
         help="Tag to add to your work log.",
+        shell_complete=_complete_tags,
     ),
     click.option(
         "--duration",
@@ -100,6 +126,152 @@ main_options: list[Callable[..., Any]] = [
     ),
     *settings_options,
 ]
+# filters for fetching work
+fetch_options: list[Callable[..., Any]] = [
+    click.option(
+        "-r",
+        "--reverse",
+        is_flag=True,
+        required=False,
+        default=False,
+        show_default=True,
+        help="Reverse order while sorting.",
+    ),
+    click.option(
+        "-n", "--count", required=False, type=click.INT, help="Number of entries to return."
+    ),
+    click.option(
+        "-s",
+        "--last",
+        is_flag=True,
+        required=False,
+        default=False,
+        show_default=True,
+        help="Fetch the last thing you worked on",
+    ),
+    click.option(
+        "-i",
+        "--id",
+        "work_id",
+        required=False,
+        default="",
+        type=click.STRING,
+        help="id to fetch with.",
+    ),
+    click.option(
+        "-f",
+        "--from",
+        "start_date",
+        required=False,
+        default="",
+        type=click.STRING,
+        help="Start date-time to filter with.",
+    ),
+    click.option(
+        "-t",
+        "--to",
+        "end_date",
+        required=False,
+        default="",
+        type=click.STRING,
+        help="End date-time to filter with.",
+    ),
+    click.option(
+        "--since",
+        required=False,
+        default="",
+        type=click.STRING,
+        help="Fetch work done since a specified date-time in the past.",
+    ),
+    click.option(
+        "-d",
+        "--past-day",
+        "period",
+        flag_value="day",
+        is_flag=True,
+        help="Fetch work done in the past 24 hours.",
+    ),
+    click.option(
+        "-w",
+        "--past-week",
+        "period",
+        flag_value="week",
+        is_flag=True,
+        help="Fetch work done in the past week.",
+    ),
+    click.option(
+        "-m",
+        "--past-month",
+        "period",
+        flag_value="month",
+        is_flag=True,
+        help="Fetch work done in the past month.",
+    ),
+    click.option(
+        "-y",
+        "--past-year",
+        "period",
+        flag_value="year",
+        is_flag=True,
+        help="Fetch work done in the past year.",
+    ),
+    click.option(
+        "-e",
+        "--yesterday",
+        "period",
+        flag_value="yesterday",
+        is_flag=True,
+        help="Fetch work done yesterday.",
+    ),
+    click.option(
+        "-o",
+        "--today",
+        "period",
+        flag_value="today",
+        is_flag=True,
+        help="Fetch work done today.",
+    ),
+    click.option(
+        "--on",
+        required=False,
+        type=click.STRING,
+        help="Fetch work done on a particular date/day.",
+    ),
+    click.option(
+        "--at",
+        required=False,
+        type=click.STRING,
+        help="Fetch work done at a particular time on a particular date/day.",
+    ),
+    click.option(
+        "--tag",
+        "-T",
+        "tags",
+        multiple=True,
+        required=False,
+        type=click.STRING,
+        help="Tag to filter by. Can be used multiple times to filter by multiple tags.",
+        shell_complete=_complete_tags,
+    ),
+    click.option(
+        "--duration",
+        "-D",
+        required=False,
+        default="",
+        show_default=True,
+        type=click.STRING,
+        help="Duration to filter by.",
+    ),
+    click.option(
+        "--search",
+        "--grep",
+        "search",
+        required=False,
+        default="",
+        type=click.STRING,
+        help="Full-text search query to filter by, e.g. 'deploy*' or 'fix AND bug'.",
+    ),
+]
 
 
 @click.group(
@@ -109,7 +281,15 @@ main_options: list[Callable[..., Any]] = [
     context_settings=CONTEXT_SETTINGS,
     invoke_without_command=True,
 )
-@click.version_option(_ver, "-v", "--version")
+@click.option(
+    "-v",
+    "--version",
+    is_flag=True,
+    expose_value=False,
+    is_eager=True,
+    callback=_print_version,
+    help="Show the version and exit.",
+)
 @click.option(
     "--print-settings-path",
     "settings_path",
@@ -136,6 +316,22 @@ main_options: list[Callable[..., Any]] = [
     show_default=True,
     help="Print all saved tags.",
 )
+@click.option(
+    "--tag-usage",
+    is_flag=True,
+    required=False,
+    default=False,
+    show_default=True,
+    help="With --list-tags, also print how many entries use each tag and when it was last used.",
+)
+@click.option(
+    "--sort-tags",
+    required=False,
+    default="name",
+    show_default=True,
+    type=click.Choice(["name", "entries", "last-used"]),
+    help="With --list-tags, sort the tags by name, by number of entries or by last use.",
+)
 @click.option(
     "--db-version",
     is_flag=True,
@@ -154,6 +350,24 @@ main_options: list[Callable[..., Any]] = [
     hidden=True,
     help="Print the version of SQLite being used.",
 )
+@click.option(
+    "--db-stats",
+    is_flag=True,
+    required=False,
+    default=False,
+    show_default=True,
+    hidden=True,
+    help="Summarize the statistics of the SQL statements run on the database.",
+)
+@click.option(
+    "--flush-spool",
+    is_flag=True,
+    required=False,
+    default=False,
+    show_default=True,
+    hidden=True,
+    help="Save the work saved with WRITE_BEHIND to the database now.",
+)
 @click.option(
     "--print-db-path",
     is_flag=True,
@@ -170,7 +384,17 @@ main_options: list[Callable[..., Any]] = [
     default=False,
     show_default=True,
     hidden=True,
-    help="Execute the VACUUM command on the database to reclaim some space.",
+    help="Execute the VACUUM command on the database to reclaim some space"
+    " and apply the page size of DB_PROFILE.",
+)
+@click.option(
+    "--rebuild-rollup",
+    is_flag=True,
+    required=False,
+    default=False,
+    show_default=True,
+    hidden=True,
+    help="Total all saved work again for reports, by day in the current timezone.",
 )
 @click.option(
     "--truncate-db",
@@ -189,10 +413,15 @@ def main(
     settings_path: bool,
     print_settings: bool,
     list_tags: bool,
+    tag_usage: bool,
+    sort_tags: str,
     db_version: bool,
     sqlite_version: bool,
+    db_stats: bool,
+    flush_spool: bool,
     print_db_path: bool,
     vacuum_db: bool,
+    rebuild_rollup: bool,
     truncate_db: bool,
     **kwargs: Any,
 ) -> None:
@@ -213,16 +442,72 @@ def main(
     workedon what --today
     workedon what --past-month
     """
+    if not list_tags:
+        if tag_usage:
+            message = "--tag-usage can only be used with --list-tags."
+            raise click.UsageError(message)
+        if ctx.get_parameter_source("sort_tags") is not click.core.ParameterSource.DEFAULT:
+            message = "--sort-tags can only be used with --list-tags."
+            raise click.UsageError(message)
     if ctx.invoked_subcommand:
         return
 
     if print_db_path:
         click.echo(DB_PATH)
-    elif vacuum_db:
+    elif vacuum_db or rebuild_rollup or truncate_db or db_version or sqlite_version:
+        _run_db_option(vacuum_db, rebuild_rollup, truncate_db, db_version, sqlite_version)
+    elif print_settings:
+        for key, value in settings.items():
+            if key.isupper():
+                click.echo(f'{key}="{value}"')
+    elif settings_path:
+        click.echo(CONF_PATH)
+    elif list_tags:
+        from .models import init_db
+        from .workedon import print_tags
+
+        with init_db():
+            print_tags(sort_tags, tag_usage)
+    elif flush_spool:
+        from .models import init_db
+        from .spool import is_pending
+
+        if not is_pending():
+            click.echo("Nothing to flush.")
+            return
+        # opening the database drains the journal
+        with init_db():
+            click.echo("Spooled work saved.")
+    elif db_stats:
+        from .models import init_db
+        from .workedon import print_db_stats
+
+        with init_db() as db:
+            print_db_stats(db)
+
+
+def _run_db_option(
+    vacuum_db: bool,
+    rebuild: bool,
+    truncate_db: bool,
+    db_version: bool,
+    sqlite_version: bool,
+) -> None:
+    """
+    Run the database maintenance options of the main group.
+    """
+    from .models import get_db_user_version, init_db, rebuild_rollup, truncate_all_tables, vacuum
+
+    if vacuum_db:
         click.echo("Performing VACUUM...")
         with init_db() as db:
-            db.execute_sql("VACUUM;")
+            vacuum(db)
         click.echo("VACUUM complete.")
+    elif rebuild:
+        click.echo("Totalling work...")
+        with init_db() as db:
+            rebuild_rollup(db)
+        click.echo(f"Daily totals rebuilt in {settings.TIME_ZONE}.")
     elif truncate_db:
         if click.confirm("Continue deleting all saved data? There's no going back."):
             click.echo("Deleting...")
@@ -242,15 +527,6 @@ def main(
             else:
                 server_version = str(version) if version is not None else "unknown"
             click.echo(f"SQLite version: {server_version}")
-    elif print_settings:
-        for key, value in settings.items():
-            if key.isupper():
-                click.echo(f'{key}="{value}"')
-    elif settings_path:
-        click.echo(CONF_PATH)
-    elif list_tags:
-        for tag in fetch_tags():
-            click.echo(tag, nl=False)
 
 
 @main.command(hidden=True)
@@ -267,170 +543,259 @@ def workedon(stuff: tuple[str, ...], **kwargs: Any) -> None:
     """
     Specify what you worked on, with optional date/time. See workedon --help.
     """
+    from .spool import is_enabled, spool_work
+
+    if is_enabled():
+        # the database is left alone, for the next command to save the work
+        spool_work(stuff, kwargs["tags"], kwargs["duration"])
+        return
+    with phase("import commands"):
+        from .workedon import save_work
+
     save_work(stuff, kwargs["tags"], kwargs["duration"])
 
 
 @main.command()
+@add_options(fetch_options)
 @click.option(
-    "-r",
-    "--reverse",
+    "--delete",
     is_flag=True,
     required=False,
     default=False,
     show_default=True,
-    help="Reverse order while sorting.",
+    help="Delete fetched work.",
 )
-@click.option("-n", "--count", required=False, type=click.INT, help="Number of entries to return.")
 @click.option(
-    "-s",
-    "--last",
+    "--prune-tags",
     is_flag=True,
     required=False,
     default=False,
     show_default=True,
-    help="Fetch the last thing you worked on",
+    help="With --delete, also delete the tags no longer used by any work.",
 )
 @click.option(
-    "-i",
-    "--id",
-    "work_id",
+    "-g",
+    "--no-page",
+    is_flag=True,
     required=False,
-    default="",
-    type=click.STRING,
-    help="id to fetch with.",
+    default=False,
+    show_default=True,
+    help="Don't page the output.",
 )
 @click.option(
-    "-f",
-    "--from",
-    "start_date",
+    "-l",
+    "--text-only",
+    is_flag=True,
     required=False,
-    default="",
-    type=click.STRING,
-    help="Start date-time to filter with.",
+    default=False,
+    show_default=True,
+    help="Output the work log text only.",
 )
-@click.option(
-    "-t",
-    "--to",
-    "end_date",
-    required=False,
-    default="",
-    type=click.STRING,
-    help="End date-time to filter with.",
+@add_options(settings_options)
+@load_settings
+def what(
+    count: int | None,
+    last: bool,
+    work_id: str,
+    start_date: str,
+    end_date: str,
+    since: str,
+    period: str | None,
+    on: str | None,
+    at: str | None,
+    delete: bool,
+    prune_tags: bool,
+    no_page: bool,
+    reverse: bool,
+    text_only: bool,
+    tags: tuple[str, ...],
+    duration: str,
+    search: str,
+    **kwargs: Any,
+) -> None:
+    """
+    Fetch and display logged work.
+
+    \b
+    If no options are provided, work
+    from the past week is returned.
+    """
+    if prune_tags and not delete:
+        message = "--prune-tags can only be used with --delete."
+        raise click.UsageError(message)
+    with phase("import commands"):
+        from .workedon import fetch_work
+
+    if count is None and last:
+        count = 1
+    fetch_work(
+        count,
+        work_id,
+        start_date,
+        end_date,
+        since,
+        period,
+        on,
+        at,
+        delete,
+        no_page,
+        reverse,
+        text_only,
+        tags,
+        duration,
+        search,
+        prune_tags,
+    )
+
+
+@main.command(name="import")
+@click.argument(
+    "path",
+    metavar="<file>",
+    required=True,
+    type=click.Path(exists=True, dir_okay=False, allow_dash=True),
 )
 @click.option(
-    "--since",
+    "-F",
+    "--format",
+    "file_format",
     required=False,
-    default="",
-    type=click.STRING,
-    help="Fetch work done since a specified date-time in the past.",
+    default=None,
+    type=click.Choice(["jsonl", "csv"], case_sensitive=False),
+    help="Format of the file. Guessed from its extension by default (jsonl for stdin).",
 )
 @click.option(
-    "-d",
-    "--past-day",
-    "period",
-    flag_value="day",
-    is_flag=True,
-    help="Fetch work done in the past 24 hours.",
-)
-@click.option(
-    "-w",
-    "--past-week",
-    "period",
-    flag_value="week",
-    is_flag=True,
-    help="Fetch work done in the past week.",
-)
-@click.option(
-    "-m",
-    "--past-month",
-    "period",
-    flag_value="month",
-    is_flag=True,
-    help="Fetch work done in the past month.",
-)
-@click.option(
-    "-y",
-    "--past-year",
-    "period",
-    flag_value="year",
-    is_flag=True,
-    help="Fetch work done in the past year.",
-)
-@click.option(
-    "-e",
-    "--yesterday",
-    "period",
-    flag_value="yesterday",
-    is_flag=True,
-    help="Fetch work done yesterday.",
-)
-@click.option(
-    "-o",
-    "--today",
-    "period",
-    flag_value="today",
-    is_flag=True,
-    help="Fetch work done today.",
+    "-b",
+    "--batch-size",
+    required=False,
+    default=IMPORT_BATCH_SIZE,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Number of entries saved per transaction.",
 )
-@click.option(
-    "--on",
+@add_options(settings_options)
+@load_settings
+def import_(path: str, file_format: str | None, batch_size: int, **kwargs: Any) -> None:
+    """
+    Import work from a JSONL or CSV file ("-" for stdin).
+
+    \b
+    Each entry has a required "work" field and optional
+    "timestamp", "duration", "tags" and "id" fields.
+    Entries with an existing id are skipped.
+    """
+    from .workedon import import_work
+
+    import_work(path, file_format and file_format.lower(), batch_size)
+
+
+@main.command()
+@click.argument(
+    "path",
+    metavar="[<file>]",
     required=False,
-    type=click.STRING,
-    help="Fetch work done on a particular date/day.",
+    default="-",
+    type=click.Path(dir_okay=False, writable=True, allow_dash=True),
 )
 @click.option(
-    "--at",
+    "-F",
+    "--format",
+    "file_format",
     required=False,
-    type=click.STRING,
-    help="Fetch work done at a particular time on a particular date/day.",
+    default=None,
+    type=click.Choice(["jsonl", "csv"], case_sensitive=False),
+    help="Format of the file. Guessed from its extension by default (jsonl for stdout).",
 )
 @click.option(
-    "--delete",
+    "-a",
+    "--all",
+    "all_time",
     is_flag=True,
     required=False,
     default=False,
     show_default=True,
-    help="Delete fetched work.",
+    help="Export work from all time, ignoring the date filters.",
 )
+@add_options(fetch_options)
+@add_options(settings_options)
+@load_settings
+def export(
+    path: str,
+    file_format: str | None,
+    all_time: bool,
+    count: int | None,
+    last: bool,
+    work_id: str,
+    start_date: str,
+    end_date: str,
+    since: str,
+    period: str | None,
+    on: str | None,
+    at: str | None,
+    reverse: bool,
+    tags: tuple[str, ...],
+    duration: str,
+    search: str,
+    **kwargs: Any,
+) -> None:
+    """
+    Export logged work to a JSONL or CSV file (stdout by default).
+
+    \b
+    Takes the same filters as "what", and if none are
+    provided, work from the past week is exported.
+    The output can be read back with "import".
+    """
+    from .workedon import export_work
+
+    if count is None and last:
+        count = 1
+    export_work(
+        path,
+        file_format and file_format.lower(),
+        count,
+        work_id,
+        start_date,
+        end_date,
+        since,
+        period,
+        on,
+        at,
+        reverse,
+        tags,
+        duration,
+        search,
+        all_time,
+    )
+
+
+@main.command()
 @click.option(
-    "-g",
-    "--no-page",
-    is_flag=True,
+    "-b",
+    "--by",
+    "group_by",
     required=False,
-    default=False,
+    default="day",
     show_default=True,
-    help="Don't page the output.",
+    type=click.Choice(["day", "week", "month", "tag"], case_sensitive=False),
+    help="Group the totals by day, ISO week, month or tag.",
 )
 @click.option(
-    "-l",
-    "--text-only",
+    "-a",
+    "--all",
+    "all_time",
     is_flag=True,
     required=False,
     default=False,
     show_default=True,
-    help="Output the work log text only.",
-)
-@click.option(
-    "--tag",
-    "-T",
-    "tags",
-    multiple=True,
-    required=False,
-    type=click.STRING,
-    help="Tag to filter by. Can be used multiple times to filter by multiple tags.",
-)
-@click.option(
-    "--duration",
-    "-D",
-    required=False,
-    default="",
-    show_default=True,
-    type=click.STRING,
-    help="Duration to filter by.",
+    help="Report on work from all time, ignoring the date filters.",
 )
+@add_options(fetch_options)
 @add_options(settings_options)
 @load_settings
-def what(
+def report(
+    group_by: str,
+    all_time: bool,
     count: int | None,
     last: bool,
     work_id: str,
@@ -440,24 +805,28 @@ def what(
     period: str | None,
     on: str | None,
     at: str | None,
-    delete: bool,
-    no_page: bool,
     reverse: bool,
-    text_only: bool,
     tags: tuple[str, ...],
     duration: str,
+    search: str,
     **kwargs: Any,
 ) -> None:
     """
-    Fetch and display logged work.
+    Show the time spent on logged work, by day, week, month or tag.
 
     \b
-    If no options are provided, work
-    from the past week is returned.
+    Takes the same filters as "what", and if none are
+    provided, work from the past week is reported.
+    Each row has the number of entries and their total
+    and average duration. Work with several tags
+    counts for each of them.
     """
+    from .workedon import report_work
+
     if count is None and last:
         count = 1
-    fetch_work(
+    report_work(
+        group_by.lower(),
         count,
         work_id,
         start_date,
@@ -466,14 +835,78 @@ def what(
         period,
         on,
         at,
-        delete,
-        no_page,
         reverse,
-        text_only,
         tags,
         duration,
+        search,
+        all_time,
     )
 
 
+@main.group(context_settings=CONTEXT_SETTINGS)
+def daemon() -> None:
+    """
+    Run commands in a background server, to skip startup costs.
+
+    \b
+    While the daemon is running, commands are forwarded to it over
+    a Unix domain socket. Commands that prompt or read stdin, like
+    "what --delete" and "import -", still run in-process.
+    Set WORKEDON_NO_DAEMON=1 to run a command in-process anyway.
+    Restart the daemon after upgrading workedon.
+    """
+
+
+@daemon.command(name="start")
+@click.option(
+    "--foreground",
+    is_flag=True,
+    required=False,
+    default=False,
+    show_default=True,
+    help="Serve in the foreground instead of starting in the background.",
+)
+@load_settings
+def daemon_start(foreground: bool) -> None:
+    """
+    Start the daemon.
+    """
+    from .daemon import serve, start
+
+    if foreground:
+        serve()
+    else:
+        click.echo(f"The daemon is running: {start()}.")
+
+
+@daemon.command(name="stop")
+@load_settings
+def daemon_stop() -> None:
+    """
+    Stop the daemon.
+    """
+    from .daemon import stop
+
+    if stop():
+        click.echo("The daemon was stopped.")
+    else:
+        click.echo("The daemon is not running.")
+
+
+@daemon.command(name="status")
+@load_settings
+def daemon_status() -> None:
+    """
+    Show whether the daemon is running.
+    """
+    from .daemon import status
+
+    running = status()
+    if running is None:
+        click.echo("The daemon is not running.")
+    else:
+        click.echo(f"The daemon is running: {running}.")
+
+
 if __name__ == "__main__":
     main()
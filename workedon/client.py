@@ -0,0 +1,306 @@
+"""
+Client side of the daemon: forward a command to it and relay its output.
+
+This module is loaded before anything else on every run, so it must stay
+cheap to import: no click, no json, and _socket rather than socket, which
+costs more to import (enum, selectors) than a forwarded command takes to run.
+"""
+
+from __future__ import annotations
+
+import _socket
+import io
+import os
+import struct
+import sys
+
+# A frame is a channel byte and a payload length, then the payload.
+_HEADER = struct.Struct(">cI")
+# client -> daemon
+ARG = b"a"
+ENV = b"v"
+CWD = b"c"
+PROG = b"n"
+TTY = b"t"
+RUN = b"r"
+STATUS = b"s"
+STOP = b"q"
+# daemon -> client
+STDOUT = b"o"
+STDERR = b"e"
+PAGE = b"p"
+EXIT = b"x"
+FALLBACK = b"f"
+READY = b"y"
+
+# How long to wait for the daemon to take a command, in seconds. It serves
+# one at a time, and a command it doesn't get to by then runs in-process.
+_READY_TIMEOUT = 1.0
+
+# Arguments of commands that prompt or read stdin, which the daemon doesn't have.
+_LOCAL_ONLY = frozenset({"-", "--delete", "--truncate-db"})
+# Commands whose output is streamed, however long it is, which the client
+# would have to hold until the daemon is done (see _Response).
+_STREAMED = frozenset({"daemon", "export"})
+# How much of the output of a command is kept in memory, in bytes, past
+# which the rest of it is kept in a temporary file.
+_MEMORY_LIMIT = 1 << 20
+# Variables that locate the settings file and the database. A daemon
+# started with different values would serve another database.
+PATH_VARIABLES = ("HOME", "XDG_CONFIG_HOME", "XDG_DATA_HOME")
+
+
+def is_supported() -> bool:
+    """
+    Whether this platform has Unix domain sockets.
+    """
+    return hasattr(_socket, "AF_UNIX") and hasattr(os, "getuid")
+
+
+def socket_path() -> str:
+    """
+    Path of the daemon's socket, private to the current user.
+    """
+    path = os.environ.get("WORKEDON_SOCKET")
+    if path:
+        return path
+    # the owner of the socket is checked before connecting, see connect()
+    return runtime_path("sock")
+
+
+def runtime_path(suffix: str) -> str:
+    """
+    Path of a file of the current user in the runtime directory, which
+    other users may be able to write to: check its owner before using it.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or os.environ.get("TMPDIR")
+    runtime_dir = runtime_dir or "/tmp"  # noqa: S108
+    return os.path.join(runtime_dir, f"workedon-{os.getuid()}.{suffix}")
+
+
+def frame(channel: bytes, payload: bytes = b"") -> bytes:
+    return _HEADER.pack(channel, len(payload)) + payload
+
+
+class FrameReader:
+    """
+    Reads frames from a socket.
+    """
+
+    def __init__(self, sock: _socket.socket) -> None:
+        self._sock = sock
+        self._buffer = bytearray()
+
+    def _read(self, size: int) -> bytes:
+        while len(self._buffer) < size:
+            chunk = self._sock.recv(65536)
+            if not chunk:
+                break
+            self._buffer += chunk
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def read_frame(self) -> tuple[bytes, bytes]:
+        """
+        Read the next frame. An empty channel means the connection was closed.
+        """
+        header = self._read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            return b"", b""
+        channel, size = _HEADER.unpack(header)
+        return channel, self._read(size)
+
+
+def connect() -> _socket.socket | None:
+    """
+    Connect to the daemon, if it is running and ready for a request.
+    """
+    if not is_supported():
+        return None
+    path = socket_path()
+    try:
+        # never talk to a socket someone else put there
+        if os.stat(path).st_uid != os.getuid():
+            return None
+        sock = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    except OSError:
+        return None
+    sock.settimeout(_READY_TIMEOUT)
+    try:
+        sock.connect(path)
+        # sent once the daemon has accepted the connection. Until then, it
+        # doesn't read the request, so giving up runs nothing twice.
+        channel, _ = FrameReader(sock).read_frame()
+    except OSError:
+        channel = b""
+    if channel != READY:
+        sock.close()
+        return None
+    sock.settimeout(None)
+    return sock
+
+
+def forward(argv: list[str]) -> int | None:
+    """
+    Run a command in the daemon and relay its output.
+    Returns the exit code, or None when the command should run in-process:
+    the daemon isn't running, the command needs a terminal, it is a shell
+    completion, it is profiled or the daemon serves a different database.
+    """
+    if (
+        os.environ.get("WORKEDON_NO_DAEMON")
+        # profiled commands are timed from the start, in-process
+        or os.environ.get("WORKEDON_PROFILE")
+        or _STREAMED.intersection(argv[:1])
+        or _LOCAL_ONLY.intersection(argv)
+        # shell completion, which click runs when its variable is set
+        or any(key.startswith("_") and key.endswith("_COMPLETE") for key in os.environ)
+    ):
+        return None
+    sock = connect()
+    if sock is None:
+        return None
+    tty = sys.stdout.isatty()
+    env = {key: value for key, value in os.environ.items() if key.startswith("WORKEDON_")}
+    for key in PATH_VARIABLES:
+        env[key] = os.environ.get(key, "")
+    if tty:
+        env["COLUMNS"] = str(os.get_terminal_size().columns)
+    # the name click would give the program, for usage messages
+    prog = os.path.basename(sys.argv[0])
+    if prog == "__main__.py":
+        prog = "python -m workedon"
+    frames = [frame(ARG, arg.encode()) for arg in argv]
+    frames += [frame(ENV, f"{key}={value}".encode()) for key, value in env.items()]
+    frames.append(frame(CWD, os.getcwd().encode()))
+    frames.append(frame(PROG, prog.encode()))
+    frames.append(frame(TTY, b"1" if tty else b""))
+    frames.append(frame(RUN))
+    try:
+        sock.sendall(b"".join(frames))
+        response = _Response(FrameReader(sock))
+        try:
+            return _relay(response)
+        finally:
+            response.close()
+    except OSError:
+        sys.stderr.write("Lost the connection to the workedon daemon.\n")
+        return 1
+    finally:
+        sock.close()
+
+
+class _Response:
+    """
+    The frames of a command's output, read in full before any is written,
+    so that a slow reader of the output, like a pager or a pipe, never keeps
+    the daemon from serving other commands. Past _MEMORY_LIMIT bytes, the
+    rest of them is kept in a temporary file.
+    """
+
+    def __init__(self, reader: FrameReader) -> None:
+        self._frames: list[tuple[bytes, bytes]] = []
+        self._file: io.BufferedRandom | None = None
+        size = 0
+        while True:
+            channel, payload = reader.read_frame()
+            if not channel:
+                # the connection was closed, which read_frame says again
+                break
+            if self._file is None and size + len(payload) > _MEMORY_LIMIT:
+                import tempfile
+
+                self._file = tempfile.TemporaryFile()  # noqa: SIM115 - closed by close()
+            if self._file is None:
+                self._frames.append((channel, payload))
+                size += len(payload)
+            else:
+                self._file.write(frame(channel, payload))
+            if channel in (EXIT, FALLBACK):
+                break
+        self._frames.reverse()
+        if self._file is not None:
+            self._file.seek(0)
+
+    def read_frame(self) -> tuple[bytes, bytes]:
+        if self._frames:
+            return self._frames.pop()
+        if self._file is not None:
+            header = self._file.read(_HEADER.size)
+            if len(header) == _HEADER.size:
+                channel, size = _HEADER.unpack(header)
+                return channel, self._file.read(size)
+        return b"", b""
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+
+def _relay(reader: _Response) -> int | None:
+    """
+    Write the output of a command to stdout and stderr until it exits.
+    Output between two PAGE frames goes through the pager, as it would
+    have in-process.
+    """
+    in_pager = False
+    channel, payload = reader.read_frame()
+    while True:
+        if channel == STDOUT:
+            sys.stdout.buffer.write(payload)
+            sys.stdout.buffer.flush()
+        elif channel == STDERR:
+            _write_stderr(payload)
+        elif channel == PAGE and not in_pager and sys.stdin.isatty() and sys.stdout.isatty():
+            channel, payload = _page(reader)
+            continue
+        elif channel == PAGE:
+            # without a pager, the paged text ends with a new line
+            if in_pager:
+                sys.stdout.buffer.write(b"\n")
+            in_pager = not in_pager
+        elif channel == EXIT:
+            return int(payload)
+        elif channel == FALLBACK:
+            return None
+        else:
+            raise ConnectionResetError
+        channel, payload = reader.read_frame()
+
+
+def _write_stderr(payload: bytes) -> None:
+    sys.stdout.flush()
+    sys.stderr.buffer.write(payload)
+    sys.stderr.buffer.flush()
+
+
+def _page(reader: _Response) -> tuple[bytes, bytes]:
+    """
+    Show the output up to the closing PAGE frame in a pager.
+    Returns the frame that followed it, or the one that ended the output early.
+    """
+    from collections.abc import Iterator
+
+    import click
+
+    end: list[tuple[bytes, bytes]] = []
+
+    def output() -> Iterator[str]:
+        while True:
+            channel, payload = reader.read_frame()
+            if channel == STDOUT:
+                yield payload.decode("utf-8", "replace")
+            elif channel == STDERR:
+                _write_stderr(payload)
+            else:
+                end.append((channel, payload))
+                return
+
+    click.echo_via_pager(output())
+    if not end:
+        # the pager was quit before the end of the output
+        return EXIT, b"0"
+    if end[0][0] == PAGE:
+        return reader.read_frame()
+    return end[0]
@@ -0,0 +1,170 @@
+"""
+Shell completion of tags, from a cache of their names.
+
+The entry point completes the values of --tag with this module before
+loading anything else (see __main__.py), so, like client.py, it only
+imports the modules of the standard library the interpreter loads on
+startup, not even contextlib. The cache is kept next to the daemon's
+socket rather than the database, whose path takes platformdirs to find,
+which alone loads slower than a completion should take. It is written
+with the standard library's sqlite3 driver when missing, and removed
+whenever tags are created or deleted (see models.init_db).
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+
+from . import client
+
+# options whose values are tags
+_TAG_OPTIONS = ("-T", "--tag")
+# commands without them
+_UNTAGGED_COMMANDS = ("import", "daemon")
+
+
+def tag_cache_path() -> str | None:
+    """
+    Path of the tag cache, or None where there are no user ids to keep it
+    private, on Windows. The cache starts with a line of the path, device and
+    inode of the database, and the variables the path was derived from,
+    then has the names of its tags, one per line.
+    """
+    return client.runtime_path("tags") if client.is_supported() else None
+
+
+def _header(db_path: str) -> str | None:
+    try:
+        stat = os.stat(db_path)
+    except OSError:
+        return None
+    env = [os.environ.get(key, "") for key in client.PATH_VARIABLES]
+    return "\0".join([db_path, f"{stat.st_dev}:{stat.st_ino}", *env])
+
+
+def _read_cache() -> tuple[str, list[str]] | None:
+    """
+    The database path and the tag names of the cache, if it
+    is still that of the database the settings point to.
+    """
+    path = tag_cache_path()
+    if path is None:
+        return None
+    try:
+        with open(path, encoding="utf-8") as cache:
+            # never trust a file someone else put there
+            if os.fstat(cache.fileno()).st_uid != os.getuid():
+                return None
+            header, *names = cache.read().splitlines()
+    except (OSError, ValueError):
+        return None
+    db_path = header.split("\0", 1)[0]
+    return (db_path, names) if header == _header(db_path) else None
+
+
+def cached_tag_names(db_path: str) -> list[str]:
+    """
+    Names of the saved tags of a database, sorted, from the tag
+    cache, which is written again from the database if it isn't its.
+    """
+    cached = _read_cache()
+    if cached is not None and cached[0] == db_path:
+        return cached[1]
+    header = _header(db_path)
+    if header is None:
+        return []
+    from pathlib import Path
+    import sqlite3
+
+    try:
+        db = sqlite3.connect(f"{Path(db_path).as_uri()}?mode=ro", uri=True)
+        try:
+            names = [name for (name,) in db.execute("SELECT name FROM tag ORDER BY name")]
+        finally:
+            db.close()
+    except sqlite3.Error:
+        return []
+    path = tag_cache_path()
+    if path is None:
+        return names
+    # written whole, then moved in place, so a reader never sees half of it
+    partial = f"{path}.{os.getpid()}"
+    try:
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        fd = os.open(partial, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(fd, "w", encoding="utf-8") as cache:
+            cache.write("\n".join([header, *names]) + "\n")
+        os.replace(partial, path)
+    except OSError:
+        pass
+    return names
+
+
+def invalidate_tag_cache() -> None:
+    """
+    Remove the tag cache, for the next completion to read the tags again.
+    """
+    path = tag_cache_path()
+    if path is None:
+        return
+    try:  # noqa: SIM105
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def complete_tag() -> bool:
+    """
+    Complete the value of a --tag option, the way click would, when bash
+    or zsh asks for it. Returns False for any other completion, or when
+    the command line needs click to be parsed, for click to handle it.
+    """
+    instruction = next(
+        (
+            value
+            for key, value in os.environ.items()
+            if key.startswith("_") and key.endswith("_COMPLETE")
+        ),
+        None,
+    )
+    if instruction not in ("bash_complete", "zsh_complete"):
+        return False
+    words = os.environ.get("COMP_WORDS", "")
+    # left to click, which splits quotes and escapes like a shell would
+    if any(char in words for char in "'\"\\"):
+        return False
+    try:
+        cword = int(os.environ.get("COMP_CWORD", ""))
+    except ValueError:
+        return False
+    split = words.split()
+    args = split[1:cword]
+    incomplete = split[cword] if cword < len(split) else ""
+    if incomplete.startswith("--tag="):
+        args.append("--tag")
+        incomplete = incomplete.partition("=")[2]
+    if (
+        not args
+        or args[-1] not in _TAG_OPTIONS
+        or args[0] in _UNTAGGED_COMMANDS
+        or "--" in args
+        or incomplete.startswith("-")
+    ):
+        return False
+
+    cached = _read_cache()
+    if cached is None:
+        from platformdirs import user_data_dir
+
+        # conf.DB_PATH, without loading the settings
+        names = cached_tag_names(os.path.join(user_data_dir("workedon", roaming=True), "won.db"))
+    else:
+        names = cached[1]
+    names = [name for name in names if name.startswith(incomplete.lower())]
+    if instruction == "bash_complete":
+        items = [f"plain,{name}" for name in names]
+    else:
+        items = [f"plain\n{name}\n_" for name in names]
+    sys.stdout.write("\n".join(items) + "\n")
+    return True
@@ -2,13 +2,14 @@ from importlib.util import module_from_spec, spec_from_file_location
 from pathlib import Path
 from typing import Any
 
-from platformdirs import user_config_dir
+from platformdirs import user_config_dir, user_data_dir
 
 from . import default_settings
 from .constants import APP_NAME, SETTINGS_HEADER
 from .exceptions import CannotCreateSettingsError, CannotLoadSettingsError
 
 CONF_PATH: Path = Path(user_config_dir(APP_NAME)) / "wonfile.py"
+DB_PATH: Path = Path(user_data_dir(APP_NAME, roaming=True)) / "won.db"
 
 
 class Settings(dict[str, Any]):
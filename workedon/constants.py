@@ -8,5 +8,12 @@ SETTINGS_HEADER: Final[
 # See https://github.com/viseshrp/workedon#settings for more information.
 #
 """
-CURRENT_DB_VERSION: Final[int] = 3
-WORK_CHUNK_SIZE: Final[int] = 100
+CURRENT_DB_VERSION: Final[int] = 8
+IMPORT_BATCH_SIZE: Final[int] = 10000
+MIGRATION_BATCH_SIZE: Final[int] = 10000
+# entries deleted per transaction, short enough not to hold up other writers
+DELETE_BATCH_SIZE: Final[int] = 500
+# SQLite versions before 3.32 allow at most 999 variables in a statement
+SQLITE_MAX_VARIABLES: Final[int] = 999
+# the slow statement log is rotated once it would grow past this size
+SLOW_LOG_MAX_BYTES: Final[int] = 1024 * 1024
@@ -0,0 +1,335 @@
+"""
+A background server that runs commands in a warm interpreter.
+
+The daemon loads the settings, dateparser and the database once, then
+serves the commands forwarded by the `wo` entry point (see client.py)
+on a Unix domain socket, one at a time.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Generator, Iterable
+import contextlib
+import inspect
+import io
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Any
+
+import click
+
+from . import client
+from .conf import DB_PATH
+from .exceptions import DaemonError
+
+LOG_PATH = DB_PATH.with_name("daemon.log")
+# how long `daemon start` and `daemon stop` wait for the daemon, in seconds
+_WAIT_TIMEOUT = 10.0
+# how long a client may take to send its request or read the output, in
+# seconds, before it is dropped so that it doesn't hold up the others
+_CLIENT_TIMEOUT = 5.0
+
+
+class _FrameWriter(io.RawIOBase):
+    """
+    A binary stream that sends what is written to it as frames on a channel.
+    """
+
+    def __init__(self, sock: socket.socket, channel: bytes, tty: bool) -> None:
+        super().__init__()
+        self._sock = sock
+        self._channel = channel
+        self._tty = tty
+
+    def writable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        # click keeps the styles of output going to a terminal
+        return self._tty
+
+    def write(self, data: Any) -> int:
+        self._sock.sendall(client.frame(self._channel, bytes(data)))
+        return len(data)
+
+
+def _text_stream(sock: socket.socket, channel: bytes, tty: bool) -> io.TextIOWrapper:
+    # click.echo flushes after every call, the rest is sent in 8KB frames
+    return io.TextIOWrapper(
+        io.BufferedWriter(_FrameWriter(sock, channel, tty)), encoding="utf-8", errors="replace"
+    )
+
+
+def _read_request(sock: socket.socket) -> dict[bytes, list[bytes]]:
+    """
+    Read the frames of a request, grouped by channel.
+    """
+    reader = client.FrameReader(sock)
+    request: dict[bytes, list[bytes]] = {}
+    while True:
+        channel, payload = reader.read_frame()
+        if not channel:
+            raise ConnectionResetError
+        request.setdefault(channel, []).append(payload)
+        if channel in (client.RUN, client.STATUS, client.STOP):
+            return request
+
+
+@contextlib.contextmanager
+def _isolation(
+    sock: socket.socket, argv: list[str], env: dict[str, str], cwd: str, tty: bool
+) -> Generator[None]:
+    """
+    Run a command as if it was run by the client: with its arguments, in its
+    directory, with its environment variables and with the output sent back to it.
+    """
+    stdout = _text_stream(sock, client.STDOUT, tty)
+    stderr = _text_stream(sock, client.STDERR, tty)
+    echo_via_pager = click.echo_via_pager
+
+    def page(text_or_generator: Any, color: bool | None = None) -> None:
+        if not tty:
+            return echo_via_pager(text_or_generator, color)
+        # the client pages the output between the two PAGE frames
+        if inspect.isgeneratorfunction(text_or_generator):
+            chunks: Iterable[str] = text_or_generator()
+        elif isinstance(text_or_generator, str):
+            chunks = [text_or_generator]
+        else:
+            chunks = text_or_generator
+        stdout.flush()
+        sock.sendall(client.frame(client.PAGE))
+        for chunk in chunks:
+            click.echo(chunk, nl=False, color=color)
+        stdout.flush()
+        sock.sendall(client.frame(client.PAGE))
+        return None
+
+    saved_env = {key: os.environ.pop(key) for key in list(os.environ) if _is_forwarded(key)}
+    saved_cwd = os.getcwd()
+    saved_streams = sys.stdin, sys.stdout, sys.stderr
+    saved_argv = sys.argv
+    os.environ.update(env)
+    # for the slow statement log
+    sys.argv = argv
+    # prompts get no input, so they are aborted rather than left waiting
+    sys.stdin, sys.stdout, sys.stderr = io.StringIO(), stdout, stderr
+    click.echo_via_pager = page
+    try:
+        os.chdir(cwd)
+        yield
+    finally:
+        click.echo_via_pager = echo_via_pager
+        sys.stdin, sys.stdout, sys.stderr = saved_streams
+        sys.argv = saved_argv
+        os.chdir(saved_cwd)
+        for key in [key for key in os.environ if _is_forwarded(key)]:
+            del os.environ[key]
+        os.environ.update(saved_env)
+        with contextlib.suppress(OSError, ValueError):
+            stdout.flush()
+            stderr.flush()
+
+
+def _is_forwarded(key: str) -> bool:
+    return key.startswith("WORKEDON_") or key == "COLUMNS"
+
+
+def _exit_code(code: Any) -> int:
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    # sys.exit("message") prints the message and exits with 1
+    click.echo(code, err=True)
+    return 1
+
+
+def _run(sock: socket.socket, request: dict[bytes, list[bytes]], main: click.Command) -> None:
+    """
+    Run the command of a request and send back its output and exit code.
+    """
+    env = dict(item.decode().split("=", 1) for item in request.get(client.ENV, []))
+    # a client with other settings and database paths runs the command itself
+    if any(env.pop(key, "") != os.environ.get(key, "") for key in client.PATH_VARIABLES):
+        sock.sendall(client.frame(client.FALLBACK))
+        return
+    args = [arg.decode() for arg in request.get(client.ARG, [])]
+    (cwd,) = request[client.CWD]
+    (prog,) = request[client.PROG]
+    (tty,) = request[client.TTY]
+    with _isolation(sock, [prog.decode(), *args], env, cwd.decode(), bool(tty)):
+        try:
+            main.main(args=args, prog_name=prog.decode(), standalone_mode=True)
+        except SystemExit as e:
+            code = _exit_code(e.code)
+        except (BrokenPipeError, ConnectionResetError, TimeoutError):
+            raise
+        except Exception as e:
+            click.echo(f"Error: {e}", err=True)
+            code = 1
+        else:
+            code = 0
+    sock.sendall(client.frame(client.EXIT, str(code).encode()))
+
+
+def _warm_up() -> None:
+    """
+    Load what commands need before serving them.
+    """
+    from . import models
+    from .conf import settings
+    from .parser import InputParser
+
+    settings.configure()
+    # dateparser is imported, and loads its language data, on first use. The
+    # common phrases, like "yesterday", are parsed without it.
+    InputParser().parse_datetime("last week")
+    models.keep_db_open()
+    with models.init_db():
+        pass
+
+
+def serve() -> None:
+    """
+    Serve commands on the socket until stopped.
+    """
+    from . import models, spool
+    from .cli import main
+
+    _warm_up()
+
+    path = client.socket_path()
+    listener = _bind(path)
+    # leave through the finally clause, which removes the socket
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    started = time.time()
+    served = 0
+    try:
+        while True:
+            sock, _ = listener.accept()
+            with sock:
+                sock.settimeout(_CLIENT_TIMEOUT)
+                try:
+                    sock.sendall(client.frame(client.READY))
+                    request = _read_request(sock)
+                    if client.STATUS in request or client.STOP in request:
+                        status = f"pid {os.getpid()}, up {time.time() - started:.0f}s, "
+                        status += f"{served} command(s) served"
+                        sock.sendall(client.frame(client.STDOUT, status.encode()))
+                        if client.STOP in request:
+                            break
+                        continue
+                    served += 1
+                    _run(sock, request, main)
+                except (BrokenPipeError, ConnectionResetError, TimeoutError):
+                    # the client went away, or stalled
+                    continue
+            # work saved with WRITE_BEHIND, once its client has returned.
+            # Opening the database saves it, or leaves it for the next command.
+            if spool.is_pending():
+                with contextlib.suppress(Exception), models.init_db():
+                    pass
+    finally:
+        listener.close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
+
+
+def _bind(path: str) -> socket.socket:
+    """
+    Listen on the socket, replacing a stale one left by a daemon that died.
+    """
+    if not client.is_supported():
+        raise DaemonError(extra_detail="Unix domain sockets are not supported on this platform.")
+    if os.path.exists(path):
+        if _request(client.STATUS) is not None:
+            raise DaemonError(extra_detail=f"It is already running on {path}.")
+        os.unlink(path)
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # only the current user may connect
+    umask = os.umask(0o077)
+    try:
+        listener.bind(path)
+    finally:
+        os.umask(umask)
+    listener.listen(16)
+    return listener
+
+
+def _request(channel: bytes) -> str | None:
+    """
+    Send a control request to the daemon and return its reply,
+    or None if it isn't running.
+    """
+    sock = client.connect()
+    if sock is None:
+        return None
+    try:
+        sock.sendall(client.frame(channel))
+        channel, payload = client.FrameReader(sock).read_frame()
+    except OSError:
+        return None
+    finally:
+        sock.close()
+    return payload.decode() if channel == client.STDOUT else None
+
+
+def _wait(condition: Callable[[], bool]) -> bool:
+    deadline = time.monotonic() + _WAIT_TIMEOUT
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+def status() -> str | None:
+    """
+    Describe the running daemon, or return None if it isn't running.
+    """
+    return _request(client.STATUS)
+
+
+def start() -> str:
+    """
+    Start the daemon in the background and wait until it serves commands.
+    """
+    if not client.is_supported():
+        raise DaemonError(extra_detail="Unix domain sockets are not supported on this platform.")
+    running = status()
+    if running is not None:
+        return running
+    LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with LOG_PATH.open("ab") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "workedon", "daemon", "start", "--foreground"],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            cwd="/",
+            start_new_session=True,
+        )
+    if not _wait(lambda: process.poll() is not None or status() is not None):
+        raise DaemonError(extra_detail=f"It did not start in time, see {LOG_PATH}.")
+    running = status()
+    if running is None:
+        raise DaemonError(extra_detail=f"It exited on start, see {LOG_PATH}.")
+    return running
+
+
+def stop() -> bool:
+    """
+    Stop the daemon. Returns False if it wasn't running.
+    """
+    if _request(client.STOP) is None:
+        return False
+    path = client.socket_path()
+    if not _wait(lambda: not os.path.exists(path)):
+        raise DaemonError(extra_detail="It did not stop in time.")
+    return True
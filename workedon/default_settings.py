@@ -5,3 +5,8 @@ TIME_FORMAT = "%H:%M %z %Z"
 DATETIME_FORMAT = ""
 TIME_ZONE = str(get_localzone())
 DURATION_UNIT = "minutes"
+DB_OPTIMIZE_INTERVAL = 24
+DB_STATS = False
+DB_SLOW_QUERY_MS = 100
+WRITE_BEHIND = False
+DB_PROFILE = "default"
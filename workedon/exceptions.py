@@ -59,6 +59,14 @@ class InvalidDateTimeError(WorkedOnError):
     detail = "The provided date/time is invalid. Please refer the docs for valid phrases."
 
 
+class InvalidDurationError(WorkedOnError):
+    """
+    Exception raised if the given duration string is invalid
+    """
+
+    detail = "The provided duration is invalid."
+
+
 class DateTimeInFutureError(WorkedOnError):
     """
     Exception raised if the given datetime is in the future
@@ -97,3 +105,27 @@ class CannotFetchWorkError(WorkedOnError):
     """
 
     detail = "Unable to fetch your work."
+
+
+class CannotImportWorkError(WorkedOnError):
+    """
+    Exception raised if work could not be imported
+    """
+
+    detail = "Unable to import your work."
+
+
+class CannotExportWorkError(WorkedOnError):
+    """
+    Exception raised if work could not be exported
+    """
+
+    detail = "Unable to export your work."
+
+
+class DaemonError(WorkedOnError):
+    """
+    Exception raised if the daemon could not be started or reached
+    """
+
+    detail = "Unable to run the daemon."
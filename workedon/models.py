@@ -1,57 +1,164 @@
-from collections.abc import Generator
+from collections.abc import Generator, Iterable, Iterator, Mapping, Sequence
 import contextlib
+from datetime import datetime, timezone
+import functools
+import itertools
 from pathlib import Path
-from typing import Any
-import zoneinfo
+import time
+from typing import Any, ClassVar
 
 import click
 from peewee import (
     CharField,
     CompositeKey,
-    DateTimeField,
+    Field,
     FloatField,
     ForeignKeyField,
+    IntegerField,
     Model,
     OperationalError,
     SqliteDatabase,
     TextField,
+    chunked,
+    fn,
 )
-from platformdirs import user_data_dir
-from playhouse.migrate import SqliteMigrator, migrate
+from playhouse.sqlite_ext import FTS5Model, SearchField
 
-from .conf import settings
-from .constants import APP_NAME, CURRENT_DB_VERSION
+from . import spool
+from .completion import invalidate_tag_cache
+from .conf import DB_PATH, settings
+from .constants import CURRENT_DB_VERSION, MIGRATION_BATCH_SIZE, SQLITE_MAX_VARIABLES
 from .exceptions import DBInitializationError
-from .utils import get_default_time, get_unique_hash
+from .profiling import phase, trace_queries
+from .querystats import save_stats, trace_statements
+from .renderer import WorkRenderer
+from .utils import get_default_time, get_unique_hash, utc_offsets
 
-DB_PATH: Path = Path(user_data_dir(APP_NAME, roaming=True)) / "won.db"
+
+class _Database(SqliteDatabase):
+    """
+    A SqliteDatabase with a method for statements executed once per row,
+    which the profiler and the statement stats wrap like execute_sql.
+    """
+
+    def execute_many(self, sql: str, seq_of_params: Iterable[Sequence[Any]]) -> Any:
+        return self.cursor().executemany(sql, seq_of_params)
+
+
+# The database is initialized lazily (see init_db) so that importing this
+# module never touches the disk.
+_db: SqliteDatabase = _Database(None)
+# (st_dev, st_ino) of database files whose schema is known to be current
+# in this process, so that repeated connections can skip the version check.
+_verified_schemas: set[tuple[int, int]] = set()
+# Connection settings of each DB_PROFILE, picked by what matters most:
+# fast: reads through memory-mapped I/O, and bigger pages, for fewer of them.
+# safe: commits synced to disk before returning, and no memory-mapped I/O,
+#   with which an I/O error crashes the process instead of raising.
+# low-memory: a 2MB page cache.
+DB_PROFILES: dict[str, dict[str, Any]] = {
+    "default": {"page_size": 4096, "cache_size": -64000, "mmap_size": 0, "synchronous": "NORMAL"},
+    "fast": {
+        "page_size": 8192,
+        "cache_size": -64000,
+        "mmap_size": 256 * 1024 * 1024,
+        "synchronous": "NORMAL",
+    },
+    "safe": {"page_size": 4096, "cache_size": -64000, "mmap_size": 0, "synchronous": "FULL"},
+    "low-memory": {"page_size": 4096, "cache_size": -2000, "mmap_size": 0, "synchronous": "NORMAL"},
+}
+# The DB_PROFILE the connection was set up with.
+_db_profile: str | None = None
+# Set by the daemon, so that the connection is reused by all of its commands.
+_keep_open: bool = False
+# The mtime of this file records the last time "PRAGMA optimize" was run.
+_OPTIMIZE_MARKER: Path = DB_PATH.with_name(f"{DB_PATH.name}-optimized")
+# Whether tags were created or deleted since the connection was opened. The
+# tag cache is invalidated when it is closed, once the changes are committed.
+_tags_changed: bool = False
 
 
 def _get_or_create_db() -> SqliteDatabase:
     """
-    Create the database and return the connection
+    Create the database file if needed and initialize the connection
     """
     if not DB_PATH.is_file():
         # create parent dirs
         DB_PATH.parent.mkdir(parents=True, exist_ok=True)
         DB_PATH.touch()
-    return SqliteDatabase(
+        # a new file never has a verified schema, even if its inode is reused.
+        _verified_schemas.clear()
+        # and a connection kept open would still point to the deleted one.
+        if not _db.is_closed():
+            _db.close()
+    global _db_profile
+    profile = settings.DB_PROFILE or "default"
+    if profile not in DB_PROFILES:
+        expected = ", ".join(DB_PROFILES)
+        raise DBInitializationError(
+            extra_detail=f"Unknown DB_PROFILE {profile!r}, expected one of {expected}."
+        )
+    # checked here, as the interval is only needed when the connection closes
+    _optimize_interval()
+    if _db.database is not None and profile == _db_profile:
+        return _db
+    if not _db.is_closed():
+        _db.close()
+    _db_profile = profile
+    tuning = DB_PROFILES[profile]
+    _db.init(
         str(DB_PATH),
         pragmas={
+            # only takes effect on a new database, or with VACUUM (see vacuum)
+            "page_size": tuning["page_size"],
             "journal_mode": "wal",  # does not work over a network filesystem.
-            "cache_size": -1 * 64000,  # 64MB
+            "cache_size": tuning["cache_size"],
+            "mmap_size": tuning["mmap_size"],
             "foreign_keys": 1,
             "ignore_check_constraints": 0,
-            "synchronous": "NORMAL",
+            "synchronous": tuning["synchronous"],
             "auto_vacuum": "NONE",
             "automatic_index": 1,
             "temp_store": "MEMORY",
             "analysis_limit": 1000,
         },
     )
+    return _db
 
 
-_db: SqliteDatabase = _get_or_create_db()
+def vacuum(database: SqliteDatabase) -> None:
+    """
+    Rebuild the database to reclaim space, with the page size of its
+    DB_PROFILE. The page size of a database in WAL mode can't change,
+    so it is rebuilt in rollback journal mode when it has to.
+    """
+    page_size = DB_PROFILES[_db_profile or "default"]["page_size"]
+    if database.page_size == page_size:
+        database.execute_sql("VACUUM;")
+        return
+    database.execute_sql("PRAGMA journal_mode = DELETE;")
+    try:
+        database.execute_sql(f"PRAGMA page_size = {page_size};")
+        database.execute_sql("VACUUM;")
+    finally:
+        database.execute_sql("PRAGMA journal_mode = WAL;")
+
+
+class EpochField(IntegerField):
+    """
+    A timezone-aware datetime, stored as whole seconds since the epoch.
+    Values are read back in UTC.
+    """
+
+    def db_value(self, value: Any) -> Any:
+        if isinstance(value, datetime):
+            value = int(value.timestamp())
+        return super().db_value(value)
+
+    def python_value(self, value: Any) -> Any:
+        if value is None:
+            return None
+        return datetime.fromtimestamp(value, tz=timezone.utc)
 
 
 class Work(Model):
@@ -59,17 +166,11 @@ class Work(Model):
     Model that represents a Work item
     """
 
-    uuid: CharField = CharField(primary_key=True, null=False, default=get_unique_hash)
-    created: DateTimeField = DateTimeField(
-        null=False, formats=[settings.internal_dt_format], default=get_default_time
-    )
+    # the rowid is the primary key, the uuid is the id shown to the user
+    uuid: CharField = CharField(unique=True, null=False, default=get_unique_hash)
+    created: EpochField = EpochField(null=False, default=get_default_time)
     work: TextField = TextField(null=False)
-    timestamp: DateTimeField = DateTimeField(
-        null=False,
-        formats=[settings.internal_dt_format],
-        index=True,
-        default=get_default_time,
-    )
+    timestamp: EpochField = EpochField(null=False, default=get_default_time)
     duration: FloatField = FloatField(null=True, default=None, index=True)
 
     def __str__(self) -> str:
@@ -78,41 +179,24 @@ class Work(Model):
         Uses a git log like structure.
         """
         if self.uuid is not None:
-            # At runtime, Peewee returns datetime objects, not DateTimeField descriptors
-            user_time = self.timestamp.astimezone(zoneinfo.ZoneInfo(settings.TIME_ZONE))  # type: ignore[attr-defined]
-            timestamp_str = user_time.strftime(
-                settings.DATETIME_FORMAT or f"{settings.DATE_FORMAT} {settings.TIME_FORMAT}"
-            )
             tags_rel = self.tags
             if hasattr(tags_rel, "order_by"):
-                tags = [t.tag.name for t in tags_rel.order_by(WorkTag.tag.name)]
+                # not prefetched: the names, in a single query
+                query = Tag.select(Tag.name).join(WorkTag).where(WorkTag.work == self.id)
+                tags = [name for (name,) in query.order_by(Tag.name).tuples()]
             else:
                 tags = sorted([t.tag.name for t in tags_rel])
-            tags_str = f"Tags: {', '.join(tags)}\n" if tags else ""
-
-            if self.duration is not None:
-                if settings.DURATION_UNIT in {"h", "hr", "hrs", "hours"}:
-                    duration = round(self.duration / 60, 2)
-                else:  # default to minutes
-                    duration = self.duration
-                duration_str = f"Duration: {duration} {settings.DURATION_UNIT}\n"
-            else:
-                duration_str = ""
-
-            return (
-                f'{click.style(f"id: {self.uuid}", fg="green")}\n'
-                f'{click.style(f"Date: {timestamp_str}")}\n'
-                f"{click.style(tags_str)}"
-                f"{click.style(duration_str)}"
-                f'\n\t{click.style(self.work, bold=True, fg="white")}\n\n'
-            )
+            # At runtime, Peewee returns values, not field descriptors
+            return WorkRenderer().render(self.uuid, self.timestamp, self.work, self.duration, tags)  # type: ignore[arg-type]
 
         # text-only fallback
-        return f'{click.style(f"* {self.work}", bold=True, fg="white")}\n'
+        return WorkRenderer().render_text(self.work)  # type: ignore[arg-type]
 
     class Meta:
         database: SqliteDatabase = _db
         table_name: str = "work"
+        # date ranges, with the duration filter checked within the index
+        indexes: ClassVar[tuple[Any, ...]] = ((("timestamp", "duration"), False),)
 
 
 class Tag(Model):
@@ -120,11 +204,8 @@ class Tag(Model):
     Model that represents a Tag item
     """
 
-    uuid: CharField = CharField(primary_key=True, null=False, default=get_unique_hash)
     name: CharField = CharField(unique=True, null=False)
-    created: DateTimeField = DateTimeField(
-        null=False, formats=[settings.internal_dt_format], default=get_default_time
-    )
+    created: EpochField = EpochField(null=False, default=get_default_time)
 
     class Meta:
         database: SqliteDatabase = _db
@@ -141,21 +222,209 @@ class WorkTag(Model):
     Work and Tag models.
     """
 
-    work: ForeignKeyField = ForeignKeyField(Work, backref="tags", on_delete="CASCADE")
+    # the primary key already indexes work first
+    work: ForeignKeyField = ForeignKeyField(Work, backref="tags", on_delete="CASCADE", index=False)
     tag: ForeignKeyField = ForeignKeyField(Tag, backref="works")
 
     class Meta:
         database: SqliteDatabase = _db
         table_name: str = "work_tag"
         primary_key: CompositeKey = CompositeKey("work", "tag")
+        without_rowid: bool = True
+
+
+class WorkIndex(FTS5Model):
+    """
+    Full-text index of the Work descriptions.
+    It is an external content table: the text lives in Work only,
+    and triggers keep the index in sync with it.
+    """
+
+    work: SearchField = SearchField()
+
+    class Meta:
+        database: SqliteDatabase = _db
+        table_name: str = "work_fts"
+        # index 2 and 3 character prefixes for fast prefix queries.
+        options: ClassVar[dict[str, Any]] = {
+            "content": Work,
+            "content_rowid": "rowid",
+            "prefix": "2 3",
+        }
+
+
+# DailyRollup.tag of the totals of all the work of a day, and of its untagged work
+ROLLUP_ALL: int = 0
+ROLLUP_UNTAGGED: int = -1
+
+
+class DailyRollup(Model):
+    """
+    Number of entries and total duration of work by local day and tag,
+    so that reports read a row per day instead of every entry.
+    Days are in the timezone of RollupOffset, and triggers on Work
+    and WorkTag keep the totals in sync with them.
+    """
+
+    day: TextField = TextField(null=False)
+    # a Tag id, ROLLUP_ALL or ROLLUP_UNTAGGED
+    tag: IntegerField = IntegerField(column_name="tag_id", null=False)
+    count: IntegerField = IntegerField(null=False)
+    # the number of entries with a duration, to average their durations
+    timed: IntegerField = IntegerField(null=False)
+    total_minutes: FloatField = FloatField(null=False)
+
+    class Meta:
+        database: SqliteDatabase = _db
+        table_name: str = "daily_rollup"
+        primary_key: CompositeKey = CompositeKey("day", "tag")
+        without_rowid: bool = True
+
+
+class RollupOffset(Model):
+    """
+    UTC offsets of the timezone of DailyRollup, from the epoch time
+    they apply from, for the triggers to find the local day of work.
+    """
+
+    since: IntegerField = IntegerField(primary_key=True)
+    utc_offset: IntegerField = IntegerField(null=False)
+    time_zone: TextField = TextField(null=False)
+
+    class Meta:
+        database: SqliteDatabase = _db
+        table_name: str = "daily_rollup_offset"
 
 
 _models: list[type[Model]] = [Work, Tag, WorkTag]
 
 
 def truncate_all_tables(**options: dict[str, Any]) -> None:
+    global _tags_changed
     for model in reversed(_models):
         model.truncate_table(**options)
+    _tags_changed = True
+
+
+def insert_rows(model: type[Model], fields: list[Field], rows: Iterable[tuple[Any, ...]]) -> None:
+    """
+    Insert rows, skipping the ones that already exist, with one prepared
+    statement executed for every row. Unlike `insert_many`, the SQL is only
+    generated once, which matters when loading a lot of rows.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return
+    sql, _ = model.insert_many([first], fields=fields).on_conflict_ignore().sql()
+    converters = [field.db_value for field in fields]
+    model._meta.database.execute_many(
+        sql,
+        (
+            [convert(value) for convert, value in zip(converters, row, strict=True)]
+            for row in itertools.chain([first], rows)
+        ),
+    )
+
+
+def add_tags(work_tags: Mapping[int, Iterable[str]]) -> None:
+    """
+    Attach tags to works in bulk. `work_tags` maps a Work id
+    to the names of its tags; missing tags are created.
+    Runs a constant number of statements regardless of the number of tags:
+    one upsert for the names, one select for their ids and one prepared
+    insert for the links (the first two split only to stay under SQLite's
+    variable limit).
+    """
+    global _tags_changed
+    names = sorted({name for tags in work_tags.values() for name in tags})
+    if not names:
+        return
+    # name and created are bound for every new tag
+    for batch in chunked(names, SQLITE_MAX_VARIABLES // 2):
+        created = (
+            Tag.insert_many([{"name": name} for name in batch])
+            .on_conflict(conflict_target=[Tag.name], action="NOTHING")
+            .as_rowcount()
+            .execute()
+        )
+        _tags_changed = _tags_changed or created > 0
+    tag_ids: dict[str, int] = {}
+    for batch in chunked(names, SQLITE_MAX_VARIABLES):
+        tag_ids.update(Tag.select(Tag.name, Tag.id).where(Tag.name.in_(batch)).tuples())
+    links = ((work_id, tag_ids[name]) for work_id, tags in work_tags.items() for name in set(tags))
+    insert_rows(WorkTag, [WorkTag.work, WorkTag.tag], links)
+
+
+def tags_by_work_id(work_tags: Mapping[str, set[str]]) -> dict[int, set[str]]:
+    """
+    Key the tags of work by Work id instead of uuid, for add_tags.
+    """
+    ids: dict[int, set[str]] = {}
+    for batch in chunked(work_tags, SQLITE_MAX_VARIABLES):
+        for uuid, work_id in Work.select(Work.uuid, Work.id).where(Work.uuid.in_(batch)).tuples():
+            ids[work_id] = work_tags[uuid]
+    return ids
+
+
+def existing_uuids(uuids: Iterable[str]) -> set[str]:
+    """
+    The ones of the given uuids that work already has.
+    """
+    existing: set[str] = set()
+    for batch in chunked(uuids, SQLITE_MAX_VARIABLES):
+        existing.update(
+            uuid for (uuid,) in Work.select(Work.uuid).where(Work.uuid.in_(batch)).tuples()
+        )
+    return existing
+
+
+def drain_spool(database: SqliteDatabase) -> int:
+    """
+    Save the work of the write-behind journal, in batches, each in its own
+    transaction, and empty it. Entries already saved are skipped.
+    Returns how many entries there were.
+    """
+    fields = [Work.uuid, Work.work, Work.timestamp, Work.duration, Work.created]
+    with spool.draining() as records:
+        for batch in chunked(records, MIGRATION_BATCH_SIZE):
+            rows = [
+                (
+                    record["id"],
+                    record["work"],
+                    datetime.fromtimestamp(record["timestamp"], timezone.utc),
+                    record["duration"],
+                    datetime.fromtimestamp(record["created"], timezone.utc),
+                )
+                for record in batch
+            ]
+            with database.atomic():
+                insert_rows(Work, fields, rows)
+                add_tags(tags_by_work_id({r["id"]: set(r["tags"]) for r in batch if r["tags"]}))
+    return len(records)
+
+
+def delete_work(work_ids: Sequence[int], batch_size: int) -> Iterator[int]:
+    """
+    Delete work by id, in batches of `batch_size` entries in rowid order,
+    each in its own transaction so that other writers only ever wait for
+    one batch. Yields the number of entries deleted by each batch.
+    """
+    for batch in chunked(sorted(work_ids), min(batch_size, SQLITE_MAX_VARIABLES)):
+        with _db.atomic():
+            deleted = Work.delete().where(Work.id.in_(batch)).execute()
+        yield deleted
+
+
+def delete_unused_tags() -> int:
+    """
+    Delete the tags that no work uses anymore. Returns how many were deleted.
+    """
+    global _tags_changed
+    used = WorkTag.select(WorkTag.tag).where(WorkTag.tag == Tag.id)
+    deleted: int = Tag.delete().where(~fn.EXISTS(used)).execute()
+    _tags_changed = _tags_changed or deleted > 0
+    return deleted
 
 
 def get_db_user_version(database: SqliteDatabase) -> int:
@@ -178,22 +447,251 @@ def _create_initial_tables(database: SqliteDatabase) -> None:
     """
     If this is a brand-new database (user_version = 0),
     create all tables (Work, Tag, WorkTag) in one shot.
-    Then set user_version = CURRENT_DB_VERSION (3).
+    Then set user_version = CURRENT_DB_VERSION (8).
     """
     database.create_tables(_models, safe=True)
+    _create_search_index(database)
+    _create_rollup(database)
     _set_db_user_version(database, CURRENT_DB_VERSION)
 
 
+_SEARCH_TRIGGERS: list[str] = [
+    """
+    CREATE TRIGGER IF NOT EXISTS work_fts_insert AFTER INSERT ON work BEGIN
+        INSERT INTO work_fts (rowid, work) VALUES (new.rowid, new.work);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS work_fts_delete AFTER DELETE ON work BEGIN
+        INSERT INTO work_fts (work_fts, rowid, work) VALUES ('delete', old.rowid, old.work);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS work_fts_update AFTER UPDATE OF work ON work BEGIN
+        INSERT INTO work_fts (work_fts, rowid, work) VALUES ('delete', old.rowid, old.work);
+        INSERT INTO work_fts (rowid, work) VALUES (new.rowid, new.work);
+    END
+    """,
+]
+
+
+def _create_search_index(database: SqliteDatabase) -> None:
+    """
+    Create the full-text index of Work, its triggers,
+    and index the existing work.
+    Skipped if SQLite was built without FTS5.
+    """
+    try:
+        WorkIndex.create_table()
+    except OperationalError:
+        return
+    for trigger in _SEARCH_TRIGGERS:
+        database.execute_sql(trigger)
+    _rebuild_search_index(database)
+
+
+def _has_search_index(database: SqliteDatabase) -> bool:
+    """
+    Check if the full-text index exists.
+    """
+    return WorkIndex._meta.table_name in database.get_tables()
+
+
+def _rebuild_search_index(database: SqliteDatabase) -> None:
+    """
+    Re-index all work, if the full-text index exists.
+    """
+    if _has_search_index(database):
+        database.execute_sql("INSERT INTO work_fts (work_fts) VALUES ('rebuild');")
+
+
+# The local day of the row of a trigger, e.g. new or old.
+_ROLLUP_DAY = (
+    "date({row}.timestamp + coalesce((SELECT utc_offset FROM daily_rollup_offset"
+    " WHERE since <= {row}.timestamp ORDER BY since DESC LIMIT 1), 0), 'unixepoch')"
+)
+# Add (or with a sign of -1, remove) the work of a row to the totals of a tag.
+_ROLLUP_UPSERT = """
+    INSERT INTO daily_rollup (day, tag_id, count, timed, total_minutes)
+    SELECT {day}, {tag}, {sign}, {sign} * ({row}.duration IS NOT NULL),
+        {sign} * coalesce({row}.duration, 0) {source}
+    ON CONFLICT (day, tag_id) DO UPDATE SET count = count + excluded.count,
+        timed = timed + excluded.timed, total_minutes = total_minutes + excluded.total_minutes;
+"""
+# Drop the totals left empty, along with the rounding errors they add up.
+_ROLLUP_CLEANUP = "DELETE FROM daily_rollup WHERE day = ({day}) AND {tag} AND count = 0;"
+
+
+def _rollup_work(row: str, sign: int) -> str:
+    """
+    Statements of a trigger on work that add or remove a row
+    to the totals of its day, of its tags or of untagged work.
+    """
+    day = _ROLLUP_DAY.format(row=row)
+    tags = f"FROM work_tag WHERE work_tag.work_id = {row}.id"
+    untagged = f"WHERE NOT EXISTS (SELECT 1 FROM work_tag WHERE work_id = {row}.id)"  # noqa: S608
+    statements = [
+        _ROLLUP_UPSERT.format(day=day, tag=ROLLUP_ALL, sign=sign, row=row, source="WHERE 1"),
+        _ROLLUP_UPSERT.format(day=day, tag="work_tag.tag_id", sign=sign, row=row, source=tags),
+        _ROLLUP_UPSERT.format(day=day, tag=ROLLUP_UNTAGGED, sign=sign, row=row, source=untagged),
+    ]
+    # totals only drop to zero when work is removed
+    if sign < 0:
+        statements.append(_ROLLUP_CLEANUP.format(day=day, tag="1"))
+    return "".join(statements)
+
+
+def _rollup_work_tag(row: str, sign: int) -> str:
+    """
+    Statements of a trigger on work_tag that add or remove the work of a
+    link to the totals of its tag, and to or from the untagged work if
+    it is the first or the last tag of the work. Links deleted along with
+    their work have no work left, and its trigger already removed them.
+    """
+    day = _ROLLUP_DAY.format(row="w")
+    work = f"FROM work AS w WHERE w.id = {row}.work_id"
+    # the other tags of the work, for an insert; all of them, for a delete
+    others = f"SELECT 1 FROM work_tag WHERE work_id = {row}.work_id"  # noqa: S608
+    if sign > 0:
+        others += f" AND tag_id != {row}.tag_id"
+    # the untagged work when the first tag is added, the tag when it is removed
+    emptied = ROLLUP_UNTAGGED if sign > 0 else f"{row}.tag_id"
+    return "".join(
+        [
+            _ROLLUP_UPSERT.format(day=day, tag=f"{row}.tag_id", sign=sign, row="w", source=work),
+            _ROLLUP_UPSERT.format(
+                day=day,
+                tag=ROLLUP_UNTAGGED,
+                sign=-sign,
+                row="w",
+                source=f"{work} AND NOT EXISTS ({others})",
+            ),
+            _ROLLUP_CLEANUP.format(day=f"SELECT {day} {work}", tag=f"tag_id = {emptied}"),
+        ]
+    )
+
+
+_ROLLUP_TRIGGERS: list[str] = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS daily_rollup_insert AFTER INSERT ON work BEGIN
+        {_rollup_work("new", 1)}
+    END
+    """,
+    # before, because deleting the work deletes its links to its tags
+    f"""
+    CREATE TRIGGER IF NOT EXISTS daily_rollup_delete BEFORE DELETE ON work BEGIN
+        {_rollup_work("old", -1)}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS daily_rollup_update
+    AFTER UPDATE OF timestamp, duration ON work BEGIN
+        {_rollup_work("old", -1)}
+        {_rollup_work("new", 1)}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS daily_rollup_tag_insert AFTER INSERT ON work_tag BEGIN
+        {_rollup_work_tag("new", 1)}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS daily_rollup_tag_delete AFTER DELETE ON work_tag BEGIN
+        {_rollup_work_tag("old", -1)}
+    END
+    """,
+]
+# The offsets are looked up from 1900 to 2100, a week apart: the first
+# one applies to anything earlier, and the last one to anything later.
+_ROLLUP_OFFSETS_START = -2208988800
+_ROLLUP_OFFSETS_END = 4102444800
+_ROLLUP_OFFSETS_STEP = 7 * 86400
+
+
+@functools.lru_cache
+def _rollup_offsets(time_zone: str) -> list[tuple[int, int]]:
+    """
+    The UTC offsets of the daily totals in a timezone, computed once
+    per process since it takes a few tens of milliseconds.
+    """
+    return utc_offsets(time_zone, _ROLLUP_OFFSETS_START, _ROLLUP_OFFSETS_END, _ROLLUP_OFFSETS_STEP)
+
+
+def _create_rollup(database: SqliteDatabase) -> None:
+    """
+    Create the daily totals of work, their triggers,
+    and total the existing work.
+    """
+    database.create_tables([DailyRollup, RollupOffset], safe=True)
+    for trigger in _ROLLUP_TRIGGERS:
+        database.execute_sql(trigger)
+    rebuild_rollup(database)
+
+
+def get_rollup_time_zone() -> str | None:
+    """
+    The timezone of the days of the daily totals of work.
+    """
+    return RollupOffset.select(RollupOffset.time_zone).limit(1).scalar()
+
+
+def rebuild_rollup(database: SqliteDatabase) -> None:
+    """
+    Total all the work again, by day in the user's timezone.
+    Repairs the totals, or moves them to another timezone.
+    """
+    (_, first), *changes = _rollup_offsets(settings.TIME_ZONE)
+    day = _ROLLUP_DAY.format(row="work")
+    with database.atomic():
+        RollupOffset.delete().execute()
+        DailyRollup.delete().execute()
+        insert_rows(
+            RollupOffset,
+            [RollupOffset.since, RollupOffset.utc_offset, RollupOffset.time_zone],
+            (
+                (since, offset, settings.TIME_ZONE)
+                for since, offset in [(-(2**63), first), *changes]
+            ),
+        )
+        totals = "COUNT(*), COUNT(work.duration), TOTAL(work.duration)"
+        for statement in (
+            f"SELECT {day}, {ROLLUP_ALL}, {totals} FROM work GROUP BY 1",  # noqa: S608
+            f"SELECT {day}, work_tag.tag_id, {totals} FROM work"  # noqa: S608
+            " JOIN work_tag ON work_tag.work_id = work.id GROUP BY 1, 2",
+            f"SELECT {day}, {ROLLUP_UNTAGGED}, {totals} FROM work WHERE NOT EXISTS"  # noqa: S608
+            " (SELECT 1 FROM work_tag WHERE work_id = work.id) GROUP BY 1",
+        ):
+            database.execute_sql(
+                "INSERT INTO daily_rollup (day, tag_id, count, timed, total_minutes) " + statement
+            )
+
+
+# The v2 tables, frozen as they were when the migration was written:
+# keyed by uuid, and with the timestamps stored as text.
+_V2_TABLES: list[str] = [
+    'CREATE TABLE IF NOT EXISTS "tag" ("uuid" VARCHAR(255) NOT NULL PRIMARY KEY,'
+    ' "name" VARCHAR(255) NOT NULL, "created" DATETIME NOT NULL)',
+    'CREATE UNIQUE INDEX IF NOT EXISTS "tag_name" ON "tag" ("name")',
+    'CREATE TABLE IF NOT EXISTS "work_tag" ("work_id" VARCHAR(255) NOT NULL,'
+    ' "tag_id" VARCHAR(255) NOT NULL, PRIMARY KEY ("work_id", "tag_id"),'
+    ' FOREIGN KEY ("work_id") REFERENCES "work" ("uuid") ON DELETE CASCADE,'
+    ' FOREIGN KEY ("tag_id") REFERENCES "tag" ("uuid"))',
+    'CREATE INDEX IF NOT EXISTS "worktag_work_id" ON "work_tag" ("work_id")',
+    'CREATE INDEX IF NOT EXISTS "worktag_tag_id" ON "work_tag" ("tag_id")',
+]
+
+
 def _migrate_v1_to_v2(database: SqliteDatabase) -> None:
     """
     Migrate from v1 → v2: create Tag & WorkTag tables.
     Then bump to v2.
     """
-    # Create Tag and WorkTag tables
-    database.create_tables([Tag, WorkTag], safe=True)
-    # Create the duration column in Work table
-    migrator = SqliteMigrator(database)
-    migrate(migrator.add_column("work", "duration", Work._meta.fields["duration"]))
+    with database.atomic():
+        for statement in _V2_TABLES:
+            database.execute_sql(statement)
+        # Create the duration column in Work table
+        if "duration" not in {column.name for column in database.get_columns("work")}:
+            database.execute_sql('ALTER TABLE "work" ADD COLUMN "duration" REAL')
     # bump the version to 2
     _set_db_user_version(database, 2)
 
@@ -204,24 +702,162 @@ def _migrate_v2_to_v3(database: SqliteDatabase) -> None:
     Adds indexes on Work.duration, WorkTag.work, and WorkTag.tag.
     Then bump to v3.
     """
-    # Add indexes for query optimization using migrator
-    migrator = SqliteMigrator(database)
-    migrate(
-        migrator.add_index("work", ("duration",), False),
-    )
+    database.execute_sql('CREATE INDEX IF NOT EXISTS "work_duration" ON "work" ("duration")')
     # bump the version to 3
     _set_db_user_version(database, 3)
 
 
-def _apply_pending_migrations(database: SqliteDatabase) -> None:
+def _migrate_v3_to_v4(database: SqliteDatabase) -> None:
+    """
+    Migrate from v3 → v4: add the full-text index of Work.
+    Then bump to v4.
+    """
+    _create_search_index(database)
+    # bump the version to 4
+    _set_db_user_version(database, 4)
+
+
+# timestamps were stored as text in settings.internal_dt_format,
+# i.e. "%Y-%m-%d %H:%M:%S%z". SQLite only understands "+HH:MM" offsets.
+_TEXT_TO_EPOCH = """
+CAST(strftime('%s', CASE WHEN length({column}) > 19
+    THEN substr({column}, 1, 19) || substr({column}, -5, 3) || ':' || substr({column}, -2)
+    ELSE {column} END) AS INTEGER)
+"""
+
+
+def _migrate_v4_to_v5(database: SqliteDatabase) -> None:
+    """
+    Migrate from v4 → v5: store timestamps as integer seconds since the epoch.
+    Rows are converted in place, in batches each committed on its own,
+    so an interrupted migration picks up where it stopped.
+    Then bump to v5.
+    """
+    for table, column in (("work", "timestamp"), ("work", "created"), ("tag", "created")):
+        convert = _TEXT_TO_EPOCH.format(column=column)
+        while True:
+            with database.atomic():
+                cursor = database.execute_sql(
+                    f"UPDATE {table} SET {column} = {convert} WHERE rowid IN ("  # noqa: S608
+                    f"SELECT rowid FROM {table} WHERE typeof({column}) = 'text' LIMIT ?)",
+                    (MIGRATION_BATCH_SIZE,),
+                )
+            if cursor.rowcount < MIGRATION_BATCH_SIZE:
+                break
+    # bump the version to 5
+    _set_db_user_version(database, 5)
+
+
+# The v6 layout, frozen as it was when the migration was written.
+_V6_TABLES: list[str] = [
+    'CREATE TABLE "work_v6" ("id" INTEGER NOT NULL PRIMARY KEY, "uuid" VARCHAR(255) NOT NULL,'
+    ' "created" INTEGER NOT NULL, "work" TEXT NOT NULL, "timestamp" INTEGER NOT NULL,'
+    ' "duration" REAL)',
+    'CREATE TABLE "tag_v6" ("id" INTEGER NOT NULL PRIMARY KEY, "name" VARCHAR(255) NOT NULL,'
+    ' "created" INTEGER NOT NULL)',
+    'CREATE TABLE "work_tag_v6" ("work_id" INTEGER NOT NULL, "tag_id" INTEGER NOT NULL,'
+    ' PRIMARY KEY ("work_id", "tag_id"),'
+    ' FOREIGN KEY ("work_id") REFERENCES "work" ("id") ON DELETE CASCADE,'
+    ' FOREIGN KEY ("tag_id") REFERENCES "tag" ("id")) WITHOUT ROWID',
+]
+_V6_COPIES: list[str] = [
+    'INSERT INTO "work_v6" SELECT rowid, uuid, created, work, timestamp, duration FROM "work"',
+    'INSERT INTO "tag_v6" SELECT rowid, name, created FROM "tag"',
+    'INSERT INTO "work_tag_v6" SELECT w.rowid, t.rowid FROM "work_tag" AS wt'
+    ' JOIN "work" AS w ON w.uuid = wt.work_id JOIN "tag" AS t ON t.uuid = wt.tag_id',
+]
+_V6_INDEXES: list[str] = [
+    'CREATE UNIQUE INDEX "work_uuid" ON "work" ("uuid")',
+    'CREATE INDEX "work_timestamp" ON "work" ("timestamp")',
+    'CREATE INDEX "work_duration" ON "work" ("duration")',
+    'CREATE UNIQUE INDEX "tag_name" ON "tag" ("name")',
+    'CREATE INDEX "worktag_tag_id" ON "work_tag" ("tag_id")',
+]
+
+
+def _migrate_v5_to_v6(database: SqliteDatabase) -> None:
+    """
+    Migrate from v5 → v6: integer primary keys.
+    Work and Tag were keyed by their uuid, a 32 character string that
+    WorkTag stored twice per link. They now use their rowid as an
+    integer primary key, and Work keeps its uuid as a unique column.
+    The tables are rebuilt (SQLite can't alter a primary key), keeping
+    the rowids, so the full-text index still points to the right rows.
+    Then bump to v6.
+    """
+    # already rebuilt, if the version bump didn't make it
+    if "id" in {column.name for column in database.get_columns("work")}:
+        _set_db_user_version(database, 6)
+        return
+    # foreign keys can only be toggled outside a transaction; with them on,
+    # dropping the old "work" table would cascade to the new links.
+    database.execute_sql("PRAGMA foreign_keys = OFF;")
+    try:
+        with database.atomic():
+            for statement in (*_V6_TABLES, *_V6_COPIES):
+                database.execute_sql(statement)
+            for table in ("work_tag", "work", "tag"):
+                database.execute_sql(f'DROP TABLE "{table}"')
+                database.execute_sql(f'ALTER TABLE "{table}_v6" RENAME TO "{table}"')
+            for statement in _V6_INDEXES:
+                database.execute_sql(statement)
+            if _has_search_index(database):
+                for trigger in _SEARCH_TRIGGERS:
+                    database.execute_sql(trigger)
+            if database.execute_sql("PRAGMA foreign_key_check;").fetchone():
+                raise DBInitializationError(extra_detail="Foreign key check failed.")
+    finally:
+        database.execute_sql("PRAGMA foreign_keys = ON;")
+    # bump the version to 6
+    _set_db_user_version(database, 6)
+
+
+def _migrate_v6_to_v7(database: SqliteDatabase) -> None:
+    """
+    Migrate from v6 → v7: index Work on (timestamp, duration),
+    the shape of a date range with a duration filter.
+    It replaces the index on timestamp alone.
+    Then bump to v7.
+    """
+    with database.atomic():
+        database.execute_sql(
+            'CREATE INDEX IF NOT EXISTS "work_timestamp_duration"'
+            ' ON "work" ("timestamp", "duration")'
+        )
+        database.execute_sql('DROP INDEX IF EXISTS "work_timestamp"')
+    # bump the version to 7
+    _set_db_user_version(database, 7)
+
+
+def _migrate_v7_to_v8(database: SqliteDatabase) -> None:
+    """
+    Migrate from v7 → v8: add the daily totals of work, for reports.
+    Then bump to v8.
+    """
+    _create_rollup(database)
+    # bump the version to 8
+    _set_db_user_version(database, 8)
+
+
+def _apply_pending_migrations(database: SqliteDatabase) -> bool:
     """
     Check PRAGMA user_version on the disk.
-    - If it's 0, do the initial create (v0 → v3 in one shot).
+    - If it's current, there's nothing to do.
+    - If it's 0, do the initial create (v0 → v8 in one shot).
     - Else if it's 1, run v1 -> v2.
     - Else if it's 2, run v2 -> v3.
+    - Else if it's 3, run v3 -> v4.
+    - Else if it's 4, run v4 -> v5.
+    - Else if it's 5, run v5 -> v6.
+    - Else if it's 6, run v6 -> v7.
+    - Else if it's 7, run v7 -> v8.
+    Returns True if any migration was applied.
     """
     try:
         existing_version = get_db_user_version(database)
+        # steady state: skip the migration ladder entirely
+        if existing_version == CURRENT_DB_VERSION:
+            return False
         # fresh new install
         if existing_version == 0:
             _create_initial_tables(database)
@@ -234,6 +870,26 @@ def _apply_pending_migrations(database: SqliteDatabase) -> None:
         if existing_version < 3:
             _migrate_v2_to_v3(database)
             existing_version = get_db_user_version(database)
+        # v3
+        if existing_version < 4:
+            _migrate_v3_to_v4(database)
+            existing_version = get_db_user_version(database)
+        # v4
+        if existing_version < 5:
+            _migrate_v4_to_v5(database)
+            existing_version = get_db_user_version(database)
+        # v5
+        if existing_version < 6:
+            _migrate_v5_to_v6(database)
+            existing_version = get_db_user_version(database)
+        # v6
+        if existing_version < 7:
+            _migrate_v6_to_v7(database)
+            existing_version = get_db_user_version(database)
+        # v7
+        if existing_version < 8:
+            _migrate_v7_to_v8(database)
+            existing_version = get_db_user_version(database)
         # Add more future versions here...
         # sanity check
         if existing_version != CURRENT_DB_VERSION:
@@ -244,6 +900,62 @@ def _apply_pending_migrations(database: SqliteDatabase) -> None:
             raise DBInitializationError(extra_detail=msg)
     except OperationalError as e:
         raise DBInitializationError(extra_detail=str(e)) from e
+    return True
+
+
+def _ensure_schema(database: SqliteDatabase) -> bool:
+    """
+    Apply pending migrations unless this database file has
+    already been verified by the current process.
+    Returns True if any migration was applied.
+    """
+    stat = DB_PATH.stat()
+    file_id = (stat.st_dev, stat.st_ino)
+    if file_id in _verified_schemas:
+        return False
+    migrated = _apply_pending_migrations(database)
+    _verified_schemas.add(file_id)
+    return migrated
+
+
+def _optimize_interval() -> float:
+    """
+    Get DB_OPTIMIZE_INTERVAL in hours, 0 if it isn't set.
+    """
+    interval = settings.DB_OPTIMIZE_INTERVAL
+    if not interval:
+        return 0.0
+    try:
+        return float(interval)
+    except (TypeError, ValueError) as e:
+        raise DBInitializationError(
+            extra_detail=f"Invalid DB_OPTIMIZE_INTERVAL {interval!r}, expected a number of hours."
+        ) from e
+
+
+def _optimize_due() -> bool:
+    """
+    Check whether DB_OPTIMIZE_INTERVAL hours have passed since
+    the last "PRAGMA optimize". A missing or non-positive
+    interval means it runs every time the database is closed.
+    """
+    interval = _optimize_interval()
+    if interval <= 0:
+        return True
+    try:
+        last_run = _OPTIMIZE_MARKER.stat().st_mtime
+    except OSError:
+        return True
+    return time.time() - last_run >= interval * 3600
+
+
+def _optimize(database: SqliteDatabase) -> None:
+    """
+    Run "PRAGMA optimize" and record when it was done.
+    """
+    database.execute_sql("PRAGMA optimize;")
+    with contextlib.suppress(OSError):
+        _OPTIMIZE_MARKER.touch()
 
 
 @contextlib.contextmanager
@@ -252,10 +964,37 @@ def init_db() -> Generator[SqliteDatabase]:
     Context manager to init
     and close the database
     """
-    if _db.is_closed():
-        _db.connect()
+    global _tags_changed
+    with phase("connect"):
+        _get_or_create_db()
+        trace_statements(_db)
+        trace_queries(_db)
+        if _db.is_closed():
+            _db.connect()
     # set the _db version if not set
-    _apply_pending_migrations(_db)
-    yield _db
-    _db.execute_sql("PRAGMA optimize;")
-    _db.close()
+    try:
+        with phase("migrate"):
+            migrated = _ensure_schema(_db)
+        if spool.is_pending():
+            with phase("drain"):
+                drain_spool(_db)
+        yield _db
+        if migrated or _optimize_due():
+            with phase("optimize"):
+                _optimize(_db)
+    finally:
+        # a failed command must not leave the connection behind
+        if not _keep_open:
+            _db.close()
+        if _tags_changed:
+            _tags_changed = False
+            invalidate_tag_cache()
+        save_stats()
+
+
+def keep_db_open() -> None:
+    """
+    Keep the connection open after init_db, for long-running processes.
+    """
+    global _keep_open
+    _keep_open = True
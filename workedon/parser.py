@@ -1,39 +1,260 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+import calendar
+import copy
+from datetime import date, datetime, time, timedelta, timezone
+import functools
 import re
-from typing import Final
-
-from dateparser.date import DateDataParser
+from typing import TYPE_CHECKING, Final, NamedTuple
 
 from .exceptions import DateTimeInFutureError, InvalidDateTimeError, InvalidWorkError
 from .utils import now
 
+if TYPE_CHECKING:
+    from dateparser.date import DateDataParser
+
+# "3 days ago", "an hour ago"
+_AGO_REGEX: Final[re.Pattern[str]] = re.compile(
+    r"(\d+|an?) (second|minute|hour|day|week|month|year)s? ago"
+)
+# "14:30", "9:05:30.25", "2pm", "3:30 pm", validated by _parse_time
+_TIME: Final[str] = r"\d{1,2}(?::\d\d){0,2} ?[ap]m|\d{1,2}:\d\d(?::\d\d(?:\.\d{1,6})?)?"
+_TIME_REGEX: Final[re.Pattern[str]] = re.compile(
+    r"(\d{1,2})(?::(\d\d))?(?::(\d\d))?(?:\.(\d{1,6}))? ?([ap]m)?"
+)
+_DAY: Final[str] = (
+    r"today|yesterday|mon(?:day)?|tue(?:sday)?|wed(?:nesday)?|thu(?:rsday)?"
+    r"|fri(?:day)?|sat(?:urday)?|sun(?:day)?"
+)
+# "friday", "yesterday at 3pm", "mon 14:30"
+_DAY_TIME_REGEX: Final[re.Pattern[str]] = re.compile(
+    rf"(?P<day>{_DAY})(?:(?: at)? (?P<time>{_TIME}))?"
+)
+# "2pm", "3:30pm yesterday", "14:30 friday"
+_TIME_DAY_REGEX: Final[re.Pattern[str]] = re.compile(rf"(?P<time>{_TIME})(?: (?P<day>{_DAY}))?")
+# "2024-01-15", "2024/1/5 14:30", "2024-01-15t14:30:00"
+_ISO_DATE_REGEX: Final[re.Pattern[str]] = re.compile(
+    rf"(\d{{4}})([-/])(\d{{1,2}})\2(\d{{1,2}})(?:[ t](?P<time>{_TIME}))?"
+)
+_SECONDS_PER_UNIT: Final[dict[str, int]] = {
+    "second": 1,
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+    "week": 7 * 86400,
+}
+_WEEKDAYS: Final[tuple[str, ...]] = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+
+class RelativeDate(NamedTuple):
+    """
+    A date relative to the current time: an offset back from it, and
+    optionally a time of day on the resulting date. It holds no datetime,
+    so it can be cached and resolved again as time passes.
+    """
+
+    months: int = 0
+    delta: timedelta = timedelta()
+    time_of_day: time | None = None
+
+    def resolve(self, base: datetime) -> datetime:
+        """
+        Resolve against a base time, the way dateparser would:
+        months are moved on the calendar, other units are subtracted
+        from the wall clock time.
+        """
+        date_time = base
+        if self.months:
+            year, month = divmod(base.year * 12 + base.month - 1 - self.months, 12)
+            day = min(base.day, calendar.monthrange(year, month + 1)[1])
+            date_time = date_time.replace(year=year, month=month + 1, day=day)
+        date_time -= self.delta
+        if self.time_of_day is not None:
+            time_of_day = self.time_of_day
+            date_time = date_time.replace(
+                hour=time_of_day.hour,
+                minute=time_of_day.minute,
+                second=time_of_day.second,
+                microsecond=time_of_day.microsecond,
+            )
+        return date_time
+
+
+class LocalDate(NamedTuple):
+    """
+    A time of day on a given date, on the last given weekday before the
+    current time, or on the current day. Like dateparser, it is put in
+    the local time zone of the machine rather than in that of the base time.
+    """
+
+    time_of_day: time
+    date: date | None = None
+    weekday: int | None = None
+
+    def resolve(self, base: datetime) -> datetime:
+        """
+        Resolve against a base time, the way dateparser would with
+        PREFER_DATES_FROM set to "past".
+        """
+        from tzlocal import get_localzone
+
+        if self.date is not None:
+            date_time = datetime.combine(self.date, self.time_of_day)
+        else:
+            date_time = datetime.combine(base.date(), self.time_of_day)
+            if self.weekday is not None:
+                # the same weekday means a week ago
+                date_time -= timedelta(days=(base.weekday() - self.weekday - 1) % 7 + 1)
+            elif date_time.replace(tzinfo=timezone.utc) > base:
+                # dateparser compares the time with the base time as if it was UTC
+                date_time -= timedelta(days=1)
+        return date_time.replace(tzinfo=get_localzone())
+
+
+def _parse_time(text: str | None) -> time | None:
+    """
+    Parse a time matched by _TIME, or None if it isn't a valid one.
+    A missing text is midnight.
+    """
+    if text is None:
+        return time()
+    match = _TIME_REGEX.fullmatch(text)
+    if not match:
+        return None
+    hour_str, minute_str, second_str, fraction, meridiem = match.groups()
+    hour = int(hour_str)
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem == "pm" else 0)
+    try:
+        return time(
+            hour, int(minute_str or 0), int(second_str or 0), int((fraction or "0").ljust(6, "0"))
+        )
+    except ValueError:
+        return None
+
+
+def _on_day(day: str, time_of_day: time | None) -> RelativeDate | LocalDate | None:
+    """
+    A time of day on a day matched by _DAY.
+    """
+    if time_of_day is None:
+        return None
+    if day in ("today", "yesterday"):
+        return RelativeDate(
+            delta=timedelta(days=1 if day == "yesterday" else 0), time_of_day=time_of_day
+        )
+    return LocalDate(time_of_day, weekday=_WEEKDAYS.index(day[:3]))
+
+
+@functools.lru_cache(maxsize=256)
+def parse_common(phrase: str) -> RelativeDate | LocalDate | None:
+    """
+    Parse the common date phrases without dateparser, which is slow to
+    import and to run: ISO dates, times of day, weekdays, today,
+    yesterday and "N units ago", and combinations of a day and a time.
+    Returns None for anything else, which is left to dateparser.
+    Results are cached by phrase, as they don't depend on the current time.
+    """
+    phrase = " ".join(phrase.lower().split())
+    if phrase in ("now", "today"):
+        return RelativeDate()
+    if phrase == "yesterday":
+        return RelativeDate(delta=timedelta(days=1))
+    match = _AGO_REGEX.fullmatch(phrase)
+    if match:
+        count_str, unit = match.groups()
+        count = 1 if count_str in ("a", "an") else int(count_str)
+        if unit == "month":
+            return RelativeDate(months=count)
+        if unit == "year":
+            return RelativeDate(months=12 * count)
+        return RelativeDate(delta=timedelta(seconds=count * _SECONDS_PER_UNIT[unit]))
+    match = _DAY_TIME_REGEX.fullmatch(phrase)
+    if match:
+        return _on_day(match["day"], _parse_time(match["time"]))
+    match = _TIME_DAY_REGEX.fullmatch(phrase)
+    if match:
+        time_of_day = _parse_time(match["time"])
+        if match["day"]:
+            return _on_day(match["day"], time_of_day)
+        return LocalDate(time_of_day) if time_of_day is not None else None
+    match = _ISO_DATE_REGEX.fullmatch(phrase)
+    if match:
+        time_of_day = _parse_time(match["time"])
+        try:
+            day = date(int(match[1]), int(match[3]), int(match[4]))
+        except ValueError:
+            return None
+        return LocalDate(time_of_day, date=day) if time_of_day is not None else None
+    return None
+
+
+@functools.cache
+def _get_date_parser() -> DateDataParser:
+    """
+    Build the dateparser instance on first use, shared by all parsers.
+    dateparser is slow to import, so it is only loaded when a date/time
+    phrase actually needs it. Its base time is set for every phrase, see
+    _parse_with_dateparser.
+    """
+    from dateparser.date import DateDataParser
+
+    parser = DateDataParser(
+        languages=["en"],
+        settings={
+            "STRICT_PARSING": False,
+            "NORMALIZE": True,
+            "RETURN_AS_TIMEZONE_AWARE": True,
+            "PREFER_DATES_FROM": "past",
+        },
+    )
+    # dateparser shares settings objects between the parsers built with the
+    # same settings, so this one gets a copy of its own to change
+    parser._settings = copy.copy(parser._settings)
+    return parser
+
+
+def _parse_with_dateparser(date_time: str, relative_base: datetime) -> datetime | None:
+    """
+    Parse a phrase with dateparser, relative dates being relative to the given time.
+    """
+    parser = _get_date_parser()
+    # dateparser only takes settings when building a parser, which costs
+    # more than parsing, and the settings it builds are kept forever
+    parser._settings.RELATIVE_BASE = relative_base
+    dt_obj = parser.get_date_data(date_time)
+    return dt_obj["date_obj"] if dt_obj else None
+
 
 class InputParser:
-    _date_parser: DateDataParser | None = None
     _WORK_DATE_SEPARATOR: Final[str] = "@"
-    _TAG_REGEX: Final[str] = r"#([\w\d_-]+)"
-    _DURATION_REGEX: Final[str] = r"\[\s*(\d+(?:\.\d+)?)\s*(h|hr|hrs|hours|m|min|mins|minutes)\s*\]"
+    _TAG_REGEX: Final[re.Pattern[str]] = re.compile(r"#([\w\d_-]+)")
+    _DURATION_REGEX: Final[re.Pattern[str]] = re.compile(
+        r"\[\s*(\d+(?:\.\d+)?)\s*(h|hr|hrs|hours|m|min|mins|minutes)\s*\]", flags=re.IGNORECASE
+    )
+    # a duration or a tag, for tokenize()
+    _TOKEN_REGEX: Final[re.Pattern[str]] = re.compile(
+        rf"{_DURATION_REGEX.pattern}|{_TAG_REGEX.pattern}", flags=re.IGNORECASE
+    )
+    _TAG_CHAR_REGEX: Final[re.Pattern[str]] = re.compile(r"[\w\d_-]")
 
     def __init__(self) -> None:
-        self._date_parser = DateDataParser(
-            languages=["en"],
-            settings={
-                "STRICT_PARSING": False,
-                "NORMALIZE": True,
-                "RETURN_AS_TIMEZONE_AWARE": True,
-                "PREFER_DATES_FROM": "past",
-                "RELATIVE_BASE": now(),
-            },
-        )
+        # relative dates are resolved against the time of the first parse
+        self._relative_base: datetime | None = None
 
     def _as_datetime(self, date_time: str) -> datetime | None:
-        dt_obj = self._date_parser.get_date_data(date_time)  # type: ignore[union-attr]
-        if dt_obj:
-            date_obj: datetime = dt_obj["date_obj"]
-            return date_obj
-        return None
+        if self._relative_base is None:
+            self._relative_base = now()
+        common = parse_common(date_time)
+        if common is not None:
+            try:
+                return common.resolve(self._relative_base)
+            except (ValueError, OverflowError):
+                # out of the range of datetime, which dateparser doesn't parse either
+                return None
+        return _parse_with_dateparser(date_time, self._relative_base)
 
     def parse_datetime(self, date_time: str) -> datetime:
         dt = date_time.strip()
@@ -53,49 +274,99 @@ class InputParser:
             raise DateTimeInFutureError()
         return parsed_dt
 
+    @staticmethod
+    def _to_minutes(value: str, unit: str) -> float | None:
+        unit = unit.lower()
+        if unit in {"h", "hr", "hrs", "hours"}:
+            return round(float(value) * 60, 2)
+        elif unit in {"m", "min", "mins", "minutes"}:
+            return float(value)
+        return None
+
     def parse_duration(self, input_str: str) -> float | None:
         """
         Extracts the first duration from the input_str string and returns it in minutes.
         """
-        match = re.search(self._DURATION_REGEX, input_str, flags=re.IGNORECASE)
+        match = self._DURATION_REGEX.search(input_str)
         if not match:
             return None
-        value, unit = match.groups()
-        value = float(value)
-        unit = unit.lower()
-        if unit in {"h", "hr", "hrs", "hours"}:
-            return round(value * 60, 2)
-        elif unit in {"m", "min", "mins", "minutes"}:
-            return value
-        return None
+        return self._to_minutes(*match.groups())
 
     def parse_tags(self, input_str: str) -> set[str]:
-        return set(re.findall(self._TAG_REGEX, input_str))
+        return set(self._TAG_REGEX.findall(input_str))
 
     def clean_work(self, work: str) -> str:
         """
         Cleans the work string by removing any duration and tags.
         """
         # remove duration
-        work = re.sub(self._DURATION_REGEX, "", work, count=1, flags=re.IGNORECASE).strip()
+        work = self._DURATION_REGEX.sub("", work, count=1).strip()
         # remove tags
-        work = re.sub(self._TAG_REGEX, "", work)
+        work = self._TAG_REGEX.sub("", work)
         # collapse extra spaces
         work = re.sub(r"\s+", " ", work).strip()
         return work
 
+    def tokenize(self, work: str) -> tuple[str, float | None, set[str]]:
+        """
+        Extracts the duration and the tags of the work string and cleans it,
+        in a single scan. Same as clean_work, parse_duration and parse_tags.
+        """
+        duration = None
+        duration_found = False
+        tags = set()
+        pieces = []
+        position = 0
+        tag_end = -1
+        for match in self._TOKEN_REGEX.finditer(work):
+            start, end = match.span()
+            tag = match[3]
+            if tag is not None:
+                tags.add(tag)
+                tag_end = end
+            elif not duration_found:
+                # clean_work removes tags after the duration, so text on both sides
+                # of it can join into another tag, e.g. "#a[1h]b". Rare enough to
+                # leave to the separate passes.
+                if (tag_end == start or work[start - 1 : start] == "#") and (
+                    self._TAG_CHAR_REGEX.match(work, end)
+                ):
+                    return self.clean_work(work), self.parse_duration(work), self.parse_tags(work)
+                duration = self._to_minutes(match[1], match[2])
+                duration_found = True
+            else:
+                # only the first duration is removed
+                continue
+            pieces.append(work[position:start])
+            position = end
+        pieces.append(work[position:])
+        return " ".join("".join(pieces).split()), duration, tags
+
     def parse(self, work_desc: str) -> tuple[str, datetime, float | None, set[str]]:
         if self._WORK_DATE_SEPARATOR in work_desc:
             work, _, date_time = work_desc.rpartition(self._WORK_DATE_SEPARATOR)
         else:
             work, date_time = work_desc, ""
 
-        work = work.strip()
         dt = self.parse_datetime(date_time.strip())
-        duration = self.parse_duration(work)
-        tags = self.parse_tags(work)
-        work = self.clean_work(work)
+        work, duration, tags = self.tokenize(work)
         if not work:
             raise InvalidWorkError
 
         return work, dt, duration, tags
+
+    def parse_input(
+        self, work: tuple[str, ...], tags_opt: tuple[str, ...], duration_opt: str
+    ) -> tuple[str, datetime, float | None, set[str]]:
+        """
+        Parses the work from the command line, with the tags and the
+        duration given by its options. Tags are lowercased, and a valid
+        duration option overrides the one in the work.
+        """
+        work_text, dt, duration, tags = self.parse(" ".join(work).strip())
+        tags = {tag.lower() for tag in (*tags, *tags_opt)}
+        if duration_opt:
+            minutes = self.parse_duration(f"[{duration_opt.strip()}]")
+            if minutes is not None:
+                duration = minutes
+        return work_text, dt, duration, tags
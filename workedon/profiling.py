@@ -0,0 +1,263 @@
+"""
+Timings of a command, to see where the time goes when it is slow.
+
+Set WORKEDON_PROFILE to 1 to print them on stderr once the command is done,
+or to the path of a file to write them to as JSON, to attach to an issue.
+They have the wall time of each phase of the command, and every SQL
+statement it executed, with its duration and number of rows. Parameters of
+statements are left out, as they are the user's work. Set
+WORKEDON_PROFILE_STATS to a path as well to write cProfile stats there,
+for pstats or snakeviz.
+
+Profiled commands run in-process, never in the daemon, so that importing
+and loading the settings are part of what is timed.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+import contextlib
+import os
+import sys
+import time
+from typing import Any
+
+PROFILE_VARIABLE = "WORKEDON_PROFILE"
+STATS_VARIABLE = "WORKEDON_PROFILE_STATS"
+
+
+class Profile:
+    """
+    Phases and SQL statements of a command, as they are timed.
+    """
+
+    def __init__(self) -> None:
+        self.start: float = time.perf_counter()
+        self.end: float | None = None
+        self.phases: list[dict[str, Any]] = []
+        self.statements: list[dict[str, Any]] = []
+        # names of the phases being timed, outermost first
+        self._stack: list[str] = []
+        # the phases by their names and those of the phases they are in
+        self._phases_by_path: dict[tuple[str, ...], dict[str, Any]] = {}
+
+    def ms_since_start(self, when: float) -> float:
+        return round((when - self.start) * 1000, 3)
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        # a phase run again, like one per batch of rows, adds up in one record
+        path = (*self._stack, name)
+        record = self._phases_by_path.get(path)
+        start = time.perf_counter()
+        if record is None:
+            record = {
+                "name": name,
+                "depth": len(self._stack),
+                "start_ms": self.ms_since_start(start),
+                "ms": 0.0,
+                "calls": 0,
+            }
+            self.phases.append(record)
+            self._phases_by_path[path] = record
+        record["calls"] += 1
+        self._stack.append(name)
+        try:
+            yield
+        finally:
+            record["ms"] = round(record["ms"] + (time.perf_counter() - start) * 1000, 3)
+            self._stack.pop()
+
+    def statement(self, sql: str) -> dict[str, Any]:
+        record = {
+            "sql": sql,
+            "phase": self._stack[-1] if self._stack else None,
+            "ms": 0.0,
+            "rows": None,
+        }
+        self.statements.append(record)
+        return record
+
+    def to_dict(self) -> dict[str, Any]:
+        import platform
+        import sqlite3
+
+        from ._version import __version__
+
+        end = self.end if self.end is not None else time.perf_counter()
+        return {
+            "argv": sys.argv[1:],
+            "version": __version__,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "total_ms": self.ms_since_start(end),
+            "phases": self.phases,
+            "statements": [
+                {**statement, "ms": round(statement["ms"], 3)} for statement in self.statements
+            ],
+        }
+
+
+# The profile of the running command, if it is profiled.
+_profile: Profile | None = None
+
+
+class _TracedCursor:
+    """
+    A cursor that adds the time spent fetching rows to the duration
+    of its statement, and counts them. SQLite finds the rows of a query as
+    they are fetched, so executing it alone can take next to no time.
+    """
+
+    def __init__(self, cursor: Any, record: dict[str, Any]) -> None:
+        self._cursor = cursor
+        self._record = record
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+    def _fetched(self, start: float, count: int) -> None:
+        self._record["ms"] += (time.perf_counter() - start) * 1000
+        self._record["rows"] = (self._record["rows"] or 0) + count
+
+    def fetchone(self) -> Any:
+        start = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._fetched(start, row is not None)
+        return row
+
+    def fetchmany(self, *args: Any) -> list[Any]:
+        start = time.perf_counter()
+        rows = self._cursor.fetchmany(*args)
+        self._fetched(start, len(rows))
+        return rows
+
+    def fetchall(self) -> list[Any]:
+        start = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._fetched(start, len(rows))
+        return rows
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.fetchone, None)
+
+
+def phase(name: str) -> contextlib.AbstractContextManager[None]:
+    """
+    Time a phase of the command, if it is profiled.
+    """
+    if _profile is None:
+        return contextlib.nullcontext()
+    return _profile.phase(name)
+
+
+def trace_queries(database: Any) -> None:
+    """
+    Record every statement the (peewee) database executes, including those
+    executed once per row with its execute_many, if the command is profiled.
+    """
+    if _profile is None or getattr(database, "_traced", False):
+        return
+    profile = _profile
+    execute_sql = database.execute_sql
+
+    def traced_execute_sql(sql: str, params: Any = None) -> Any:
+        record = profile.statement(sql)
+        start = time.perf_counter()
+        try:
+            cursor = execute_sql(sql, params)
+        finally:
+            record["ms"] += (time.perf_counter() - start) * 1000
+        if cursor.description is None:
+            # not a query: the rows it changed, if any
+            record["rows"] = cursor.rowcount if cursor.rowcount >= 0 else None
+            return cursor
+        record["rows"] = 0
+        return _TracedCursor(cursor, record)
+
+    database.execute_sql = traced_execute_sql
+
+    execute_many = getattr(database, "execute_many", None)
+    if execute_many is not None:
+
+        def traced_execute_many(sql: str, seq_of_params: Any) -> Any:
+            record = profile.statement(sql)
+            start = time.perf_counter()
+            try:
+                cursor = execute_many(sql, seq_of_params)
+            finally:
+                record["ms"] += (time.perf_counter() - start) * 1000
+            # the rows inserted, over every set of parameters
+            record["rows"] = cursor.rowcount if cursor.rowcount >= 0 else None
+            return cursor
+
+        database.execute_many = traced_execute_many
+    database._traced = True
+
+
+def _print_report(data: dict[str, Any]) -> None:
+    out = sys.stderr
+    out.write(f"\nProfile of `wo {' '.join(data['argv'])}`: {data['total_ms']:.2f} ms\n")
+    for record in data["phases"]:
+        name = "  " * record["depth"] + record["name"]
+        if record["calls"] > 1:
+            name += f" (x{record['calls']})"
+        out.write(f"  {name:<30} {record['ms']:10.2f} ms\n")
+    statements = data["statements"]
+    total = sum(statement["ms"] for statement in statements)
+    out.write(f"\n{len(statements)} SQL statement(s): {total:.2f} ms\n")
+    for statement in statements:
+        rows = "" if statement["rows"] is None else statement["rows"]
+        sql = " ".join(statement["sql"].split())
+        if len(sql) > 100:
+            sql = f"{sql[:97]}..."
+        out.write(f"  {statement['ms']:8.2f} ms {rows:>7} {statement['phase'] or '':<10} {sql}\n")
+
+
+def _write_report(profile: Profile, destination: str) -> None:
+    data = profile.to_dict()
+    if destination == "1":
+        _print_report(data)
+        return
+    import json
+
+    try:
+        with open(destination, "w", encoding="utf-8") as file:
+            json.dump(data, file, indent=2)
+            file.write("\n")
+    except OSError as e:
+        sys.stderr.write(f"Unable to write the profile to {destination}: {e}\n")
+
+
+@contextlib.contextmanager
+def profiled() -> Iterator[None]:
+    """
+    Profile the command run within, if WORKEDON_PROFILE is set, and report
+    on it when it is done, even if it failed or exited.
+    """
+    global _profile
+    destination = os.environ.get(PROFILE_VARIABLE)
+    if not destination:
+        yield
+        return
+    _profile = profile = Profile()
+    stats_path = os.environ.get(STATS_VARIABLE)
+    profiler = None
+    if stats_path:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield
+    finally:
+        profile.end = time.perf_counter()
+        _profile = None
+        if profiler is not None:
+            profiler.disable()
+            try:
+                profiler.dump_stats(stats_path)
+            except OSError as e:
+                sys.stderr.write(f"Unable to write the profile stats to {stats_path}: {e}\n")
+        _write_report(profile, destination)
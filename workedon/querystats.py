@@ -0,0 +1,192 @@
+"""
+Statistics of the SQL statements run on the database, kept across commands.
+
+Statements are grouped by shape, their SQL with the literals and lists of
+values replaced, and each shape keeps how many times it ran, for how long in
+all and at most, and a histogram of its durations, for percentiles. They are
+kept in memory by a command, then added to a file next to the database
+when it is closed, if DB_STATS is on. Statements slower than DB_SLOW_QUERY_MS
+are logged to a file there as they run, which is rotated once it gets too big.
+
+Only the time SQLite takes to execute a statement, up to its first row, is
+counted, not that of fetching the rest, so that it costs nothing per row. A
+query that has to sort or group its rows does all of it before returning the
+first one, which is what changes when a query plan regresses.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+import datetime
+import functools
+import math
+import os
+from pathlib import Path
+import re
+import sys
+import time
+from typing import Any
+
+from .conf import DB_PATH, settings
+from .constants import SLOW_LOG_MAX_BYTES
+
+STATS_PATH: Path = DB_PATH.with_name(f"{DB_PATH.name}-stats.json")
+SLOW_LOG_PATH: Path = DB_PATH.with_name(f"{DB_PATH.name}-slow.log")
+
+# durations are put in buckets a quarter of a power of 2 of microseconds
+# wide, so percentiles are within 19% of the actual ones
+_BUCKETS_PER_DOUBLING = 4
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r"\?(?:, \?)+")
+_ROWS = re.compile(r"(\([^()]*\))(?:, \1)+")
+
+# durations of the statements run since the stats were last saved, by shape
+_pending: dict[str, list[float]] = {}
+
+
+@functools.lru_cache(maxsize=256)
+def statement_shape(sql: str) -> str:
+    """
+    The SQL of a statement without its literals, and with lists of values,
+    and rows of them, shortened, so that the statements a query builds for
+    different values are counted together.
+    """
+    shape = _LITERALS.sub("?", " ".join(sql.split()))
+    shape = _PLACEHOLDER_LISTS.sub("?, ...", shape)
+    return _ROWS.sub(r"\1, ...", shape)
+
+
+def _enabled() -> bool:
+    return bool(settings.DB_STATS)
+
+
+def _log_slow_statement(sql: str, elapsed_ms: float) -> None:
+    """
+    Append a statement to the slow statement log, after rotating it if it
+    has grown too big. Its parameters are left out.
+    """
+    when = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+    # the daemon sets it to that of the command it runs
+    command = " ".join(["wo", *sys.argv[1:]])
+    line = f"{when}  {elapsed_ms:.2f} ms  {command}  {' '.join(sql.split())}\n"
+    try:
+        if SLOW_LOG_PATH.stat().st_size + len(line) > SLOW_LOG_MAX_BYTES:
+            SLOW_LOG_PATH.replace(SLOW_LOG_PATH.with_name(f"{SLOW_LOG_PATH.name}.1"))
+    except OSError:
+        pass
+    try:
+        with SLOW_LOG_PATH.open("a", encoding="utf-8") as log:
+            log.write(line)
+    except OSError:
+        pass
+
+
+def _timed(execute: Callable[[str, Any], Any]) -> Callable[[str, Any], Any]:
+    def timed_execute(sql: str, params: Any = None) -> Any:
+        keep_stats = _enabled()
+        threshold = settings.DB_SLOW_QUERY_MS
+        if not keep_stats and not threshold:
+            return execute(sql, params)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if keep_stats:
+                _pending.setdefault(statement_shape(sql), []).append(elapsed_ms)
+            if threshold and elapsed_ms >= float(threshold):
+                _log_slow_statement(sql, elapsed_ms)
+
+    return timed_execute
+
+
+def trace_statements(database: Any) -> None:
+    """
+    Time every statement the (peewee) database executes, for the stats,
+    including those executed once per row with its execute_many, if it has one.
+    """
+    if getattr(database, "_timed", False):
+        return
+    database.execute_sql = _timed(database.execute_sql)
+    if hasattr(database, "execute_many"):
+        database.execute_many = _timed(database.execute_many)
+    database._timed = True
+
+
+def load_stats() -> dict[str, Any]:
+    """
+    The saved stats: when they were first saved, in epoch seconds, and by
+    statement shape, the number of runs, their total and maximum duration
+    and the histogram of their durations.
+    """
+    import json
+
+    try:
+        with STATS_PATH.open(encoding="utf-8") as file:
+            stats: dict[str, Any] = json.load(file)
+    except (OSError, ValueError):
+        return {"since": None, "statements": {}}
+    return stats
+
+
+def _bucket(elapsed_ms: float) -> int:
+    microseconds = elapsed_ms * 1000
+    return math.floor(_BUCKETS_PER_DOUBLING * math.log2(microseconds)) if microseconds > 1 else 0
+
+
+def save_stats() -> None:
+    """
+    Add the durations of the statements run since the last call to the
+    saved stats. Commands run at the same time may lose each other's.
+    """
+    if not _pending:
+        return
+    import json
+
+    stats = load_stats()
+    stats["since"] = stats["since"] or int(time.time())
+    for shape, durations in _pending.items():
+        entry = stats["statements"].setdefault(
+            shape, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "buckets": {}}
+        )
+        entry["count"] += len(durations)
+        entry["total_ms"] += sum(durations)
+        entry["max_ms"] = max(entry["max_ms"], *durations)
+        for elapsed_ms in durations:
+            bucket = str(_bucket(elapsed_ms))
+            entry["buckets"][bucket] = entry["buckets"].get(bucket, 0) + 1
+    _pending.clear()
+    # written whole, then moved in place, so a reader never sees half of it
+    partial = STATS_PATH.with_name(f"{STATS_PATH.name}.{os.getpid()}")
+    try:
+        with partial.open("w", encoding="utf-8") as file:
+            json.dump(stats, file)
+        partial.replace(STATS_PATH)
+    except OSError:
+        pass
+
+
+def percentile(entry: dict[str, Any], fraction: float) -> float:
+    """
+    The duration, in ms, the given fraction of the runs of a statement took at
+    most, as the upper bound of its bucket, so never more than the maximum.
+    """
+    rank = math.ceil(entry["count"] * fraction)
+    seen = 0
+    for bucket, count in sorted((int(bucket), count) for bucket, count in entry["buckets"].items()):
+        seen += count
+        if seen >= rank:
+            return min(2 ** ((bucket + 1) / _BUCKETS_PER_DOUBLING) / 1000, entry["max_ms"])
+    return float(entry["max_ms"])
+
+
+def slow_statements() -> Iterator[str]:
+    """
+    The entries of the slow statement log, oldest first.
+    """
+    try:
+        with SLOW_LOG_PATH.open(encoding="utf-8") as log:
+            yield from log
+    except OSError:
+        return
@@ -0,0 +1,81 @@
+"""Rendering of work entries for display."""
+
+from __future__ import annotations
+
+from datetime import datetime
+import zoneinfo
+
+import click
+
+from .conf import settings
+
+_HOUR_UNITS: frozenset[str] = frozenset({"h", "hr", "hrs", "hours"})
+
+
+def _style(**styles: bool | str) -> tuple[str, str]:
+    """
+    The escape codes click.style puts before and after a text.
+    """
+    before, after = click.style("\0", **styles).split("\0")  # type: ignore[arg-type]
+    return before, after
+
+
+class WorkRenderer:
+    """
+    Formats work entries for display, in a git log like structure.
+    The settings are resolved once, so a renderer is meant to be
+    built per command and used for every row.
+    """
+
+    def __init__(self) -> None:
+        self.tz = zoneinfo.ZoneInfo(settings.TIME_ZONE)
+        self.datetime_format = (
+            settings.DATETIME_FORMAT or f"{settings.DATE_FORMAT} {settings.TIME_FORMAT}"
+        )
+        self.duration_unit = settings.DURATION_UNIT
+        self.in_hours = settings.DURATION_UNIT in _HOUR_UNITS
+        self.id_style = _style(fg="green")
+        self.plain_style = _style()
+        self.work_style = _style(bold=True, fg="white")
+
+    def render(
+        self,
+        uuid: str,
+        timestamp: datetime,
+        work: str,
+        duration: float | None,
+        tags: list[str],
+    ) -> str:
+        """
+        Format a work entry.
+        """
+        id_before, id_after = self.id_style
+        before, after = self.plain_style
+        work_before, work_after = self.work_style
+        timestamp_str = timestamp.astimezone(self.tz).strftime(self.datetime_format)
+        tags_str = f"Tags: {', '.join(tags)}\n" if tags else ""
+        duration_str = (
+            f"Duration: {self.render_duration(duration)}\n" if duration is not None else ""
+        )
+        return (
+            f"{id_before}id: {uuid}{id_after}\n"
+            f"{before}Date: {timestamp_str}{after}\n"
+            f"{before}{tags_str}{after}"
+            f"{before}{duration_str}{after}"
+            f"\n\t{work_before}{work}{work_after}\n\n"
+        )
+
+    def render_duration(self, minutes: float) -> str:
+        """
+        Format a duration in minutes in the unit of the settings.
+        """
+        if self.in_hours:
+            minutes = round(minutes / 60, 2)
+        return f"{minutes} {self.duration_unit}"
+
+    def render_text(self, work: str) -> str:
+        """
+        Format the text of a work entry only.
+        """
+        work_before, work_after = self.work_style
+        return f"{work_before}* {work}{work_after}\n"
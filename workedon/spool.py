@@ -0,0 +1,126 @@
+"""
+Write-behind saving of work, with the WRITE_BEHIND setting.
+
+`wo <text>` parses the work as usual, but instead of opening the database
+it appends the entry to a journal next to it, one JSON line per entry, and
+syncs it to disk before returning. The journal is drained into the database
+by whatever opens it next (see models.init_db): the daemon right after
+the command, if it is running, otherwise the next command, so `wo what`
+always sees spooled work. `wo --flush-spool` drains it on demand.
+
+Writers and the drain hold an exclusive lock on the journal, so an entry is
+never appended while it is being emptied. Entries keep their id, so one
+saved again after a drain that was interrupted before emptying the journal
+is skipped. Locking needs fcntl, so saving is never deferred on Windows.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+import contextlib
+import json
+import os
+import sys
+from typing import Any
+
+import click
+
+from .conf import DB_PATH, settings
+from .exceptions import CannotSaveWorkError
+from .parser import InputParser
+from .renderer import WorkRenderer
+from .utils import get_default_time, get_unique_hash, to_internal_dt
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+SPOOL_PATH = DB_PATH.with_name(f"{DB_PATH.name}-spool.jsonl")
+
+
+def is_enabled() -> bool:
+    return bool(settings.WRITE_BEHIND) and fcntl is not None
+
+
+def is_pending() -> bool:
+    """
+    Whether there are spooled entries, without locking the journal.
+    """
+    if fcntl is None:
+        return False
+    try:
+        return SPOOL_PATH.stat().st_size > 0
+    except OSError:
+        return False
+
+
+def _append(record: dict[str, Any]) -> None:
+    line = (json.dumps(record) + "\n").encode()
+    SPOOL_PATH.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(SPOOL_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        os.write(fd, line)
+        os.fsync(fd)
+    finally:
+        # which also releases the lock
+        os.close(fd)
+
+
+def spool_work(work: tuple[str, ...], tags_opt: tuple[str, ...], duration_opt: str) -> None:
+    """
+    Save work from user input to the journal, like save_work does to the database.
+    """
+    work_text, dt, duration, tags = InputParser().parse_input(work, tags_opt, duration_opt)
+    timestamp = to_internal_dt(dt)
+    record = {
+        "id": get_unique_hash(),
+        "work": work_text,
+        "timestamp": int(timestamp.timestamp()),
+        "duration": duration,
+        "tags": sorted(tags),
+        "created": int(get_default_time().timestamp()),
+    }
+    try:
+        _append(record)
+    except OSError as e:
+        raise CannotSaveWorkError(extra_detail=str(e)) from e
+    click.echo("Work saved.\n")
+    click.echo(
+        WorkRenderer().render(record["id"], timestamp, work_text, duration, record["tags"]),
+        nl=False,
+    )
+
+
+def _records(lines: Iterable[bytes]) -> Iterator[dict[str, Any]]:
+    for line in lines:
+        try:
+            yield json.loads(line)
+        except ValueError:
+            # only the last line can be cut short, by a crash while it was
+            # written, and then it was never reported as saved
+            sys.stderr.write("Skipped an incomplete entry in the write-behind journal.\n")
+
+
+@contextlib.contextmanager
+def draining() -> Iterator[list[dict[str, Any]]]:
+    """
+    Lock the journal and give its entries, oldest first. It is emptied
+    once the block is done, and left as it is if the block fails.
+    """
+    try:
+        fd = os.open(SPOOL_PATH, os.O_RDWR)
+    except FileNotFoundError:
+        yield []
+        return
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        chunks = []
+        while chunk := os.read(fd, 1 << 16):
+            chunks.append(chunk)
+        yield list(_records(line for line in b"".join(chunks).splitlines() if line.strip()))
+        os.ftruncate(fd, 0)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -1,6 +1,7 @@
 from collections.abc import Callable
 from datetime import datetime
 from functools import wraps
+import itertools
 from typing import Any
 import uuid
 import zoneinfo
@@ -8,6 +9,7 @@ import zoneinfo
 import click
 
 from .conf import settings
+from .profiling import phase
 
 
 def get_unique_hash() -> str:
@@ -41,6 +43,35 @@ def get_default_time() -> datetime:
     return to_internal_dt(now())
 
 
+def utc_offsets(time_zone: str, start: int, end: int, step: int = 86400) -> list[tuple[int, int]]:
+    """
+    UTC offsets of a timezone between two epoch times, as
+    (epoch time it applies from, offset in seconds), oldest first.
+    Offsets are compared `step` seconds apart and changes are bisected
+    in between, so two changes within a step would be missed.
+    """
+    tz = zoneinfo.ZoneInfo(time_zone)
+
+    def offset(seconds: int) -> int:
+        utcoffset = datetime.fromtimestamp(seconds, tz).utcoffset()
+        return int(utcoffset.total_seconds()) if utcoffset else 0
+
+    offsets = [(start, offset(start))]
+    previous = start
+    for seconds in itertools.chain(range(start + step, end, step), [end]):
+        if offset(seconds) != offsets[-1][1]:
+            low, high = previous, seconds
+            while high - low > 1:
+                middle = (low + high) // 2
+                if offset(middle) == offsets[-1][1]:
+                    low = middle
+                else:
+                    high = middle
+            offsets.append((high, offset(high)))
+        previous = seconds
+    return offsets
+
+
 def load_settings(func: Callable[..., Any]) -> Callable[..., Any]:
     """
     Decorator that loads settings before a Click command is run.
@@ -55,9 +86,13 @@ def load_settings(func: Callable[..., Any]) -> Callable[..., Any]:
             for key, value in kwargs.items():
                 if key.isupper() and value:
                     user_settings[key] = value
-            _settings.configure(user_settings=user_settings)
+            with phase("settings"):
+                _settings.configure(user_settings=user_settings)
 
             return func(*args, **kwargs)
+        except click.ClickException:
+            # e.g. usage errors, shown with the usage of the command
+            raise
         except Exception as e:
             raise click.ClickException(click.style(str(e), fg="bright_red")) from e
 
@@ -2,42 +2,67 @@
 
 from __future__ import annotations
 
-from collections.abc import Iterator
+from collections.abc import Callable, Iterator
+import contextlib
+import csv
 import datetime
+import functools
+import itertools
+import json
 import operator as op
+from pathlib import Path
 import re
-from typing import Any
+from typing import IO, Any
+import zoneinfo
 
 import click
-from peewee import ModelSelect, chunked, prefetch
+from peewee import JOIN, Case, Entity, ModelSelect, SqliteDatabase, chunked, fn
 
-from .constants import WORK_CHUNK_SIZE
+from .conf import settings
+from .constants import DELETE_BATCH_SIZE
 from .exceptions import (
+    CannotExportWorkError,
     CannotFetchWorkError,
+    CannotImportWorkError,
     CannotSaveWorkError,
+    DateTimeInFutureError,
+    InvalidDurationError,
+    InvalidWorkError,
     StartDateAbsentError,
     StartDateGreaterError,
 )
-from .models import Tag, Work, WorkTag, init_db
+from .models import (
+    ROLLUP_ALL,
+    DailyRollup,
+    Tag,
+    Work,
+    WorkIndex,
+    WorkTag,
+    add_tags,
+    delete_unused_tags,
+    delete_work,
+    existing_uuids,
+    get_rollup_time_zone,
+    init_db,
+    insert_rows,
+    tags_by_work_id,
+)
 from .parser import InputParser
-from .utils import now, to_internal_dt
+from .profiling import phase
+from .querystats import SLOW_LOG_PATH, load_stats, percentile, slow_statements
+from .renderer import WorkRenderer
+from .utils import get_default_time, get_unique_hash, now, to_internal_dt, utc_offsets
+
+# joins tag names in a single column (a control character, unlikely in a tag)
+_TAG_SEPARATOR = "\x1f"
 
 
 def save_work(work: tuple[str, ...], tags_opt: tuple[str, ...], duration_opt: str) -> None:
     """
     Save work from user input
     """
-    work_desc = " ".join(work).strip()
-    parser = InputParser()
-    work_text, dt, duration, tags = parser.parse(work_desc)
-    if tags_opt:
-        tags.update(set(tags_opt))
-    tags = {tag.lower() for tag in tags}
-
-    if duration_opt:
-        minutes = parser.parse_duration(f"[{duration_opt.strip()}]")
-        if minutes is not None:
-            duration = minutes
+    with phase("parse"):
+        work_text, dt, duration, tags = InputParser().parse_input(work, tags_opt, duration_opt)
 
     data: dict[str, Any] = {
         "work": work_text,
@@ -46,49 +71,276 @@ def save_work(work: tuple[str, ...], tags_opt: tuple[str, ...], duration_opt: st
     }
     try:
         with init_db() as db:
-            with db.atomic():
+            with phase("save"), db.atomic():
                 work_obj = Work.create(**data)
-                for tag in tags:
-                    tag_obj, _ = Tag.get_or_create(name=tag)
-                    WorkTag.create(work=work_obj.uuid, tag=tag_obj.uuid)
-            click.echo("Work saved.\n")
-            click.echo(work_obj, nl=False)
+                add_tags({work_obj.id: tags})
+            with phase("render"):
+                click.echo("Work saved.\n")
+                # from what was just saved, rather than read back
+                click.echo(
+                    WorkRenderer().render(
+                        work_obj.uuid, data["timestamp"], work_text, duration, sorted(tags)
+                    ),
+                    nl=False,
+                )
     except Exception as e:
         raise CannotSaveWorkError(extra_detail=str(e)) from e
 
 
-def _generate_work(result: Iterator[Work]) -> Iterator[str]:
+@contextlib.contextmanager
+def _open_import_file(path: str) -> Iterator[IO[str]]:
     """
-    Fetch work in chunks, loop and yield lines of text.
+    Open the file to import, "-" being stdin.
     """
-    for work_set in chunked(result, WORK_CHUNK_SIZE):
-        for work in work_set:
-            yield str(work)
+    if path == "-":
+        yield click.get_text_stream("stdin")
+    else:
+        with Path(path).open(encoding="utf-8", newline="") as file:
+            yield file
 
 
-def chunked_prefetch_generator(
-    work_set: ModelSelect,
-    fields: list[Any],
-    text_only: bool,
-) -> Iterator[str]:
+def _read_records(file: IO[str], file_format: str) -> Iterator[dict[str, Any]]:
     """
-    Fetch work in chunks and prefetch tags to avoid N+1 queries.
+    Stream records from a JSONL or CSV file, one at a time.
     """
-    for chunk in chunked(work_set.iterator(), WORK_CHUNK_SIZE):
-        if text_only:
-            for work in chunk:
-                yield str(work)
-        else:
-            # This re-queries the chunk to attach tags, plus prefetch issues
-            # additional queries for WorkTag and Tag to avoid N+1 lookups.
-            chunk_uuids = [work.uuid for work in chunk]
-            chunk_query = Work.select(*fields).where(Work.uuid.in_(chunk_uuids))
-            chunk_with_tags = prefetch(chunk_query, WorkTag, Tag)
-            work_dict = {work.uuid: work for work in chunk_with_tags}
-            for uuid in chunk_uuids:
-                work = work_dict.get(uuid)
-                if work is not None:
-                    yield str(work)
+    if file_format == "csv":
+        yield from csv.DictReader(file)
+        return
+    for number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            raise CannotImportWorkError(extra_detail=f"line {number}: {e}") from e
+
+
+def _import_datetime(value: Any, parser: InputParser) -> datetime.datetime:
+    """
+    Convert the timestamp of an imported record.
+    Accepts epoch seconds, ISO 8601 strings (naive ones are in the
+    user's timezone) and anything else that `wo ... @ <date>` accepts.
+    """
+    if value is None or value == "":
+        return now()
+    if isinstance(value, (int, float)):
+        return datetime.datetime.fromtimestamp(value, tz=datetime.timezone.utc)
+    try:
+        dt = datetime.datetime.fromisoformat(str(value).strip())
+    except ValueError:
+        return parser.parse_datetime(str(value))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=zoneinfo.ZoneInfo(settings.TIME_ZONE))
+    if dt > now():
+        raise DateTimeInFutureError
+    return dt
+
+
+def _import_tags(value: Any) -> set[str]:
+    """
+    Tags of an imported record, as a list or a comma/space separated string.
+    """
+    if not value:
+        return set()
+    names = value if isinstance(value, list) else re.split(r"[,\s]+", str(value))
+    return {str(name).strip().lstrip("#").lower() for name in names} - {""}
+
+
+def _import_row(
+    record: dict[str, Any],
+    parser: InputParser,
+    parse_timestamp: Callable[[Any], datetime.datetime],
+) -> tuple[tuple[Any, ...], set[str]]:
+    """
+    Turn an imported record into a Work row and its tags.
+    Tags and duration in the text itself are handled like in `save_work`.
+    """
+    text = str(record.get("work") or "")
+    text, duration, tags = parser.tokenize(text)
+    tags = {tag.lower() for tag in tags} | _import_tags(record.get("tags"))
+    if not text:
+        raise InvalidWorkError
+    duration_value = record.get("duration")
+    if isinstance(duration_value, (int, float)):
+        duration = float(duration_value)
+    elif duration_value:
+        try:
+            duration = float(duration_value)
+        except ValueError:
+            duration = parser.parse_duration(f"[{str(duration_value).strip()}]")
+            if duration is None:
+                raise InvalidDurationError(extra_detail=str(duration_value)) from None
+    timestamp_value = record.get("timestamp")
+    if isinstance(timestamp_value, str):
+        timestamp = parse_timestamp(timestamp_value)
+    else:
+        timestamp = to_internal_dt(_import_datetime(timestamp_value, parser))
+    work_id = str(record.get("id") or "") or get_unique_hash()
+    return (work_id, text, timestamp, duration), tags
+
+
+def import_work(path: str, file_format: str | None, batch_size: int) -> None:
+    """
+    Import work from a JSONL or CSV file.
+    The file is streamed and saved in batches of `batch_size` entries,
+    each in its own transaction. Entries whose id already exists, in the
+    database or earlier in the file, are skipped, tags included.
+    """
+    if file_format is None:
+        file_format = "csv" if Path(path).suffix.lower() == ".csv" else "jsonl"
+    parser = InputParser()
+    # timestamps repeat a lot in exported logs, and parsing them is the slow part.
+    parse_timestamp = functools.lru_cache(maxsize=4096)(
+        lambda value: to_internal_dt(_import_datetime(value, parser))
+    )
+    created = get_default_time()
+    fields = [Work.uuid, Work.work, Work.timestamp, Work.duration, Work.created]
+    imported = skipped = 0
+    try:
+        with _open_import_file(path) as file, init_db() as db:
+            records = enumerate(_read_records(file, file_format), start=1)
+            batches = iter(chunked(records, batch_size))
+            while True:
+                # the file is read as it is parsed
+                with phase("parse"):
+                    batch = next(batches, [])
+                    parsed = []
+                    for number, record in batch:
+                        try:
+                            parsed.append(_import_row(record, parser, parse_timestamp))
+                        except Exception as e:
+                            raise CannotImportWorkError(extra_detail=f"record {number}: {e}") from e
+                if not batch:
+                    break
+                with phase("save"), db.atomic():
+                    seen = existing_uuids(row[0] for row, _ in parsed)
+                    rows = []
+                    work_tags = {}
+                    for row, tags in parsed:
+                        if row[0] in seen:
+                            continue
+                        seen.add(row[0])
+                        rows.append((*row, created))
+                        if tags:
+                            work_tags[row[0]] = tags
+                    insert_rows(Work, fields, rows)
+                    add_tags(tags_by_work_id(work_tags))
+                imported += len(rows)
+                skipped += len(parsed) - len(rows)
+                click.echo(f"{imported} log(s) imported...", err=True)
+    except CannotImportWorkError:
+        raise
+    except Exception as e:
+        raise CannotImportWorkError(extra_detail=str(e)) from e
+    click.echo(f"{imported} log(s) imported successfully.")
+    if skipped:
+        click.echo(f"{skipped} log(s) skipped, their ids were already saved.")
+
+
+def _tag_names() -> Any:
+    """
+    Correlated subquery of a work's tag names, joined by _TAG_SEPARATOR.
+    It is evaluated per row using the work_tag index, so the outer
+    query streams without grouping (or sorting) the whole result set.
+    """
+    return (
+        Tag.select(fn.GROUP_CONCAT(Tag.name, _TAG_SEPARATOR))
+        .join(WorkTag)
+        .where(WorkTag.work == Work.id)
+    )
+
+
+def _split_tags(names: str | None) -> list[str]:
+    """
+    Sorted tag names from the result of `_tag_names`.
+    """
+    return sorted(names.split(_TAG_SEPARATOR)) if names else []
+
+
+def export_work(
+    path: str,
+    file_format: str | None,
+    count: int | None,
+    work_id: str,
+    start_date: str,
+    end_date: str,
+    since: str,
+    period: str | None,
+    on: str | None,
+    at: str | None,
+    reverse: bool,
+    tags: tuple[str, ...],
+    duration: str,
+    search: str,
+    all_time: bool,
+) -> None:
+    """
+    Export work filtered based on user input to a JSONL or CSV file.
+    Rows are streamed from the database and written as they are read,
+    in the format `import_work` accepts.
+    """
+    if file_format is None:
+        file_format = "csv" if Path(path).suffix.lower() == ".csv" else "jsonl"
+    work_set = _filter_work(
+        Work.select(
+            Work.uuid, Work.work, Work.timestamp, Work.duration, _tag_names().alias("tags")
+        ),
+        count,
+        work_id,
+        start_date,
+        end_date,
+        since,
+        period,
+        on,
+        at,
+        reverse,
+        tags,
+        duration,
+        search,
+        all_time,
+    )
+    exported = 0
+    try:
+        with init_db(), click.open_file(path, "w", encoding="utf-8", atomic=True) as file:
+            if file_format == "csv":
+                writer = csv.writer(file, lineterminator="\n")
+                writer.writerow(("id", "work", "timestamp", "duration", "tags"))
+                for uuid, work, timestamp, minutes, names in work_set.tuples().iterator():
+                    writer.writerow(
+                        [uuid, work, timestamp.isoformat(), minutes, ",".join(_split_tags(names))]
+                    )
+                    exported += 1
+            else:
+                for uuid, work, timestamp, minutes, names in work_set.tuples().iterator():
+                    record = {
+                        "id": uuid,
+                        "work": work,
+                        "timestamp": timestamp.isoformat(),
+                        "duration": minutes,
+                        "tags": _split_tags(names),
+                    }
+                    file.write(json.dumps(record, ensure_ascii=False))
+                    file.write("\n")
+                    exported += 1
+    except Exception as e:
+        raise CannotExportWorkError(extra_detail=str(e)) from e
+    click.echo(f"{exported} log(s) exported successfully.", err=True)
+
+
+def _generate_work(work_set: ModelSelect, text_only: bool) -> Iterator[str]:
+    """
+    Stream work from a single query and yield it formatted for display.
+    Tags are fetched along with each row (see `_tag_names`), and rows are
+    rendered from plain tuples rather than model instances.
+    """
+    renderer = WorkRenderer()
+    if text_only:
+        for (work,) in work_set.tuples().iterator():
+            yield renderer.render_text(work)
+        return
+    rows = work_set.select_extend(_tag_names().alias("tags")).tuples().iterator()
+    for uuid, timestamp, work, duration, names in rows:
+        yield renderer.render(uuid, timestamp, work, duration, _split_tags(names))
 
 
 def _get_date_range(
@@ -141,6 +393,74 @@ def _get_date_range(
     return to_internal_dt(start), to_internal_dt(end)
 
 
+def _filter_work(
+    work_set: ModelSelect,
+    count: int | None,
+    work_id: str,
+    start_date: str,
+    end_date: str,
+    since: str,
+    period: str | None,
+    on: str | None,
+    at: str | None,
+    reverse: bool,
+    tags: tuple[str, ...],
+    duration: str,
+    search: str = "",
+    all_time: bool = False,
+) -> ModelSelect:
+    """
+    Apply the user's filters, ordering and limit to a work query
+    """
+    if work_id:  # id
+        return work_set.where(Work.uuid == work_id)
+    # full-text search
+    if search:
+        work_set = work_set.join(WorkIndex, on=(WorkIndex.rowid == Work.id)).where(
+            WorkIndex.match(search)
+        )
+    # tag
+    if tags:
+        normalized = [t.lower() for t in tags]
+        tag_ids = Tag.select(Tag.id).where(Tag.name.in_(normalized))
+        work_ids = WorkTag.select(WorkTag.work).where(WorkTag.tag.in_(tag_ids))
+        work_set = work_set.where(Work.id.in_(work_ids))
+    # duration
+    if duration:
+        # Match optional comparison operator and value (e.g., '>=3h', '<= 45min', '2h')
+        match = re.match(r"\s*(==|<=|>=|=|<|>)?\s*(.+)", duration)
+        if not match:
+            raise CannotFetchWorkError(extra_detail="Invalid duration filter")
+        comp_op, dur_str = match.groups()
+        comp_op = comp_op or "="
+        # Map string operator to Python operator
+        op_map = {"=": op.eq, "==": op.eq, ">": op.gt, "<": op.lt, ">=": op.ge, "<=": op.le}
+        if comp_op not in op_map:
+            raise CannotFetchWorkError(extra_detail=f"Invalid duration operator: {comp_op}")
+        minutes = InputParser().parse_duration(f"[{dur_str.strip()}]")
+        if minutes is None:
+            raise CannotFetchWorkError(extra_detail="Invalid duration value")
+        # Work.duration is assumed to be in minutes
+        work_set = work_set.where(op_map[comp_op](Work.duration, minutes))
+    # date range
+    if not all_time:
+        start, end = _get_date_range(start_date, end_date, since, period, on, at)
+        if start and end:
+            work_set = work_set.where((Work.timestamp >= start) & (Work.timestamp <= end))
+    # order, best matches first when searching
+    sort_order = [Work.timestamp.asc() if reverse else Work.timestamp.desc()]
+    if search:
+        rank = WorkIndex.rank()
+        sort_order.insert(0, rank.desc() if reverse else rank.asc())
+    work_set = work_set.order_by(*sort_order)
+    # limit
+    if count is not None:
+        if count == 0:
+            raise CannotFetchWorkError(extra_detail="count must be non-zero")
+        work_set = work_set.limit(count)
+    return work_set
+
+
 def fetch_work(
     count: int | None,
     work_id: str,
@@ -156,92 +476,428 @@ def fetch_work(
     text_only: bool,
     tags: tuple[str, ...],
     duration: str,
+    search: str = "",
+    prune_tags: bool = False,
 ) -> None:
     """
     Fetch saved work filtered based on user input
     """
     # filter fields
     if delete:
-        # Ensure we select UUID for efficient delete-subquery
-        fields = [Work.uuid]
+        # Ensure we select the id for efficient delete-subquery
+        fields = [Work.id]
     else:
         fields = [Work.work] if text_only else [Work.uuid, Work.timestamp, Work.work, Work.duration]
 
-    # initial set
-    work_set = Work.select(*fields)
-    # filters
-    if work_id:  # id
-        work_set = work_set.where(Work.uuid == work_id)
-    else:
-        # tag
-        if tags:
-            normalized = [t.lower() for t in tags]
-            tag_ids = Tag.select(Tag.uuid).where(Tag.name.in_(normalized))
-            work_ids = WorkTag.select(WorkTag.work).where(WorkTag.tag.in_(tag_ids))
-            work_set = work_set.where(Work.uuid.in_(work_ids))
-        # duration
-        if duration:
-            # Match optional comparison operator and value (e.g., '>=3h', '<= 45min', '2h')
-            match = re.match(r"\s*(==|<=|>=|=|<|>)?\s*(.+)", duration)
-            if not match:
-                raise CannotFetchWorkError(extra_detail="Invalid duration filter")
-            comp_op, dur_str = match.groups()
-            comp_op = comp_op or "="
-            # Map string operator to Python operator
-            op_map = {"=": op.eq, "==": op.eq, ">": op.gt, "<": op.lt, ">=": op.ge, "<=": op.le}
-            if comp_op not in op_map:
-                raise CannotFetchWorkError(extra_detail=f"Invalid duration operator: {comp_op}")
-            minutes = InputParser().parse_duration(f"[{dur_str.strip()}]")
-            if minutes is None:
-                raise CannotFetchWorkError(extra_detail="Invalid duration value")
-            # Work.duration is assumed to be in minutes
-            work_set = work_set.where(op_map[comp_op](Work.duration, minutes))
-        # date range
-        start, end = _get_date_range(start_date, end_date, since, period, on, at)
-        if start and end:
-            work_set = work_set.where((Work.timestamp >= start) & (Work.timestamp <= end))
-        # order
-        sort_order = Work.timestamp.asc() if reverse else Work.timestamp.desc()
-        work_set = work_set.order_by(sort_order)
-        # limit
-        if count is not None:
-            if count == 0:
-                raise CannotFetchWorkError(extra_detail="count must be non-zero")
-            work_set = work_set.limit(count)
+    # dates are parsed into the filters here
+    with phase("parse"):
+        work_set = _filter_work(
+            Work.select(*fields),
+            count,
+            work_id,
+            start_date,
+            end_date,
+            since,
+            period,
+            on,
+            at,
+            reverse,
+            tags,
+            duration,
+            search,
+        )
 
     # fetch from db now.
     try:
         with init_db():
-            has_work = work_set.exists()
             if delete:
-                if has_work:
-                    if click.confirm("Continue deleting log(s)?"):
-                        click.echo("Deleting...")
-                        deleted_count = Work.delete().where(Work.uuid.in_(work_set)).execute()
-                        click.echo(f"{deleted_count} log(s) deleted successfully.")
-                else:
+                # the ids are read once, so the batches delete what was confirmed
+                work_ids = [work_id for (work_id,) in work_set.tuples()]
+                if not work_ids:
                     click.echo("Nothing to delete.")
+                elif click.confirm("Continue deleting log(s)?"):
+                    click.echo("Deleting...")
+                    deleted_count = 0
+                    for deleted in delete_work(work_ids, DELETE_BATCH_SIZE):
+                        deleted_count += deleted
+                        click.echo(f"{deleted_count} log(s) deleted...", err=True)
+                    click.echo(f"{deleted_count} log(s) deleted successfully.")
+                    if prune_tags:
+                        click.echo(f"{delete_unused_tags()} unused tag(s) deleted.")
                 return
 
-            if not has_work:
+            # rows are streamed from one query, along with their tags.
+            # Peeking at the first two is enough to pick how to show them,
+            # without separate queries to check for and count the results.
+            gen = _generate_work(work_set, text_only)
+            with phase("query"):
+                first = list(itertools.islice(gen, 2))
+            if not first:
                 click.echo("Nothing to show, slacker.")
                 return
 
-            if no_page or work_set.count() == 1:
-                # Prefetch tags when rendering full work entries.
-                work_result = work_set if text_only else prefetch(work_set, WorkTag, Tag)
-                for work in work_result:
-                    click.echo(work, nl=False)
-            else:
-                # Large result set with pagination - use chunked prefetching
-                # This loads results in chunks, prefetching tags for each chunk
-                # to avoid N+1 queries while keeping memory usage bounded
-                gen = chunked_prefetch_generator(work_set, fields, text_only)
-                click.echo_via_pager(gen)
+            # the rest of the rows are fetched as they are shown
+            with phase("render"):
+                if no_page or len(first) == 1:
+                    for work in itertools.chain(first, gen):
+                        click.echo(work, nl=False)
+                else:
+                    click.echo_via_pager(itertools.chain(first, gen))
+
+    except Exception as e:
+        raise CannotFetchWorkError(extra_detail=str(e)) from e
+
+
+def _local_seconds(timestamp: Any, offsets: list[tuple[int, int]]) -> Any:
+    """
+    SQL expression of epoch seconds moved by the UTC offset of the user's
+    timezone at the time, so that SQLite's date functions give local dates.
+    """
+    (_, first), *changes = offsets
+    if not changes:
+        return timestamp + first
+    # most work is recent, so the latest offsets are checked first
+    whens = [(timestamp >= since, offset) for since, offset in reversed(changes)]
+    return timestamp + Case(None, whens, first)
+
+
+def _report_label(group_by: str, key: str | None) -> str:
+    if group_by == "week" and key:
+        year, week, _ = datetime.date.fromisoformat(key).isocalendar()
+        return f"{year}-W{week:02d}"
+    return key or "(no tag)"
+
+
+def _render_table(rows: list[tuple[str, ...]]) -> Iterator[str]:
+    """
+    Align the columns of a table, the first one to the left, the others to the right.
+    """
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    for row in rows:
+        cells = [row[0].ljust(widths[0])]
+        cells += [cell.rjust(width) for cell, width in zip(row[1:], widths[1:], strict=False)]
+        yield "  ".join(cells).rstrip() + "\n"
+
+
+def _work_totals(work_set: ModelSelect, group_by: str) -> list[tuple[Any, int, int, float]]:
+    """
+    Totals of filtered work by day, ISO week, month or tag, as
+    (key, entries, entries with a duration, total duration).
+    """
+    filtered = work_set.alias("filtered")
+    if group_by == "tag":
+        key = Tag.name
+    else:
+        # bounds of the offsets needed, with an index lookup each
+        first = Work.select(fn.MIN(Work.timestamp).coerce(False)).scalar()
+        last = Work.select(fn.MAX(Work.timestamp).coerce(False)).scalar()
+        if first is None:
+            return []
+        local = _local_seconds(filtered.c.timestamp, utc_offsets(settings.TIME_ZONE, first, last))
+        if group_by == "day":
+            key = fn.date(local, "unixepoch")
+        elif group_by == "week":
+            # the monday of the ISO week
+            key = fn.date(local, "unixepoch", "weekday 0", "-6 days")
+        else:
+            key = fn.strftime("%Y-%m", local, "unixepoch")
+    query = Work.select(
+        key.alias("key"),
+        fn.COUNT(filtered.c.id),
+        fn.COUNT(filtered.c.duration),
+        fn.TOTAL(filtered.c.duration),
+    ).from_(filtered)
+    if group_by == "tag":
+        query = query.join(WorkTag, JOIN.LEFT_OUTER, on=(WorkTag.work == filtered.c.id)).join(
+            Tag, JOIN.LEFT_OUTER, on=(Tag.id == WorkTag.tag)
+        )
+    # by alias, rather than by repeating the expression and its parameters
+    return list(query.group_by(Entity("key")).tuples())
+
+
+def _rollup_totals(
+    group_by: str, first_day: datetime.date | None, last_day: datetime.date | None
+) -> list[tuple[Any, int, int, float]]:
+    """
+    Same as _work_totals, for all the work of whole days, from the daily totals.
+    """
+    if group_by == "tag":
+        # named after grouping, rather than joining each day to its tags
+        key = DailyRollup.tag
+        query = DailyRollup.select().where(DailyRollup.tag != ROLLUP_ALL)
+    else:
+        if group_by == "day":
+            key = DailyRollup.day
+        elif group_by == "week":
+            key = fn.date(DailyRollup.day, "weekday 0", "-6 days")
+        else:
+            key = fn.substr(DailyRollup.day, 1, 7)
+        query = DailyRollup.select().where(DailyRollup.tag == ROLLUP_ALL)
+    if first_day is not None and last_day is not None:
+        query = query.where(DailyRollup.day.between(first_day.isoformat(), last_day.isoformat()))
+    query = query.select(
+        key.alias("key"),
+        fn.SUM(DailyRollup.count),
+        fn.SUM(DailyRollup.timed),
+        fn.SUM(DailyRollup.total_minutes),
+    )
+    totals = list(query.group_by(Entity("key")).tuples())
+    if group_by == "tag":
+        names = dict(Tag.select(Tag.id, Tag.name).tuples())
+        totals = [(names.get(tag_id), *group) for tag_id, *group in totals]
+    return totals
+
+
+def _whole_days(
+    start: datetime.datetime, end: datetime.datetime
+) -> tuple[datetime.date, datetime.date] | None:
+    """
+    The first and last local days entirely between two times, if any.
+    """
+    tz = zoneinfo.ZoneInfo(settings.TIME_ZONE)
+
+    def day_start(day: datetime.date) -> datetime.datetime:
+        # the first instant of the day, even when midnight is skipped or repeated
+        return datetime.datetime.combine(day, datetime.time(), tzinfo=tz)
 
+    first_day = start.astimezone(tz).date()
+    if day_start(first_day) < start:
+        first_day += datetime.timedelta(days=1)
+    last_day = end.astimezone(tz).date()
+    # work is saved to the second, and the end is included
+    if day_start(last_day + datetime.timedelta(days=1)) > end + datetime.timedelta(seconds=1):
+        last_day -= datetime.timedelta(days=1)
+    return (first_day, last_day) if first_day <= last_day else None
+
+
+def _partial_days(
+    start: datetime.datetime,
+    end: datetime.datetime,
+    first_day: datetime.date,
+    last_day: datetime.date,
+) -> Any:
+    """
+    Filter of the work between two times, but not on the whole days between them.
+    """
+    tz = zoneinfo.ZoneInfo(settings.TIME_ZONE)
+    before = datetime.datetime.combine(first_day, datetime.time(), tzinfo=tz)
+    after = datetime.datetime.combine(
+        last_day + datetime.timedelta(days=1), datetime.time(), tzinfo=tz
+    )
+    return ((Work.timestamp >= start) & (Work.timestamp < before)) | (
+        (Work.timestamp >= after) & (Work.timestamp <= end)
+    )
+
+
+def report_work(
+    group_by: str,
+    count: int | None,
+    work_id: str,
+    start_date: str,
+    end_date: str,
+    since: str,
+    period: str | None,
+    on: str | None,
+    at: str | None,
+    reverse: bool,
+    tags: tuple[str, ...],
+    duration: str,
+    search: str,
+    all_time: bool,
+) -> None:
+    """
+    Show the number of entries and the total and average duration of work
+    filtered based on user input, by day, ISO week, month or tag.
+    The filtered work is aggregated by SQLite. Whole days of work that
+    is only filtered by date are read from the daily totals instead.
+    """
+    # work only filtered by date can be totalled from the daily totals,
+    # for which the date range is parsed here, and only once
+    by_date = count is None and not (work_id or tags or duration or search)
+    date_range = None
+    if by_date and not all_time:
+        date_range = _get_date_range(start_date, end_date, since, period, on, at)
+    work_set = _filter_work(
+        Work.select(Work.id, Work.timestamp, Work.duration),
+        count,
+        work_id,
+        start_date,
+        end_date,
+        since,
+        period,
+        on,
+        at,
+        reverse,
+        tags,
+        duration,
+        search,
+        all_time or date_range is not None,
+    )
+    if count is None:
+        # the order only matters for a limit, and SQLite can't
+        # flatten an ordered subquery into an aggregate query.
+        work_set = work_set.order_by()
+    try:
+        with init_db():
+            groups = []
+            all_rolled_up = False
+            if by_date and get_rollup_time_zone() == settings.TIME_ZONE:
+                if date_range is None:
+                    groups = _rollup_totals(group_by, None, None)
+                    all_rolled_up = True
+                elif days := _whole_days(*date_range):
+                    groups = _rollup_totals(group_by, *days)
+                    work_set = work_set.where(_partial_days(*date_range, *days))
+                    date_range = None
+            if date_range:
+                start, end = date_range
+                work_set = work_set.where((Work.timestamp >= start) & (Work.timestamp <= end))
+            if not all_rolled_up:
+                groups += _work_totals(work_set, group_by)
     except Exception as e:
         raise CannotFetchWorkError(extra_detail=str(e)) from e
 
+    # the totals of the days, and of the parts of days before and after them
+    totals: dict[Any, list[Any]] = {}
+    for group_key, entries, timed, total in groups:
+        group = totals.setdefault(group_key, [0, 0, 0.0])
+        group[0] += entries
+        group[1] += timed
+        group[2] += total
+    if not totals:
+        click.echo("Nothing to show, slacker.")
+        return
+
+    renderer = WorkRenderer()
+
+    def render_duration(minutes: float | None) -> str:
+        return renderer.render_duration(round(minutes, 2)) if minutes is not None else "-"
+
+    table = [(group_by.capitalize(), "Entries", "Total", "Average")]
+    # untagged work first, like SQLite sorts NULL
+    for group_key in sorted(totals, key=lambda key: (key is not None, key or ""), reverse=reverse):
+        entries, timed, total = totals[group_key]
+        table.append(
+            (
+                _report_label(group_by, group_key),
+                str(entries),
+                render_duration(total if timed else None),
+                render_duration(total / timed if timed else None),
+            )
+        )
+    # an entry with several tags counts for each of them
+    if group_by != "tag" and len(totals) > 1:
+        entries, timed, total = (sum(column) for column in zip(*totals.values(), strict=True))
+        table.append(
+            (
+                "Total",
+                str(entries),
+                render_duration(total if timed else None),
+                render_duration(total / timed if timed else None),
+            )
+        )
+    for line in _render_table(table):
+        click.echo(line, nl=False)
+
+
+def fetch_tags(sort_by: str = "name", usage: bool = False) -> ModelSelect:
+    """
+    Saved tags as (name,) tuples, or (name, entries, last used) tuples
+    with `usage`, counted in a single aggregate query. Tags are sorted
+    by name, by number of entries or by last use, the most first.
+    """
+    if not usage and sort_by == "name":
+        # the names alone are read off their index
+        return Tag.select(Tag.name).order_by(Tag.name).tuples()
+    entries = fn.COUNT(WorkTag.work)
+    last_used = fn.MAX(Work.timestamp)
+    order_by = {
+        "name": [Tag.name],
+        "entries": [entries.desc(), Tag.name],
+        "last-used": [last_used.desc(), Tag.name],
+    }[sort_by]
+    columns = [Tag.name, entries, last_used] if usage else [Tag.name]
+    return (
+        Tag.select(*columns)
+        .join(WorkTag, JOIN.LEFT_OUTER)
+        .join(Work, JOIN.LEFT_OUTER)
+        .group_by(Tag.id)
+        .order_by(*order_by)
+        .tuples()
+    )
+
+
+def print_tags(sort_by: str, usage: bool) -> None:
+    """
+    Print the saved tags, with the number of entries
+    and the date of the last one of each with `usage`.
+    """
+    tags = fetch_tags(sort_by, usage)
+    if not usage:
+        style = functools.partial(click.style, fg="white")
+        click.echo("".join(style(f"* {name}") + "\n" for (name,) in tags), nl=False)
+        return
+    tz = zoneinfo.ZoneInfo(settings.TIME_ZONE)
+    table = [("Tag", "Entries", "Last used")]
+    for name, entries, last_used in tags:
+        last_used_str = (
+            last_used.astimezone(tz).strftime(settings.DATE_FORMAT) if last_used else "-"
+        )
+        table.append((name, str(entries), last_used_str))
+    if len(table) > 1:
+        click.echo("".join(_render_table(table)), nl=False)
+
+
+def print_db_stats(db: SqliteDatabase) -> None:
+    """
+    Print the size of the database and the statistics of the statements run
+    on it, the ones that took the longest in all first.
+    """
+    page_size, page_count, free_pages, cache_size = (
+        db.execute_sql(f"PRAGMA {pragma};").fetchone()[0]
+        for pragma in ("page_size", "page_count", "freelist_count", "cache_size")
+    )
+    # a negative cache size is in KiB rather than pages
+    cache_bytes = -cache_size * 1024 if cache_size < 0 else cache_size * page_size
+    click.echo(
+        f"Database: {page_count} pages of {page_size} bytes ({page_count * page_size / 2**20:.1f}"
+        f" MiB), {free_pages} free. Page cache: {cache_bytes / 2**20:.1f} MiB."
+    )
+
+    stats = load_stats()
+    if not stats["statements"]:
+        hint = "" if settings.DB_STATS else " Set DB_STATS to True to keep them."
+        click.echo(f"No statement statistics yet.{hint}")
+    else:
+        entries = sorted(
+            stats["statements"].items(), key=lambda item: item[1]["total_ms"], reverse=True
+        )
+        since = datetime.datetime.fromtimestamp(
+            stats["since"], zoneinfo.ZoneInfo(settings.TIME_ZONE)
+        )
+        runs = sum(entry["count"] for _, entry in entries)
+        total_ms = sum(entry["total_ms"] for _, entry in entries)
+        click.echo(
+            f"{runs} statements run since {since.strftime(settings.DATE_FORMAT)},"
+            f" in {total_ms:.2f} ms:\n"
+        )
+        table = [("", "Runs", "Total ms", "p50 ms", "p99 ms", "Max ms")]
+        for _, entry in entries:
+            table.append(
+                (
+                    "",
+                    str(entry["count"]),
+                    f"{entry['total_ms']:.2f}",
+                    f"{percentile(entry, 0.5):.2f}",
+                    f"{percentile(entry, 0.99):.2f}",
+                    f"{entry['max_ms']:.2f}",
+                )
+            )
+        shapes = ["Statement", *(shape for shape, _ in entries)]
+        for line, shape in zip(_render_table(table), shapes, strict=True):
+            click.echo(f"{line.rstrip()}  {shape}")
 
-def fetch_tags() -> ModelSelect:
-    return Tag.select(Tag.name)
+    threshold = settings.DB_SLOW_QUERY_MS
+    if threshold:
+        slow = sum(1 for _ in slow_statements())
+        click.echo(f"\n{slow} statement(s) over {threshold} ms logged to {SLOW_LOG_PATH}")